@@ -0,0 +1,101 @@
+"""Benchmark: Monte Carlo catastrophe simulation over a reinsurance tower.
+
+Times a per-year, per-event Python loop on the first --loop-years years
+(extrapolated, since it is linear) against cat_simulation.simulate_losses()
+on --years years: once cold (samples drawn and written to a scratch
+memory-mapped cache), once warm (samples mapped from the cache), and
+warm again over a process pool of --workers processes.
+
+Usage:
+    python benchmarks/bench_cat_simulation.py [--years 1000000] [--loop-years 20000] [--workers 4]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Keep the sample cache out of the project while benchmarking
+SCRATCH_DIR = tempfile.mkdtemp(prefix='bench_cat_')
+os.environ['PNC_SIM_CACHE'] = SCRATCH_DIR
+
+from cat_simulation import simulate_losses, sample_dir, _chunk_samples, DEFAULT_FREQUENCY, DEFAULT_SEVERITY_SIGMA
+
+# 1M retention, then layers doubling in width
+ATTACHMENT = np.array([1e6, 2e6, 4e6, 8e6, 16e6])
+LIMIT = np.array([1e6, 2e6, 4e6, 8e6, 16e6])
+SCALE = 1e6
+SEED = 7
+
+
+def loop_simulation(years):
+    """The same years as simulate_losses(years), one year and one event at a time."""
+    counts, severity = _chunk_samples(sample_dir(DEFAULT_FREQUENCY, DEFAULT_SEVERITY_SIGMA, SEED), SEED, 0,
+                                      years, DEFAULT_FREQUENCY, DEFAULT_SEVERITY_SIGMA)
+    severity = severity.tolist()
+    aggregate, largest, layer = [], [], []
+    position = 0
+    for count in counts.tolist():
+        year_total, year_max = 0.0, 0.0
+        year_layers = [0.0] * len(ATTACHMENT)
+        for loss in severity[position:position + count]:
+            loss *= SCALE
+            year_total += loss
+            year_max = max(year_max, loss)
+            for j, (attachment, limit) in enumerate(zip(ATTACHMENT, LIMIT)):
+                year_layers[j] += min(max(loss - attachment, 0.0), limit)
+        position += count
+        aggregate.append(year_total)
+        largest.append(year_max)
+        layer.append(year_layers)
+    return {'aggregate': np.array(aggregate), 'largest': np.array(largest), 'layer': np.array(layer)}
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=1000000)
+    parser.add_argument('--loop-years', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    def vectorized(years, workers=1):
+        return simulate_losses(ATTACHMENT, LIMIT, years, scale=SCALE, seed=SEED, workers=workers)
+
+    looped, loop_seconds = timed(loop_simulation, args.loop_years)
+    check = vectorized(args.loop_years)
+    for name in looped:
+        assert np.allclose(looped[name], check[name]), name
+
+    _, cold_seconds = timed(vectorized, args.years)
+    result, warm_seconds = timed(vectorized, args.years)
+    _, pool_seconds = timed(vectorized, args.years, args.workers)
+
+    extrapolated = loop_seconds * args.years / args.loop_years
+    layer_el = result['layer'].mean(axis=0)
+    print(f"{args.years:,} years, {int((result['largest'] > 0).sum()):,} with events; "
+          f"layer expected losses: {', '.join(f'{v:,.0f}' for v in layer_el)}\n")
+    rows = [
+        (f"Python loop ({args.loop_years:,} years)", f"{loop_seconds * 1000:>10.0f} ms (~{extrapolated:.1f} s for {args.years:,})"),
+        ("NumPy, cold sample cache", f"{cold_seconds * 1000:>10.0f} ms"),
+        ("NumPy, memory-mapped cache", f"{warm_seconds * 1000:>10.0f} ms  ({extrapolated / warm_seconds:.0f}x the loop)"),
+        (f"NumPy, cache + {args.workers} workers", f"{pool_seconds * 1000:>10.0f} ms"),
+    ]
+    for label, value in rows:
+        print(f"{label:<34}: {value}")
+
+    shutil.rmtree(SCRATCH_DIR)
+
+
+if __name__ == '__main__':
+    main()
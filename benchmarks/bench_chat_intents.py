@@ -0,0 +1,91 @@
+"""Benchmark: chat intent routing throughput in messages per second.
+
+Compares the compiled single-pass router (underwritingcenter/chat_intents.py)
+with the previous approach of chained substring checks plus four regexes
+compiled inline per message.
+
+Usage:
+    python benchmarks/bench_chat_intents.py [--messages 200000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'underwritingcenter'))
+
+from chat_intents import route_intent
+
+SAMPLE_MESSAGES = [
+    "Any updates on my submissions?",
+    "Catch me up on what happened since Friday",
+    "What's on my priority list today?",
+    "What can you do?",
+    "Open SUB-2026-003",
+    "open submission 007",
+    "Please open Floor & Decor",
+    "Tell me about the floor and decor account",
+    "Gibt es Neuigkeiten zu meinen Einreichungen?",
+    "Bitte eine Zusammenfassung der heutigen Aktivitäten",
+    "Zeig mir meine Aktionsliste",
+    "Öffne SUB-2026-001-DE",
+    "öffne Möbel Schmidt",
+    "How is the loss ratio trending for the workers' comp book compared to last quarter?",
+]
+
+
+def legacy_route(user_input):
+    """The pre-router logic: substring chains plus per-message regex compilation."""
+    user_input_lower = user_input.lower()
+    submission_match = re.compile(r'sub-?(\d{4})-?(\d{3})').search(user_input_lower) or \
+        re.compile(r'(\d{4})-(\d{3})').search(user_input_lower) or \
+        re.compile(r'submission\s+(\d{3})').search(user_input_lower) or \
+        re.compile(r'open\s+(\d{3})').search(user_input_lower)
+    if submission_match:
+        return 'open_submission'
+    if 'open' in user_input_lower and ('floor' in user_input_lower or 'decor' in user_input_lower):
+        return 'open_submission'
+    if 'open' in user_input_lower and ('monrovia' in user_input_lower or 'metalworking' in user_input_lower):
+        return 'open_submission'
+    if 'open' in user_input_lower and ('construction' in user_input_lower or 'dynamics' in user_input_lower):
+        return 'open_submission'
+    if any(word in user_input_lower for word in ['update', 'updates', 'updated', 'updating']):
+        return 'update'
+    if 'catch' in user_input_lower or 'summary' in user_input_lower:
+        return 'catch_up'
+    if 'action' in user_input_lower or 'priority' in user_input_lower or 'todo' in user_input_lower or 'aktionsliste' in user_input_lower:
+        return 'priority'
+    if 'help' in user_input_lower or 'what can' in user_input_lower or 'metriken' in user_input_lower or 'hilfe' in user_input_lower:
+        return 'help'
+    if 'floor' in user_input_lower or '2026-001' in user_input_lower:
+        return 'company_info'
+    return None
+
+
+def bench(router, messages):
+    start = time.perf_counter()
+    for i in range(messages):
+        router(SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)])
+    return messages / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{'message':<60} {'intent':<16} {'submission':<16} company")
+    for message in SAMPLE_MESSAGES:
+        route = route_intent(message)
+        print(f"{message[:58]:<60} {str(route['intent']):<16} {str(route['submission_number']):<16} {route['company'] or ''}")
+    print()
+
+    legacy = bench(legacy_route, args.messages)
+    compiled = bench(route_intent, args.messages)
+    print(f"legacy substring chain : {legacy:>12,.0f} msg/s")
+    print(f"compiled router        : {compiled:>12,.0f} msg/s  ({compiled / legacy:.1f}x, with entity extraction)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark: claim log search with LIKE versus the FTS5 index.
+
+Builds a scratch database with a large claim_detail table (1M log entries by
+default), times LIKE '%term%' scans, then runs create_search_index() and times
+the same searches through database_queries.search_text(). LIKE has no notion
+of relevance, so it has to read every match (a full scan) before the best
+ones could be picked; FTS5 returns the 20 best-ranked directly.
+
+Usage:
+    python benchmarks/bench_fulltext_search.py [--entries 1000000] [--queries 20]
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# search_text() runs on the shared engine, so point it at the scratch file before importing
+SCRATCH_DIR = tempfile.mkdtemp(prefix='bench_fts_')
+os.environ['PNC_DEMO_DB'] = os.path.join(SCRATCH_DIR, 'bench.db')
+
+from sqlalchemy import text
+from db_engine import engine
+from seed_database import Base, Claim, ClaimDetail, create_search_index
+from database_queries import search_text
+
+# Log entries are mostly routine filler; domain terms are sparse, like in real claim notes
+FILLER = [f'note{i}' for i in range(5000)]
+DOMAIN_TERMS = (
+    "water damage roof storm warehouse fire smoke invoice contractor subrogation flood pipe "
+    "Gutachter Wasserschaden Rechnung Besichtigung Lager Brand Rohrbruch Sachverständiger Regress"
+).split()
+DOMAIN_TERM_RATE = 0.02
+QUERIES = ['water damage', 'Gutachter', 'subrogation', 'rohrbruch', 'Sachverst', 'no such term']
+CLAIMS_PER_ENTRY = 50
+
+
+def log_entry(rng, words):
+    return ' '.join(rng.choice(DOMAIN_TERMS) if rng.random() < DOMAIN_TERM_RATE else rng.choice(FILLER)
+                    for _ in range(words))
+
+
+def populate(entries):
+    rng = random.Random(42)
+    claims = max(entries // CLAIMS_PER_ENTRY, 1)
+    today = datetime.date.today()
+    with engine.begin() as conn:
+        # Scratch data only: the claims reference policies and parties that do not exist
+        conn.exec_driver_sql("PRAGMA foreign_keys = OFF")
+        conn.execute(Claim.__table__.insert(), [{
+            'id': i + 1, 'policy_id': 1, 'claim_number': f'CLM-BENCH-{i + 1:07d}',
+            'date_of_loss': today, 'reported_date': today, 'status': 'OPEN',
+            'reported_by_party_id': 1, 'description': log_entry(rng, 12),
+        } for i in range(claims)])
+        batch = []
+        for i in range(entries):
+            batch.append({'claim_id': rng.randint(1, claims), 'log_entry': log_entry(rng, 20)})
+            if len(batch) == 50000:
+                conn.execute(ClaimDetail.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(ClaimDetail.__table__.insert(), batch)
+
+
+def time_queries(search, repeats):
+    timings = {}
+    for query in QUERIES:
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            search(query)
+            samples.append(time.perf_counter() - start)
+        timings[query] = statistics.median(samples) * 1000
+    return timings
+
+
+def like_search(query):
+    clauses = ' AND '.join(f'log_entry LIKE :w{i}' for i in range(len(query.split())))
+    params = {f'w{i}': f'%{word}%' for i, word in enumerate(query.split())}
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT id, log_entry FROM claim_detail WHERE {clauses}"), params).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=20, help='repeats per query (median reported)')
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    start = time.perf_counter()
+    populate(args.entries)
+    print(f"Inserted {args.entries:,} claim log entries in {time.perf_counter() - start:.1f}s")
+
+    like = time_queries(like_search, max(args.queries // 10, 1))
+
+    start = time.perf_counter()
+    create_search_index(engine)
+    print(f"Built FTS5 indexes in {time.perf_counter() - start:.1f}s")
+    fts = time_queries(lambda query: search_text(query, entities=['claim_detail']), args.queries)
+
+    print(f"\n{'query':<22} {'LIKE (ms)':>12} {'FTS5 (ms)':>12} {'speedup':>10}")
+    for query in QUERIES:
+        print(f"{query:<22} {like[query]:>12.1f} {fts[query]:>12.2f} {like[query] / fts[query]:>9.1f}x")
+
+    engine.dispose()
+    for name in os.listdir(SCRATCH_DIR):
+        os.remove(os.path.join(SCRATCH_DIR, name))
+    os.rmdir(SCRATCH_DIR)
+
+
+if __name__ == '__main__':
+    main()
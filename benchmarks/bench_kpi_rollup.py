@@ -0,0 +1,114 @@
+"""Benchmark: underwriting dashboard KPIs from the kpi_rollup table versus aggregating the source tables.
+
+Generates a synthetic portfolio (1M policies by default) in a scratch
+database, installs the claim ledger and KPI rollup triggers, then times:
+
+- the aggregate the rollup replaces: every submission, quote, policy, claim
+  and ledger row grouped by quarter, market and broker (the backfill query)
+- get_dashboard_kpis(), which sums the pre-aggregated rollup rows
+- the write cost the triggers add: submission status changes (as a bind
+  makes) and new claim payments, each committed on its own, timed before
+  and after the KPI triggers are installed
+
+and finally checks the rollup against a full recomputation.
+
+Usage:
+    python benchmarks/bench_kpi_rollup.py [--policies 1000000] [--writes 500] [--workers 4]
+"""
+import argparse
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# get_dashboard_kpis() runs on the shared engine, so point it at the scratch file before importing
+SCRATCH_DIR = tempfile.mkdtemp(prefix='bench_kpi_')
+os.environ['PNC_DEMO_DB'] = os.path.join(SCRATCH_DIR, 'bench.db')
+
+from db_engine import DB_PATH, engine
+from seed_data_synthetic import generate_portfolio
+from seed_database import (
+    FinancialTransaction, Submission, _kpi_rows_sql, check_kpi_rollup, create_claim_ledger, create_kpi_rollup,
+)
+from kpi_engine import get_dashboard_kpis
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def aggregate_sources():
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(_kpi_rows_sql(submissions='1', policies='1')).fetchall()
+
+
+def write_latencies(writes, status):
+    """Milliseconds per committed status change and per committed claim payment."""
+    binds, payments = [], []
+    with engine.connect() as conn:
+        submission_ids = [row[0] for row in conn.exec_driver_sql(
+            f"SELECT id FROM submission ORDER BY id LIMIT {writes}")]
+        claim_ids = [row[0] for row in conn.exec_driver_sql(f"SELECT id FROM claim ORDER BY id LIMIT {writes}")]
+    for submission_id in submission_ids:
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(Submission.__table__.update().where(Submission.id == submission_id).values(status=status))
+        binds.append((time.perf_counter() - start) * 1000)
+    for claim_id in claim_ids:
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(FinancialTransaction.__table__.insert().values(
+                claim_id=claim_id, transaction_type='PAYMENT_INDEMNITY', amount=2500.0, currency='EUR',
+                transaction_date=datetime.date(2025, 6, 1)))
+        payments.append((time.perf_counter() - start) * 1000)
+    return binds, payments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--policies', type=int, default=1000000)
+    parser.add_argument('--writes', type=int, default=500, help='committed writes to time per kind')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    _, seconds = timed(generate_portfolio, DB_PATH, 'german', args.policies, workers=args.workers)
+    print(f"Generated {args.policies:,} policies in {seconds:.1f}s")
+    create_claim_ledger(engine)
+    plain_binds, plain_payments = write_latencies(args.writes, 'Quoted')
+    _, seconds = timed(create_kpi_rollup, engine)
+    with engine.connect() as conn:
+        rollup_rows = conn.exec_driver_sql("SELECT COUNT(*) FROM kpi_rollup").scalar()
+    print(f"Installed the KPI triggers and backfilled {rollup_rows:,} rollup rows in {seconds:.1f}s\n")
+
+    aggregate = [timed(aggregate_sources)[1] for _ in range(max(1, args.repeats // 2))]
+    kpis = [timed(get_dashboard_kpis, market='german')[1] for _ in range(args.repeats)]
+    binds, payments = write_latencies(args.writes, 'BOUND')
+    mismatched = check_kpi_rollup(engine)
+
+    rows = [
+        ("Aggregate over source tables", f"{statistics.median(aggregate) * 1000:>10.0f} ms"),
+        ("get_dashboard_kpis() (rollup)", f"{statistics.median(kpis) * 1000:>10.2f} ms"),
+        ("Dashboard speedup", f"{statistics.median(aggregate) / statistics.median(kpis):>10.0f}x"),
+        ("Bind, without / with triggers", f"{statistics.median(plain_binds):>10.2f} / {statistics.median(binds):.2f} ms"),
+        ("Payment, without / with triggers",
+         f"{statistics.median(plain_payments):>10.2f} / {statistics.median(payments):.2f} ms"),
+        ("Rollup keys out of step", f"{len(mismatched):>10}"),
+    ]
+    for label, value in rows:
+        print(f"{label:<34}: {value}")
+
+    engine.dispose()
+    for name in os.listdir(SCRATCH_DIR):
+        os.remove(os.path.join(SCRATCH_DIR, name))
+    os.rmdir(SCRATCH_DIR)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark: loss-to-layer allocation and cash call generation.
+
+Runs synthetic ground-up losses (lognormal, 10k claims by default) through a
+tower of --layers layers with --participants participants each, comparing a
+per-claim/layer/participant Python loop with layer_allocation.allocate_losses().
+Then writes the resulting cash calls into a scratch database, once with
+session.add() per CashCall and once with generate_cash_calls(), both with
+the claim ledger triggers installed.
+
+Usage:
+    python benchmarks/bench_layer_allocation.py [--claims 10000] [--layers 5] [--participants 5]
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# generate_cash_calls() runs on the shared engine, so point it at the scratch file before importing
+SCRATCH_DIR = tempfile.mkdtemp(prefix='bench_alloc_')
+os.environ['PNC_DEMO_DB'] = os.path.join(SCRATCH_DIR, 'bench.db')
+
+from db_engine import engine, Session
+from seed_database import Base, CashCall, create_claim_ledger
+from layer_allocation import make_tower, allocate_losses, generate_cash_calls
+
+
+def synthetic_tower(layers, participants):
+    """Contiguous layers doubling in width above a 1M retention, equal shares per layer."""
+    limits = 1e6 * 2.0 ** np.arange(layers)
+    attachments = 1e6 + np.concatenate(([0.0], np.cumsum(limits)[:-1]))
+    return make_tower(
+        attachment=attachments,
+        limit=limits,
+        participant_layer=np.repeat(np.arange(layers), participants),
+        share=np.full(layers * participants, 1.0 / participants),
+        participant_id=np.arange(1, layers * participants + 1),
+    )
+
+
+def loop_allocation(losses, tower):
+    """Per-claim, per-layer, per-participant allocation as plain Python."""
+    recoveries = []
+    for loss in losses:
+        row = []
+        for layer, share in zip(tower['participant_layer'], tower['share']):
+            penetration = loss - tower['attachment'][layer]
+            layer_recovery = min(max(penetration, 0.0), tower['limit'][layer])
+            row.append(layer_recovery * share)
+        recoveries.append(row)
+    return recoveries
+
+
+def orm_cash_calls(claim_ids, recoveries, tower):
+    due_date = datetime.date.today() + datetime.timedelta(days=30)
+    session = Session()
+    for claim_id, row in zip(claim_ids, recoveries):
+        for participant_id, amount in zip(tower['participant_id'], row):
+            if amount >= 0.01:
+                session.add(CashCall(claim_id=int(claim_id), layer_participant_id=int(participant_id),
+                                     call_amount=round(amount, 2), currency='CHF', due_date=due_date))
+    session.commit()
+    session.close()
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--claims', type=int, default=10000)
+    parser.add_argument('--layers', type=int, default=5)
+    parser.add_argument('--participants', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    losses = rng.lognormal(mean=14.5, sigma=1.2, size=args.claims)
+    tower = synthetic_tower(args.layers, args.participants)
+    claim_ids = np.arange(1, args.claims + 1)
+
+    looped, loop_seconds = timed(loop_allocation, losses, tower)
+    allocation, numpy_seconds = timed(allocate_losses, losses, tower)
+    assert np.allclose(looped, allocation['participant'])
+    calls = int((allocation['participant'] >= 0.01).sum())
+
+    Base.metadata.create_all(engine)
+    create_claim_ledger(engine)
+    _, orm_seconds = timed(orm_cash_calls, claim_ids, looped, tower)
+    with engine.begin() as conn:
+        conn.execute(CashCall.__table__.delete())
+    inserted, bulk_seconds = timed(generate_cash_calls, claim_ids, losses, tower)
+    assert inserted == calls, (inserted, calls)
+
+    cells = args.claims * args.layers * args.participants
+    print(f"{args.claims:,} claims x {args.layers} layers x {args.participants} participants "
+          f"({cells:,} allocations, {calls:,} cash calls, "
+          f"{allocation['ceded'].sum() / losses.sum():.1%} of ground-up loss ceded)\n")
+    rows = [
+        ("Python loop allocation", f"{loop_seconds * 1000:>10.1f} ms"),
+        ("NumPy allocate_losses", f"{numpy_seconds * 1000:>10.2f} ms  ({loop_seconds / numpy_seconds:.0f}x)"),
+        ("CashCall via session.add", f"{orm_seconds * 1000:>10.0f} ms"),
+        ("generate_cash_calls (bulk)", f"{bulk_seconds * 1000:>10.0f} ms  ({orm_seconds / bulk_seconds:.1f}x)"),
+    ]
+    for label, value in rows:
+        print(f"{label:<28}: {value}")
+
+    engine.dispose()
+    for name in os.listdir(SCRATCH_DIR):
+        os.remove(os.path.join(SCRATCH_DIR, name))
+    os.rmdir(SCRATCH_DIR)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark: polymorphic party_role lookups before and after the declared indexes.
+
+Builds a scratch database with a large party_role table (1M rows by default),
+times the two lookups the customer portal relies on with no secondary
+indexes, then runs create_missing_indexes() and times them again.
+
+Usage:
+    python benchmarks/bench_party_role_indexes.py [--rows 1000000] [--lookups 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sqlalchemy import create_engine, text
+from seed_database import Base, PartyRole, create_missing_indexes
+
+ROLES = ['Insured', 'Insurer', 'Broker', 'Claimant', 'Reinsurer']
+CONTEXT_TABLES = ['policy', 'claim', 'submission']
+
+LOOKUPS = {
+    'context (portal insurer lookup)': (
+        "SELECT party_id FROM party_role "
+        "WHERE context_table = :table AND context_id = :cid AND role_name = :role"
+    ),
+    'party (portal policy list)': (
+        "SELECT context_id FROM party_role WHERE party_id = :pid AND role_name = :role"
+    ),
+}
+
+
+def populate(engine, rows):
+    parties = max(rows // 10, 1)
+    contexts = max(rows // 5, 1)
+    rng = random.Random(42)
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            batch.append({
+                'party_id': rng.randint(1, parties),
+                'role_name': ROLES[i % len(ROLES)],
+                'context_table': CONTEXT_TABLES[i % len(CONTEXT_TABLES)],
+                'context_id': rng.randint(1, contexts),
+            })
+            if len(batch) == 50000:
+                conn.execute(PartyRole.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(PartyRole.__table__.insert(), batch)
+    return parties, contexts
+
+
+def time_lookups(engine, lookups, parties, contexts):
+    rng = random.Random(7)
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in LOOKUPS.items():
+            stmt = text(sql)
+            timings = []
+            for _ in range(lookups):
+                params = {
+                    'table': rng.choice(CONTEXT_TABLES),
+                    'cid': rng.randint(1, contexts),
+                    'pid': rng.randint(1, parties),
+                    'role': rng.choice(ROLES),
+                }
+                start = time.perf_counter()
+                conn.execute(stmt, params).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        # Start from the pre-index schema
+        with engine.begin() as conn:
+            for index in PartyRole.__table__.indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+        print(f"Populating party_role with {args.rows:,} rows...")
+        parties, contexts = populate(engine, args.rows)
+
+        before = time_lookups(engine, args.lookups, parties, contexts)
+        start = time.perf_counter()
+        create_missing_indexes(engine)
+        build_seconds = time.perf_counter() - start
+        after = time_lookups(engine, args.lookups, parties, contexts)
+        engine.dispose()
+
+    print(f"\nIndex build (migration) time: {build_seconds:.2f}s")
+    print(f"{'Lookup':<34}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for name in LOOKUPS:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"{name:<34}{before[name]:>14.3f}{after[name]:>14.3f}{speedup:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark: Statement of Values total from the asset_detail key-value rows versus asset_attribute.
+
+Builds a scratch database with one policy per 100 assets (1M assets by
+default, three detail rows each), then times:
+
+- the ORM walk the SOV screen used: load assets with their details, pick
+  'Replacement Value' with next(...) and sum float() of the strings
+  (run on the first --orm-assets assets and extrapolated, since it is linear)
+- the typed pivot: one SUM over asset_attribute, for the whole portfolio and
+  for a single policy (covering index range scan)
+
+Usage:
+    python benchmarks/bench_sov.py [--assets 1000000] [--orm-assets 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# get_sov_total() runs on the shared engine, so point it at the scratch file before importing
+SCRATCH_DIR = tempfile.mkdtemp(prefix='bench_sov_')
+os.environ['PNC_DEMO_DB'] = os.path.join(SCRATCH_DIR, 'bench.db')
+
+from sqlalchemy.orm import selectinload
+from db_engine import engine, Session
+from seed_database import Base, InsurableAsset, AssetDetail, create_asset_attributes
+from database_queries import get_sov_total
+
+ASSETS_PER_POLICY = 100
+CONSTRUCTION = ['Concrete', 'Steel frame', 'Masonry', 'Timber']
+
+
+def populate(assets):
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for start in range(0, assets, 50000):
+            ids = range(start + 1, min(start + 50000, assets) + 1)
+            conn.execute(InsurableAsset.__table__.insert(), [
+                {'id': i, 'policy_id': (i - 1) // ASSETS_PER_POLICY + 1, 'asset_type': 'Building',
+                 'description': f'Location {i}'} for i in ids
+            ])
+            details = []
+            for i in ids:
+                details.append({'asset_id': i, 'detail_key': 'Replacement Value',
+                                'detail_value': str(rng.randint(100, 50000) * 1000)})
+                details.append({'asset_id': i, 'detail_key': 'Year Built', 'detail_value': str(rng.randint(1950, 2024))})
+                details.append({'asset_id': i, 'detail_key': 'Construction', 'detail_value': rng.choice(CONSTRUCTION)})
+            conn.execute(AssetDetail.__table__.insert(), details)
+
+
+def orm_walk(limit):
+    """The previous SOV logic, over the first `limit` assets."""
+    session = Session()
+    assets = session.query(InsurableAsset).options(
+        selectinload(InsurableAsset.details)
+    ).order_by(InsurableAsset.id).limit(limit).all()
+    total = 0.0
+    for asset in assets:
+        value = next((d.detail_value for d in asset.details if d.detail_key == 'Replacement Value'), 'N/A')
+        if value != 'N/A':
+            total += float(value)
+    session.close()
+    return total
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--assets', type=int, default=1000000)
+    parser.add_argument('--orm-assets', type=int, default=100000)
+    args = parser.parse_args()
+    orm_assets = min(args.orm_assets, args.assets)
+
+    Base.metadata.create_all(engine)
+    _, seconds = timed(populate, args.assets)
+    print(f"Inserted {args.assets:,} assets / {args.assets * 3:,} detail rows in {seconds:.1f}s")
+    _, seconds = timed(create_asset_attributes, engine)
+    print(f"Backfilled asset_attribute with the CASE pivot in {seconds:.1f}s\n")
+
+    orm_total, orm_seconds = timed(orm_walk, orm_assets)
+    sql_subset, _ = timed(get_sov_total, list(range(1, orm_assets // ASSETS_PER_POLICY + 1)))
+    assert abs(orm_total - sql_subset) < 1, (orm_total, sql_subset)
+    portfolio, sql_seconds = timed(get_sov_total)
+    _, policy_seconds = timed(get_sov_total, [1])
+
+    extrapolated = orm_seconds * args.assets / orm_assets
+    rows = [
+        (f"ORM walk ({orm_assets:,} assets)", f"{orm_seconds * 1000:>10.0f} ms (~{extrapolated:.1f} s for {args.assets:,})"),
+        ("SUM over asset_attribute (all)", f"{sql_seconds * 1000:>10.1f} ms -> EUR {portfolio:,.0f}"),
+        ("SUM for one policy", f"{policy_seconds * 1000:>10.2f} ms"),
+        ("Portfolio speedup", f"{extrapolated / sql_seconds:>10.0f}x"),
+    ]
+    for label, value in rows:
+        print(f"{label:<34}: {value}")
+
+    engine.dispose()
+    for name in os.listdir(SCRATCH_DIR):
+        os.remove(os.path.join(SCRATCH_DIR, name))
+    os.rmdir(SCRATCH_DIR)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Benchmark: time-to-first-render of the three Streamlit apps in a fresh process.
+
+Each app is rendered --repeats times, each time in a new interpreter started
+with `python -X importtime`, against a scratch copy of a seeded demo database
+(the market seed plus the portal customer). Streamlit and its AppTest driver
+are imported before the clock starts, as in a running server, so the first
+render covers what a new server process pays on its first page view: the
+app's own imports, the database bootstrap and the script run. The second
+render of the same session is reported for comparison.
+
+Import times come from the -X importtime log of the first render. Packages
+are ranked by cumulative time, so a package's time includes the
+dependencies it pulled in first.
+
+--save writes the medians as a JSON baseline and --compare checks against
+one (same format and rules as suite.py), exiting with status 1 on a
+regression.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeats 5] [--apps underwriter,customer,stp] [--top 8]
+    python benchmarks/bench_startup.py --save startup.json | --compare startup.json [--threshold 20]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+# Scratch database, set before the build imports db_engine
+SCRATCH_DIR = tempfile.mkdtemp(prefix='bench_startup_')
+os.environ['PNC_DEMO_DB'] = os.path.join(SCRATCH_DIR, 'pnc_demo.db')
+
+from load_harness import APPS, SRC_DIR, build_database
+from suite import compare
+
+GROUP = 'startup'
+FIRST_RENDER_MARK = '-- first render --'
+WARM_RENDER_MARK = '-- second render --'
+
+# Runs in the fresh interpreter: argv[1] is the app script
+DRIVER = f"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+at.secrets['OPENAI_API_KEY'] = 'startup-benchmark'
+print({FIRST_RENDER_MARK!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+print({WARM_RENDER_MARK!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+at.run()
+warm = time.perf_counter() - start
+print(json.dumps({{'first_ms': first * 1000, 'warm_ms': warm * 1000,
+                  'exception': at.exception[0].message if at.exception else None}}))
+"""
+
+
+def parse_importtime(log):
+    """Cumulative ms per top-level package imported during the first render, and their total."""
+    packages = {}
+    total_us = 0
+    in_render = False
+    for line in log.splitlines():
+        if line == FIRST_RENDER_MARK:
+            in_render = True
+            continue
+        if line == WARM_RENDER_MARK:
+            break
+        if not in_render or not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth == 0:
+            total_us += int(cumulative)
+        # A package's own entry (not a submodule) covers everything it imported
+        if '.' not in name and name not in packages:
+            packages[name] = int(cumulative) / 1000
+    return packages, total_us / 1000
+
+
+def render_once(app_path, db_path, scratch_db):
+    """One cold start: (first_ms, warm_ms, imports_ms, packages, exception)."""
+    shutil.copy(db_path, scratch_db)
+    env = dict(os.environ, PNC_DEMO_DB=scratch_db, PYTHONPATH=SRC_DIR, STREAMLIT_LOGGER_LEVEL='error',
+               PYTHONWARNINGS='ignore')
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', DRIVER, app_path],
+                          capture_output=True, text=True, env=env, cwd=os.path.dirname(app_path))
+    if proc.returncode:
+        raise RuntimeError(f"{os.path.basename(app_path)} failed to start:\n{proc.stderr[-2000:]}")
+    timing = json.loads(proc.stdout.strip().splitlines()[-1])
+    packages, imports_ms = parse_importtime(proc.stderr)
+    return timing['first_ms'], timing['warm_ms'], imports_ms, packages, timing['exception']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--apps', default=','.join(APPS), help='comma-separated apps to start')
+    parser.add_argument('--repeats', type=int, default=5, help='cold starts per app')
+    parser.add_argument('--market', default='german', choices=['german', 'us'])
+    parser.add_argument('--top', type=int, default=8, help='heaviest imported packages to list per app')
+    parser.add_argument('--save', metavar='PATH', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=20.0, help='allowed median slowdown in percent')
+    parser.add_argument('--min-ms', type=float, default=20.0, help='ignore slowdowns smaller than this')
+    args = parser.parse_args()
+
+    db_path = os.path.join(SCRATCH_DIR, 'seeded.db')
+    build_database(db_path, 0, args.market, 1)
+
+    current = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'market': args.market,
+        'repeats': args.repeats,
+        'results': {GROUP: {}},
+    }
+    try:
+        for app in args.apps.split(','):
+            app_path = APPS[app.strip()]
+            name = os.path.basename(app_path)
+            runs = [render_once(app_path, db_path, os.path.join(SCRATCH_DIR, 'pnc_demo.db'))
+                    for _ in range(args.repeats)]
+            first = [run[0] for run in runs]
+            packages = defaultdict(list)
+            for run in runs:
+                for package, ms in run[3].items():
+                    packages[package].append(ms)
+            heaviest = sorted(((statistics.median(ms), package) for package, ms in packages.items()), reverse=True)
+
+            print(f"\n{name}: first render {statistics.median(first):.0f} ms (best {min(first):.0f}), "
+                  f"second render {statistics.median(run[1] for run in runs):.0f} ms, "
+                  f"imports during first render {statistics.median(run[2] for run in runs):.0f} ms")
+            for ms, package in heaviest[:args.top]:
+                print(f"    {package:<28} {ms:>8.0f} ms")
+            if runs[0][4]:
+                print(f"    (the render raised: {runs[0][4].splitlines()[0][:120]})")
+            current['results'][GROUP][f'{name} first render'] = {
+                'median_ms': statistics.median(first), 'best_ms': min(first), 'runs': len(first),
+            }
+    finally:
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Saved baseline to {args.save}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} app(s) regressed by more than {args.threshold:.0f}%:")
+            for _, name, change in regressions:
+                print(f"  {name}: {change:+.1f}%")
+            sys.exit(1)
+        print(f"\nNo regressions above {args.threshold:.0f}%.")
+
+
+if __name__ == '__main__':
+    main()
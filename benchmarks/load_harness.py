@@ -0,0 +1,460 @@
+"""Load harness: concurrent simulated sessions against the three Streamlit apps.
+
+Every simulated user drives one app headlessly with streamlit.testing.v1.AppTest
+through a scripted journey, one AppTest (one browser session) per journey:
+
+  underwriter  open the dashboard, open SUB-2026-001 from the assistant,
+               summarize and accept, generate the quote, send it to the
+               broker and ask the assistant to "catch me up"
+  customer     open the portal and get a quote from an offer, playing the
+               quote flow back until it is saved
+  stp          open the PolicyCenter demo and switch to the STP dashboard
+
+--sessions users run at once, split by --mix, each repeating its journey
+--iterations times (or until --duration seconds have passed). Every session
+is its own process: AppTest swaps process-wide state (the runtime, secrets
+and config) on each run, so one interpreter can only drive one session at a
+time. The sessions therefore share no caches or connection pool, only the
+database, which is where they contend. They start together once all of
+them have imported Streamlit.
+
+The database is a market seed (SUB-2026-001 is in both: -DE for German)
+scaled up with --policies synthetic policies, plus the portal customer; it
+is built once into --data-dir and copied to a scratch file for each run, so
+the journeys' writes never accumulate. The portal's quote flow is served by
+a local stand-in for the OpenAI API, so no request leaves the machine.
+
+Reports rerun latency percentiles per journey step (each AppTest.run(),
+i.e. one script rerun including the reruns it triggers), reruns and journeys
+per second, errors, and DB lock waits: write statements that took longer
+than --lock-wait-ms, which on SQLite means they sat in busy_timeout waiting
+for another session's write lock, plus "database is locked" errors.
+
+Usage:
+    python benchmarks/load_harness.py [--sessions 8] [--mix underwriter=3,customer=1,stp=1] [--policies 10k]
+    python benchmarks/load_harness.py --sessions 16 --duration 60 [--json load.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..', 'src'))
+UNDERWRITING_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..', 'underwritingcenter'))
+sys.path[:0] = [SRC_DIR, UNDERWRITING_DIR, BENCH_DIR]
+# Keep the apps' widget warnings out of the report
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+
+from suite import parse_size
+
+APPS = {
+    'underwriter': os.path.join(UNDERWRITING_DIR, 'app_underwriting.py'),
+    'customer': os.path.join(SRC_DIR, 'app_customer_portal.py'),
+    'stp': os.path.join(SRC_DIR, 'app_v2.py'),
+}
+DEFAULT_MIX = 'underwriter=3,customer=1,stp=1'
+DEMO_SUBMISSION = {'us': 'SUB-2026-001', 'german': 'SUB-2026-001-DE'}
+STP_CASE = 'Case 4: API Integration Demo'
+PERCENTILES = (50, 95, 99)
+
+# The customer every portal and STP dashboard session logs in as, and the offer they quote
+PORTAL_NAME = 'Maria Weber'
+PORTAL_EMAIL = 'maria.weber@example.com'
+PORTAL_PRODUCT = 'Travel Insurance'
+PORTAL_AD_COPY = "Travelling this year? Medical, cancellation and baggage cover from CHF 89."
+
+# Served by the OpenAI stand-in: a quote flow in the shape get_quote_flow() asks for
+QUOTE_FLOW = [
+    {'type': 'bot', 'text': "Hi [CUSTOMER_NAME]! Let's get your Travel Insurance quote. This takes 15 seconds."},
+    {'type': 'user', 'text': "Sounds good!"},
+    {'type': 'bot', 'text': "**Where are you travelling, and for how long?**"},
+    {'type': 'user', 'text': "Portugal, 10 days"},
+    {'type': 'bot', 'text': "**How many travellers?** Any pre-existing conditions?"},
+    {'type': 'user', 'text': "Two adults, no conditions"},
+    {'type': 'bot', 'text': "🎉 **Your Personalized Quote:**\n\n✓ Medical Coverage: CHF 100,000\n\n"
+                            "**Total Premium: CHF 119**\n\nThis quote is bindable and ready to purchase! "
+                            "⏱️ Generated in 12 seconds"},
+]
+
+
+# --- Database Setup ---
+
+def build_database(db_path, policies, market, workers):
+    """Market seed plus `policies` synthetic policies, the derived schema and the portal customer."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from seed_data_german import seed_german_data
+    from seed_data_synthetic import generate_portfolio
+    from seed_data_us import seed_us_data
+    from seed_database import Base, Party, CustomerUser, GeneratedAd, upgrade_schema, set_schema_version
+
+    partial = db_path + '.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    engine = create_engine(f'sqlite:///{partial}')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    {'german': seed_german_data, 'us': seed_us_data}[market](session)
+    session.close()
+    engine.dispose()
+
+    if policies:
+        generate_portfolio(partial, market, policies, workers=workers)
+
+    engine = create_engine(f'sqlite:///{partial}')
+    upgrade_schema(engine)
+    session = sessionmaker(bind=engine)()
+    party = Party(party_type='PERSON', name=PORTAL_NAME, email=PORTAL_EMAIL, country='Switzerland')
+    user = CustomerUser(party=party, email=PORTAL_EMAIL, password_hash='-')
+    session.add_all([party, user])
+    session.flush()
+    session.add(GeneratedAd(user_id=user.id, product_type=PORTAL_PRODUCT, ad_copy=PORTAL_AD_COPY,
+                            image_url='https://example.com/travel.png'))
+    session.commit()
+    session.close()
+    set_schema_version(engine)
+    engine.dispose()
+    os.replace(partial, db_path)
+
+
+# --- OpenAI Stand-in ---
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    """Answers every chat completion with the quote flow."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = json.dumps({
+            'id': 'chatcmpl-load', 'object': 'chat.completion', 'created': int(time.time()), 'model': 'gpt-4',
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': json.dumps(QUOTE_FLOW)}}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_openai_stub():
+    """Serves _CompletionHandler on a free local port; returns the server."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _CompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- Lock Waits ---
+
+class LockMonitor:
+    """Times write statements on the shared engine; slow ones waited for the write lock."""
+
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.waits_ms = []
+        self.locked_errors = 0
+
+    def install(self, bind):
+        from sqlalchemy import event
+        event.listen(bind, 'before_cursor_execute', self._before)
+        event.listen(bind, 'after_cursor_execute', self._after)
+        event.listen(bind, 'handle_error', self._error)
+
+    @staticmethod
+    def _is_write(statement):
+        return statement.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE', 'REPLAC')
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if self._is_write(statement):
+            conn.info['load_write_start'] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('load_write_start', None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.writes += 1
+            if duration_ms >= self.threshold_ms:
+                self.waits_ms.append(duration_ms)
+
+    def _error(self, context):
+        if context.connection is not None:
+            context.connection.info.pop('load_write_start', None)
+        if 'database is locked' in str(context.original_exception):
+            with self.lock:
+                self.locked_errors += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {'writes': self.writes, 'waits_ms': list(self.waits_ms), 'locked_errors': self.locked_errors}
+
+
+_monitor = None
+
+
+def lock_monitor(threshold_ms):
+    """This process's LockMonitor on the shared engine, installed on first use."""
+    global _monitor
+    if _monitor is None:
+        from db_engine import engine
+        _monitor = LockMonitor(threshold_ms)
+        _monitor.install(engine)
+    return _monitor
+
+
+# --- Journeys ---
+# journey -> steps; each step is (label, action(at)), and every action ends in at.run()
+
+def _click(label):
+    def action(at):
+        for button in at.button:
+            if button.label == label:
+                return button.click().run()
+        raise LookupError(f"no '{label}' button on the page")
+    return action
+
+
+def _chat(text):
+    return lambda at: at.chat_input[0].set_value(text).run()
+
+
+def _get_quote(at):
+    _click('💰 Get Free Quote')(at)
+    if not at.session_state['quote_saved_to_db']:
+        raise RuntimeError("quote flow finished without saving the quote")
+
+
+def journey_steps(journey, market):
+    if journey == 'underwriter':
+        number = DEMO_SUBMISSION[market]
+        return [
+            ('open dashboard', lambda at: at.run()),
+            (f'open {number}', _chat(f'open {number}')),
+            ('summarize', _click('✨ Summarize with AI')),
+            ('accept summary', _click('✅ Accept Summary')),
+            ('generate quote', _click('+ Generate Proposal')),
+            ('send to broker', _click('📧 Send to Broker')),
+            ('catch me up', _chat('catch me up')),
+        ]
+    if journey == 'customer':
+        return [
+            ('open portal', lambda at: at.run()),
+            ('get quote', _get_quote),
+        ]
+    return [
+        ('open policycenter', lambda at: at.run()),
+        ('stp dashboard', lambda at: at.sidebar.radio[0].set_value(STP_CASE).run()),
+        ('refresh', lambda at: at.run()),
+    ]
+
+
+def run_session(journey, config):
+    """Repeats one journey; returns (journey, step, seconds, error) records."""
+    from streamlit.testing.v1 import AppTest
+
+    deadline = time.perf_counter() + config['duration'] if config['duration'] else None
+    records = []
+    iteration = 0
+    while (iteration < config['iterations']) if deadline is None else (time.perf_counter() < deadline):
+        iteration += 1
+        at = AppTest.from_file(APPS[journey], default_timeout=config['timeout'])
+        at.secrets['OPENAI_API_KEY'] = 'load-test'
+        for label, action in journey_steps(journey, config['market']):
+            error = None
+            started = time.perf_counter()
+            try:
+                action(at)
+                if at.exception:
+                    error = at.exception[0].message
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            records.append((journey, label, time.perf_counter() - started, error))
+            if error:
+                break
+    return records
+
+
+def session_process(journey, config, barrier, results):
+    """One simulated session: puts (records, lock waits, start, end) on the results queue."""
+    records, started = [], time.time()
+    warnings.simplefilter('ignore')  # the apps' deprecation warnings, once per rerun
+    try:
+        from streamlit.testing.v1 import AppTest  # imported before the start, like a running server
+        monitor = lock_monitor(config['lock_wait_ms'])
+        barrier.wait()
+        started = time.time()
+        records = run_session(journey, config)
+    except Exception as e:
+        records.append((journey, 'session', 0.0, f"{type(e).__name__}: {e}"))
+    finally:
+        locks = _monitor.snapshot() if _monitor else {'writes': 0, 'waits_ms': [], 'locked_errors': 0}
+        results.put((records, locks, started, time.time()))
+
+
+# --- Report ---
+
+def parse_mix(text, sessions):
+    """'underwriter=3,customer=1' and 8 sessions -> one journey name per session, spread by weight."""
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in APPS:
+            raise SystemExit(f"Unknown journey '{name.strip()}' (expected one of {sorted(APPS)})")
+        weights[name.strip()] = float(weight or 1)
+    total = sum(weights.values())
+    counts = {name: int(sessions * weight / total) for name, weight in weights.items()}
+    # Hand the sessions lost to rounding down to the largest remainders
+    remainders = sorted(weights, key=lambda name: sessions * weights[name] / total - counts[name], reverse=True)
+    for name in remainders[:sessions - sum(counts.values())]:
+        counts[name] += 1
+    return [name for name, count in counts.items() for _ in range(count)]
+
+
+def summarize(records, locks, wall, args):
+    steps = defaultdict(list)
+    errors = defaultdict(list)
+    for journey, label, seconds, error in records:
+        steps[(journey, label)].append(seconds * 1000)
+        errors[(journey, label)].extend([error] if error else [])
+    all_ms = np.array([seconds * 1000 for _, _, seconds, _ in records])
+    journeys = sum(1 for journey, label, _, error in records
+                   if not error and label == journey_steps(journey, args.market)[-1][0])
+
+    def stats(values):
+        values = np.asarray(values)
+        result = {f'p{p}_ms': float(np.percentile(values, p)) for p in PERCENTILES}
+        result.update(runs=len(values), max_ms=float(values.max()))
+        return result
+
+    waits = np.array(locks['waits_ms'])
+    return {
+        'sessions': args.sessions,
+        'policies': args.policies,
+        'market': args.market,
+        'wall_s': wall,
+        'reruns': len(records),
+        'journeys_completed': journeys,
+        'reruns_per_s': len(records) / wall if wall else 0.0,
+        'journeys_per_s': journeys / wall if wall else 0.0,
+        'all': stats(all_ms) if len(all_ms) else None,
+        'steps': {f'{journey} / {label}': {**stats(values), 'errors': len(errors[(journey, label)])}
+                  for (journey, label), values in steps.items()},
+        'errors': {f'{journey} / {label}': messages[0] for (journey, label), messages in errors.items() if messages},
+        'lock_waits': {
+            'threshold_ms': args.lock_wait_ms,
+            'writes': locks['writes'],
+            'waits': len(waits),
+            'total_ms': float(waits.sum()),
+            'max_ms': float(waits.max()) if len(waits) else 0.0,
+            'locked_errors': locks['locked_errors'],
+        },
+    }
+
+
+def print_report(result):
+    print(f"\n{result['sessions']} sessions, {result['policies']:,} synthetic policies: "
+          f"{result['reruns']} reruns and {result['journeys_completed']} journeys in {result['wall_s']:.1f} s "
+          f"({result['reruns_per_s']:.2f} reruns/s, {result['journeys_per_s']:.2f} journeys/s)\n")
+    print(f"{'step':<40} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    # Journeys in APPS order, steps in journey order
+    rows = sorted(result['steps'].items(), key=lambda item: list(APPS).index(item[0].split(' / ')[0]))
+    if result['all']:
+        rows.append(('all reruns', {**result['all'], 'errors': len(result['errors'])}))
+    for name, row in rows:
+        print(f"{name:<40} {row['runs']:>5} {row['p50_ms']:>9.0f} {row['p95_ms']:>9.0f} {row['p99_ms']:>9.0f} "
+              f"{row['max_ms']:>9.0f} {row['errors']:>7}")
+    locks = result['lock_waits']
+    print(f"\nDB writes: {locks['writes']}, lock waits (>= {locks['threshold_ms']:.0f} ms): {locks['waits']} "
+          f"totalling {locks['total_ms']:.0f} ms (max {locks['max_ms']:.0f} ms), "
+          f"'database is locked' errors: {locks['locked_errors']}")
+    for name, message in result['errors'].items():
+        print(f"  error in {name}: {message.splitlines()[0][:160] if message else '?'}")
+
+
+# --- Driver ---
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8, help='simulated users at once')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='journey weights, e.g. underwriter=3,customer=1,stp=1')
+    parser.add_argument('--iterations', type=int, default=3, help='journeys per session')
+    parser.add_argument('--duration', type=float, default=0, help='run for this many seconds instead')
+    parser.add_argument('--policies', default='10k', help='synthetic policies on top of the market seed')
+    parser.add_argument('--market', default='us', choices=sorted(DEMO_SUBMISSION))
+    parser.add_argument('--workers', type=int, default=1, help='processes for building a new database')
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, '.data'),
+                        help='where the scaled databases are kept between runs')
+    parser.add_argument('--timeout', type=float, default=60, help='seconds allowed per rerun')
+    parser.add_argument('--lock-wait-ms', type=float, default=50, help='writes slower than this count as lock waits')
+    parser.add_argument('--json', metavar='PATH', help='also write the results as JSON')
+    args = parser.parse_args()
+    args.policies = parse_size(args.policies)
+
+    # Set before anything imports db_engine; the session processes inherit the environment
+    scratch_dir = tempfile.mkdtemp(prefix='load_harness_')
+    os.environ['PNC_DEMO_DB'] = os.path.join(scratch_dir, 'load.db')
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    db_path = os.path.join(args.data_dir, f'load_{args.market}_{args.policies}.db')
+    if not os.path.exists(db_path):
+        print(f"Building {args.market} database with {args.policies:,} synthetic policies in {db_path}...",
+              file=sys.stderr)
+        build_database(db_path, args.policies, args.market, args.workers)
+
+    shutil.copy(db_path, os.environ['PNC_DEMO_DB'])
+    stub = start_openai_stub()
+    os.environ.update({
+        'PNC_SIM_CACHE': os.path.join(scratch_dir, 'sim_cache'),
+        'OPENAI_BASE_URL': f'http://127.0.0.1:{stub.server_address[1]}/v1',
+        'PORTAL_TYPING_DELAY': '0',
+    })
+
+    config = {key: getattr(args, key) for key in ('iterations', 'duration', 'market', 'timeout', 'lock_wait_ms')}
+    journeys = parse_mix(args.mix, args.sessions)
+    print(f"Running {len(journeys)} sessions: " + ', '.join(
+        f"{journeys.count(name)} {name}" for name in APPS if name in journeys), file=sys.stderr)
+    barrier = multiprocessing.Barrier(len(journeys))
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=session_process, args=(journey, config, barrier, results))
+                 for journey in journeys]
+    try:
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        stub.shutdown()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    records = [record for session, _, _, _ in outcomes for record in session]
+    locks = {'writes': sum(lock['writes'] for _, lock, _, _ in outcomes),
+             'waits_ms': [wait for _, lock, _, _ in outcomes for wait in lock['waits_ms']],
+             'locked_errors': sum(lock['locked_errors'] for _, lock, _, _ in outcomes)}
+    wall = max(end for _, _, _, end in outcomes) - min(start for _, _, start, _ in outcomes)
+    result = summarize(records, locks, wall, args)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
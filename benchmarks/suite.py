@@ -0,0 +1,389 @@
+"""Benchmark suite: data-access layer and page builders on synthetic portfolios.
+
+Builds (or reuses, from --data-dir) a synthetic database for each of --sizes
+policy counts with seed_data_synthetic, adds a portal customer with quote
+requests, and times every function in src/database_queries.py,
+get_all_submissions/get_submission_details from the underwriting center,
+the STP inbox build of the PolicyCenter dashboard and both market seeders.
+Each size runs in its own subprocess, because the shared engine binds to
+PNC_DEMO_DB when database_queries is imported.
+
+Every case is run once to warm up, then --repeats times; the median and
+best times (ms) are reported. --save writes them as a JSON baseline, and
+--compare checks the run against a baseline and exits with status 1 when
+a tracked case's median regresses by more than --threshold percent (and
+by more than --min-ms, so sub-millisecond jitter is not a regression).
+
+Usage:
+    python benchmarks/suite.py [--sizes 1k,100k,1M] [--repeats 5] [--save benchmarks/baseline.json]
+    python benchmarks/suite.py --sizes 1k,100k --compare benchmarks/baseline.json [--threshold 20]
+"""
+import argparse
+import datetime
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+UNDERWRITING_DIR = os.path.join(BENCH_DIR, '..', 'underwritingcenter')
+sys.path.insert(0, SRC_DIR)
+
+DEFAULT_SIZES = '1k,100k,1M'
+SEEDERS = 'seeders'
+# Quote requests for the benchmark customer, per policy in the portfolio
+STP_MESSAGES_PER_POLICY = 0.1
+BENCH_EMAIL = 'benchmark.customer@example.com'
+QUOTE_REQUESTS = [
+    "Quote request for Travel Insurance\nDestination: Portugal, 2 travellers",
+    "Quote request for Life Insurance\nSum insured CHF 500'000, non-smoker",
+    "Quote request for Home Insurance\nApartment in Zürich, 4 rooms",
+    "Quote request for Pet Insurance\nDog, 3 years",
+    "What does my policy cover?",
+]
+
+
+def parse_size(text):
+    """'1k' -> 1000, '1M' -> 1000000, '250' -> 250."""
+    multipliers = {'k': 1000, 'm': 1000000}
+    text = text.strip()
+    if text[-1].lower() in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1].lower()])
+    return int(text)
+
+
+# --- Database Setup ---
+
+def build_database(db_path, policies, market, workers):
+    """Synthetic portfolio plus the derived schema (indexes, search, attributes, ledger)."""
+    from seed_data_synthetic import generate_portfolio
+    from sqlalchemy import create_engine
+    from seed_database import upgrade_schema, set_schema_version
+
+    partial = db_path + '.partial'
+    generate_portfolio(partial, market, policies, workers=workers)
+    engine = create_engine(f'sqlite:///{partial}')
+    upgrade_schema(engine)
+    set_schema_version(engine)
+    engine.dispose()
+    os.replace(partial, db_path)
+
+
+def upgrade_database(db_path):
+    """Bring a kept portfolio from an older schema version up to date (new derived tables are backfilled)."""
+    from sqlalchemy import create_engine
+    from seed_database import SCHEMA_VERSION, get_schema_version, upgrade_schema, set_schema_version
+
+    engine = create_engine(f'sqlite:///{db_path}')
+    if get_schema_version(engine) != SCHEMA_VERSION:
+        print(f"Upgrading {db_path} to schema version {SCHEMA_VERSION}...", file=sys.stderr)
+        upgrade_schema(engine)
+        set_schema_version(engine)
+    engine.dispose()
+
+
+def ensure_customer(policies):
+    """Portal user on the first insured party, with quote requests to classify; returns its id."""
+    from sqlalchemy import insert
+    from db_engine import engine, Session
+    from seed_database import CustomerUser, ChatMessage, PartyRole
+
+    session = Session()
+    user = session.query(CustomerUser).filter(CustomerUser.email == BENCH_EMAIL).first()
+    if user is None:
+        party_id = session.query(PartyRole.party_id).filter(
+            PartyRole.role_name == 'Insured'
+        ).order_by(PartyRole.id).limit(1).scalar()
+        user = CustomerUser(party_id=party_id, email=BENCH_EMAIL, password_hash='-')
+        session.add(user)
+        session.commit()
+        messages = max(int(policies * STP_MESSAGES_PER_POLICY), 10)
+        with engine.begin() as conn:
+            for start in range(0, messages, 50000):
+                conn.execute(insert(ChatMessage), [
+                    {'user_id': user.id, 'message': QUOTE_REQUESTS[i % len(QUOTE_REQUESTS)],
+                     'response': 'Quote generated.', 'is_user': True,
+                     'timestamp': datetime.datetime(2026, 1, 1) + datetime.timedelta(minutes=i)}
+                    for i in range(start, min(start + 50000, messages))
+                ])
+    user_id = user.id
+    session.close()
+    return user_id
+
+
+def sample_ids():
+    """Representative ids: a policy with a tower and a claim where the portfolio has one."""
+    from sqlalchemy import func
+    from db_engine import Session
+    from seed_database import Policy, Claim, Quote, ReinsuranceTreaty, PartyRole
+
+    session = Session()
+    towered = session.query(ReinsuranceTreaty.policy_id).order_by(ReinsuranceTreaty.policy_id)
+    policy_id = towered.join(Claim, Claim.policy_id == ReinsuranceTreaty.policy_id).limit(1).scalar() \
+        or towered.limit(1).scalar() or session.query(func.min(Policy.id)).scalar()
+    policy = session.get(Policy, policy_id)
+    quote = session.get(Quote, policy.quote_id) if policy.quote_id else None
+    ids = {
+        'policy': policy_id,
+        'policies': [row[0] for row in towered.limit(100)] or [policy_id],
+        'submission': quote.submission_id if quote else session.query(func.min(Quote.submission_id)).scalar(),
+        'claim': session.query(Claim.id).filter(Claim.policy_id == policy_id).limit(1).scalar()
+                 or session.query(func.min(Claim.id)).scalar(),
+        'party': session.query(PartyRole.party_id).filter(
+            PartyRole.context_table == 'policy', PartyRole.context_id == policy_id,
+            PartyRole.role_name == 'Insured'
+        ).limit(1).scalar(),
+    }
+    ids['parties'] = [row[0] for row in session.query(PartyRole.party_id).limit(100)]
+    session.close()
+    return ids
+
+
+# --- Cases ---
+# name -> (function, setup); setup() runs untimed before every call and returns its arguments
+
+def database_query_cases(ids):
+    import database_queries as dq
+
+    tower = dq.build_reinsurance_tower(ids['policy'])
+    cases = {
+        'get_session': (lambda: dq.get_session().close(), None),
+        'get_all_insureds': (dq.get_all_insureds, None),
+        'get_policy_details': (lambda: dq.get_policy_details(ids['policy']), None),
+        'get_party_by_id': (lambda: dq.get_party_by_id(ids['party']), None),
+        'get_parties_by_ids': (lambda: dq.get_parties_by_ids(ids['parties']), None),
+        'get_quotes_for_submission': (lambda: dq.get_quotes_for_submission(ids['submission']), None),
+        'get_submission_for_policy': (lambda: dq.get_submission_for_policy(ids['policy']), None),
+        'get_claim_details': (lambda: dq.get_claim_details(ids['claim']), None),
+        'build_reinsurance_towers': (lambda: dq.build_reinsurance_towers(ids['policies']), None),
+        'build_reinsurance_tower': (lambda: dq.build_reinsurance_tower(ids['policy']), None),
+        'tower_to_dataframe': (lambda: dq.tower_to_dataframe(tower['layers']) if tower else None, None),
+        'get_reinsurance_tower': (lambda: dq.get_reinsurance_tower(ids['policy']), None),
+        'get_reinsurance_towers': (lambda: dq.get_reinsurance_towers(ids['policies']), None),
+        'get_coinsurance_details': (lambda: dq.get_coinsurance_details(ids['policy']), None),
+        'get_statement_of_values': (lambda: dq.get_statement_of_values(ids['policy']), None),
+        'get_sov_total': (dq.get_sov_total, None),
+        'get_claim_ledger': (lambda: dq.get_claim_ledger(ids['claim']), None),
+        'get_documents_for_record': (lambda: dq.get_documents_for_record('claim', ids['claim']), None),
+        'get_claim_subrogation': (lambda: dq.get_claim_subrogation(ids['claim']), None),
+        'get_customer_portfolio_version': (lambda: dq.get_customer_portfolio_version(ids['party']), None),
+        'get_customer_portfolio': (lambda: dq.get_customer_portfolio(ids['party']), None),
+        'to_fts_query': (lambda: dq.to_fts_query('water damage roof'), None),
+        'search_text': (lambda: dq.search_text('water damage'), None),
+    }
+    untracked = sorted(
+        name for name, fn in inspect.getmembers(dq, inspect.isfunction)
+        if fn.__module__ == dq.__name__ and not name.startswith('_') and name not in cases
+    )
+    if untracked:
+        print(f"warning: database_queries functions without a benchmark case: {', '.join(untracked)}",
+              file=sys.stderr)
+    return {f'database_queries.{name}': case for name, case in cases.items()}
+
+
+def underwriting_cases(ids):
+    sys.path.insert(0, UNDERWRITING_DIR)
+    import app_underwriting as uw
+    from kpi_engine import get_dashboard_kpis
+
+    return {
+        # Cold load: the cached index is dropped before every call
+        'app_underwriting.get_all_submissions': (uw.get_all_submissions, lambda: (uw.invalidate_submission_index(), ())[1]),
+        'app_underwriting.get_submission_details': (lambda: uw.get_submission_details(ids['submission']), None),
+        'kpi_engine.get_dashboard_kpis': (get_dashboard_kpis, None),
+    }
+
+
+def stp_cases(user_id, party_name):
+    from db_engine import Session
+    from stp_inbox import refresh_stp_inbox, reset_stp_inbox, get_stp_inbox_rows, build_inbox_table
+
+    def reset():
+        session = Session()
+        reset_stp_inbox(session, user_id)
+        session.commit()
+        session.close()
+        return ()
+
+    refresh_stp_inbox(user_id)
+    rows = get_stp_inbox_rows(user_id)
+    return {
+        'stp_inbox.refresh_stp_inbox (backfill)': (lambda: refresh_stp_inbox(user_id), reset),
+        'stp_inbox.refresh_stp_inbox (incremental)': (lambda: refresh_stp_inbox(user_id), None),
+        'stp_inbox.get_stp_inbox_rows': (lambda: get_stp_inbox_rows(user_id), None),
+        'stp_inbox.build_inbox_table': (lambda: build_inbox_table(rows, party_name, 12.1), None),
+    }
+
+
+def seeder_cases(scratch_dir):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from seed_database import Base
+    from seed_data_german import seed_german_data
+    from seed_data_us import seed_us_data
+
+    engines = []
+
+    def fresh_session():
+        path = os.path.join(scratch_dir, f'seed_{len(engines)}.db')
+        engine = create_engine(f'sqlite:///{path}')
+        engines.append(engine)
+        Base.metadata.create_all(engine)
+        return (sessionmaker(bind=engine)(),)
+
+    def seeded(seeder):
+        def run(session):
+            seeder(session)
+            session.close()
+        return run
+
+    return {
+        'seed_data_german.seed_german_data': (seeded(seed_german_data), fresh_session),
+        'seed_data_us.seed_us_data': (seeded(seed_us_data), fresh_session),
+    }
+
+
+def run_cases(cases, repeats):
+    results = {}
+    for name, (fn, setup) in cases.items():
+        samples = []
+        for _ in range(repeats + 1):  # the first call warms caches and is discarded
+            args = setup() if setup else ()
+            start = time.perf_counter()
+            fn(*args)
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = {'median_ms': statistics.median(samples[1:]), 'min_ms': min(samples[1:])}
+        print(f"  {name:<52} {results[name]['median_ms']:>10.2f} ms", file=sys.stderr)
+    return results
+
+
+def worker(args):
+    """Runs one size (or the seeders) in this process and writes the results as JSON."""
+    if args.worker == SEEDERS:
+        scratch_dir = tempfile.mkdtemp(prefix='bench_seed_')
+        try:
+            results = run_cases(seeder_cases(scratch_dir), args.repeats)
+        finally:
+            for name in os.listdir(scratch_dir):
+                os.remove(os.path.join(scratch_dir, name))
+            os.rmdir(scratch_dir)
+    else:
+        from database_queries import get_party_by_id
+        from db_engine import Session
+        from seed_database import CustomerUser
+
+        user_id = ensure_customer(int(args.worker))
+        session = Session()
+        party_name = get_party_by_id(session.get(CustomerUser, user_id).party_id).name
+        session.close()
+        ids = sample_ids()
+        cases = {**database_query_cases(ids), **underwriting_cases(ids), **stp_cases(user_id, party_name)}
+        results = run_cases(cases, args.repeats)
+    with open(args.out, 'w') as f:
+        json.dump(results, f)
+
+
+# --- Driver ---
+
+def run_size(size, args):
+    env = dict(os.environ)
+    if size != SEEDERS:
+        db_path = os.path.join(args.data_dir, f'portfolio_{args.market}_{size}.db')
+        if not os.path.exists(db_path):
+            print(f"Building {size:,}-policy {args.market} portfolio in {db_path}...", file=sys.stderr)
+            build_database(db_path, size, args.market, args.workers)
+        else:
+            upgrade_database(db_path)
+        env['PNC_DEMO_DB'] = db_path
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as out:
+        out_path = out.name
+    try:
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', str(size), '--out', out_path,
+                        '--repeats', str(args.repeats)], env=env, check=True, stdout=subprocess.DEVNULL)
+        with open(out_path) as f:
+            return json.load(f)
+    finally:
+        os.remove(out_path)
+
+
+def compare(baseline, current, threshold, min_ms):
+    """Prints the per-case change and returns the list of regressions."""
+    regressions = []
+    print(f"\n{'size':>9}  {'case':<52} {'baseline':>10} {'current':>10} {'change':>8}")
+    for size, cases in current['results'].items():
+        for name, result in cases.items():
+            base = baseline['results'].get(size, {}).get(name)
+            if base is None:
+                print(f"{size:>9}  {name:<52} {'-':>10} {result['median_ms']:>10.2f}      new")
+                continue
+            delta = result['median_ms'] - base['median_ms']
+            change = delta / base['median_ms'] * 100 if base['median_ms'] else 0.0
+            regressed = change > threshold and delta > min_ms
+            if regressed:
+                regressions.append((size, name, change))
+            print(f"{size:>9}  {name:<52} {base['median_ms']:>10.2f} {result['median_ms']:>10.2f} "
+                  f"{change:>+7.1f}%{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma-separated policy counts (1k, 100k, 1M, ...)')
+    parser.add_argument('--market', default='german', choices=['german', 'us'])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=1, help='processes for building new portfolios')
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, '.data'),
+                        help='where the synthetic portfolios are kept between runs')
+    parser.add_argument('--no-seeders', action='store_true', help='skip timing the market seeders')
+    parser.add_argument('--save', metavar='PATH', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=20.0, help='allowed median slowdown in percent')
+    parser.add_argument('--min-ms', type=float, default=0.5, help='ignore slowdowns smaller than this')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    if not args.no_seeders:
+        sizes.append(SEEDERS)
+    current = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'market': args.market,
+        'repeats': args.repeats,
+        'results': {},
+    }
+    for size in sizes:
+        print(f"[{size if size == SEEDERS else f'{size:,} policies'}]", file=sys.stderr)
+        current['results'][str(size)] = run_size(size, args)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Saved baseline to {args.save}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0f}%:")
+            for size, name, change in regressions:
+                print(f"  {name} at {size}: {change:+.1f}%")
+            sys.exit(1)
+        print(f"\nNo regressions above {args.threshold:.0f}%.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,36 @@
 # Customer Portal with AI Features
 # Powered by OpenAI GPT-4
 
+import os
+import queue
+import threading
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import random
 import time
-from openai import OpenAI
+
+# Opt-in SQL profiling of this rerun (PNC_SQL_PROFILE=1)
+from sql_profiler import start_run, render_profile_panel
+sql_profile = start_run('customer_portal')
 
 # Initialize database
 from init_db import init_database
 init_database()
 
-from database_queries import get_session
+from database_queries import get_session, get_customer_portfolio, get_customer_portfolio_version
+from llm_cache import cached_completion, get_cached, put_cached, get_cache_stats
+from event_outbox import publish_event, QUOTE_CREATED, CHAT_MESSAGE_SAVED, INBOX_RESET
 from seed_database import (
     CustomerUser, ChatMessage, GeneratedAd, PolicySummary,
     EmailTemplate, Policy, Coverage, Party, PartyRole
 )
 
-# Initialize OpenAI client
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+# OpenAI client, created on first use: the openai package takes longer to
+# import than the rest of the page, and most reruns never call it
+@st.cache_resource(show_spinner=False)
+def get_openai_client():
+    from openai import OpenAI
+    return OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
 
 st.set_page_config(layout="wide", page_title="My Insurance Portal", page_icon="🌵")
 
@@ -127,8 +138,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # OpenAI AI Functions
-def simulate_chatbot_response(user_message, user_data):
-    """Use OpenAI GPT-4 to answer customer questions with real data"""
+def build_chatbot_context(user_data):
+    """Build the policy lines, total premium and system prompt for a customer (once per session)"""
+    context_key = (user_data['email'], tuple(p.id for p in user_data['policies']))
+    cached = st.session_state.get('chatbot_context')
+    if cached and cached['key'] == context_key:
+        return cached
     
     # Build context from user's database data
     policies_info = []
@@ -171,43 +186,156 @@ Guidelines:
 - Use markdown formatting for emphasis
 - Keep responses under 150 words unless detailed explanation needed"""
 
+    st.session_state.chatbot_context = {
+        'key': context_key,
+        'policies_info': policies_info,
+        'total_premium': total_premium,
+        'system_prompt': system_prompt
+    }
+    return st.session_state.chatbot_context
+
+CHAT_MODEL = "gpt-3.5-turbo"
+CHAT_TEMPERATURE = 0.7
+CHAT_MAX_TOKENS = 300
+
+# Stream chatbot answers token by token; CHAT_STREAMING=0 waits for the full completion
+CHAT_STREAMING = os.environ.get('CHAT_STREAMING', '1') != '0'
+# Seconds to wait for the first streamed token before answering from the keyword fallback
+FIRST_TOKEN_DEADLINE = float(os.environ.get('CHAT_FIRST_TOKEN_DEADLINE', '4'))
+# Seconds the whole streamed answer may take before the keyword fallback replaces it
+STREAM_DEADLINE = float(os.environ.get('CHAT_STREAM_DEADLINE', '30'))
+
+def chatbot_messages(user_message, context):
+    """OpenAI messages for a customer question"""
+    return [
+        {"role": "system", "content": context['system_prompt']},
+        {"role": "user", "content": user_message}
+    ]
+
+def simulate_chatbot_response(user_message, user_data):
+    """Use OpenAI GPT-4 to answer customer questions with real data"""
+    context = build_chatbot_context(user_data)
+
     try:
-        # Try OpenAI GPT-3.5-turbo first (more widely available)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.7,
-            max_tokens=300
+        # Try OpenAI GPT-3.5-turbo first (more widely available); repeated questions come from the cache
+        return cached_completion(
+            get_openai_client(),
+            model=CHAT_MODEL,
+            messages=chatbot_messages(user_message, context),
+            temperature=CHAT_TEMPERATURE,
+            max_tokens=CHAT_MAX_TOKENS
         )
-        
-        return response.choices[0].message.content
     
     except Exception as e:
         # Fallback to keyword-based responses if OpenAI fails
-        message_lower = user_message.lower().strip()
-        
-        # Smart fallback responses using actual user data
-        if "renewal" in message_lower or "renew" in message_lower:
-            return f"Your policies are set to renew on **December 31, 2025**.\n\nCurrent policies:\n{chr(10).join(['• ' + info for info in policies_info])}\n\n**Total Annual Premium: CHF {total_premium:,.0f}**\n\nWe'll send renewal notices 30 days before expiration. Would you like to discuss renewal options or make any changes?"
-        
-        if "policies" in message_lower or "policy" in message_lower:
-            return f"You have **{len(user_data['policies'])} active policies**:\n\n{chr(10).join(policies_info)}\n\n**Total Annual Premium: CHF {total_premium:,.0f}**\n\nWould you like details on any specific policy?"
-        
-        if "claim" in message_lower:
-            return "To file a claim, please provide:\n\n1. **Date of incident**\n2. **Description** of what happened\n3. **Photos** if available\n4. **Police report** (if applicable)\n\nI can help guide you through the process step-by-step!"
-        
-        if "coverage" in message_lower:
-            policy_types = [info.split('(')[0].strip() for info in policies_info]
-            return f"Your current coverage includes:\n\n{chr(10).join(['• ' + pt for pt in policy_types])}\n\nWould you like to add **Travel Insurance**, **Life Insurance**, or **Pet Insurance**? I can get you a quote in seconds!"
-        
-        if "premium" in message_lower or "cost" in message_lower or "price" in message_lower:
-            return f"**Total Annual Premium: CHF {total_premium:,.0f}**\n\nBreakdown:\n{chr(10).join(policies_info)}\n\nWould you like information about payment options or discounts?"
-        
-        # Default helpful response
-        return f"I'm here to help you with your insurance needs!\n\nYou can ask me about:\n• **Renewal** dates and options\n• Your **policies** and coverage details\n• Filing **claims**\n• Adding new **coverage**\n• **Premium** information\n\nWhat would you like to know?"
+        return keyword_fallback_response(user_message, user_data, context)
+
+def _stream_worker(client, messages, chunks):
+    """Read an OpenAI stream into a queue (None marks the end, an exception a failure)"""
+    parts = []
+    try:
+        stream = client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=messages,
+            temperature=CHAT_TEMPERATURE,
+            max_tokens=CHAT_MAX_TOKENS,
+            stream=True
+        )
+        for chunk in stream:
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if token:
+                parts.append(token)
+                chunks.put(token)
+        # Finished streams feed the response cache, even if the UI already fell back
+        put_cached(CHAT_MODEL, messages, CHAT_TEMPERATURE, ''.join(parts))
+        chunks.put(None)
+    except Exception as e:
+        chunks.put(e)
+
+def stream_chatbot_response(user_message, user_data, render):
+    """
+    Answer a customer question, rendering tokens as they arrive.
+    
+    Args:
+        user_message: The customer's question
+        user_data: Dict with 'policies', 'name' and 'email'
+        render: Callback receiving the text so far and whether it is final
+    
+    Returns:
+        Dict with 'text', 'source' ('cache', 'stream' or 'fallback') and
+        'first_token_ms' (None when no token arrived before the deadline).
+        A stream that fails or stalls past STREAM_DEADLINE is discarded, not
+        returned truncated: the answer becomes the keyword fallback.
+    """
+    context = build_chatbot_context(user_data)
+    messages = chatbot_messages(user_message, context)
+    started = time.perf_counter()
+    
+    cached = get_cached(CHAT_MODEL, messages, CHAT_TEMPERATURE)
+    if cached is not None:
+        render(cached, True)
+        return {'text': cached, 'source': 'cache', 'first_token_ms': int((time.perf_counter() - started) * 1000)}
+    
+    chunks = queue.Queue()
+    threading.Thread(target=_stream_worker, args=(get_openai_client(), messages, chunks), daemon=True).start()
+    
+    def fallback(first_token_ms):
+        text = keyword_fallback_response(user_message, user_data, context)
+        render(text, True)
+        return {'text': text, 'source': 'fallback', 'first_token_ms': first_token_ms}
+    
+    try:
+        first = chunks.get(timeout=FIRST_TOKEN_DEADLINE)
+    except queue.Empty:
+        first = TimeoutError(f"no token within {FIRST_TOKEN_DEADLINE}s")
+    if first is None or isinstance(first, Exception):
+        return fallback(None)
+    
+    first_token_ms = int((time.perf_counter() - started) * 1000)
+    parts = [first]
+    render(first, False)
+    while True:
+        remaining = STREAM_DEADLINE - (time.perf_counter() - started)
+        try:
+            token = chunks.get(timeout=max(remaining, 0))
+        except queue.Empty:
+            # Stalled upstream; the worker may still finish and fill the cache for next time
+            return fallback(first_token_ms)
+        if isinstance(token, Exception):
+            return fallback(first_token_ms)
+        if token is None:
+            break
+        parts.append(token)
+        render(''.join(parts), False)
+    text = ''.join(parts)
+    render(text, True)
+    return {'text': text, 'source': 'stream', 'first_token_ms': first_token_ms}
+
+def keyword_fallback_response(user_message, user_data, context):
+    """Keyword-based answer from the customer's own data, used when OpenAI is unavailable or slow"""
+    policies_info = context['policies_info']
+    total_premium = context['total_premium']
+    message_lower = user_message.lower().strip()
+    
+    # Smart fallback responses using actual user data
+    if "renewal" in message_lower or "renew" in message_lower:
+        return f"Your policies are set to renew on **December 31, 2025**.\n\nCurrent policies:\n{chr(10).join(['• ' + info for info in policies_info])}\n\n**Total Annual Premium: CHF {total_premium:,.0f}**\n\nWe'll send renewal notices 30 days before expiration. Would you like to discuss renewal options or make any changes?"
+    
+    if "policies" in message_lower or "policy" in message_lower:
+        return f"You have **{len(user_data['policies'])} active policies**:\n\n{chr(10).join(policies_info)}\n\n**Total Annual Premium: CHF {total_premium:,.0f}**\n\nWould you like details on any specific policy?"
+    
+    if "claim" in message_lower:
+        return "To file a claim, please provide:\n\n1. **Date of incident**\n2. **Description** of what happened\n3. **Photos** if available\n4. **Police report** (if applicable)\n\nI can help guide you through the process step-by-step!"
+    
+    if "coverage" in message_lower:
+        policy_types = [info.split('(')[0].strip() for info in policies_info]
+        return f"Your current coverage includes:\n\n{chr(10).join(['• ' + pt for pt in policy_types])}\n\nWould you like to add **Travel Insurance**, **Life Insurance**, or **Pet Insurance**? I can get you a quote in seconds!"
+    
+    if "premium" in message_lower or "cost" in message_lower or "price" in message_lower:
+        return f"**Total Annual Premium: CHF {total_premium:,.0f}**\n\nBreakdown:\n{chr(10).join(policies_info)}\n\nWould you like information about payment options or discounts?"
+    
+    # Default helpful response
+    return f"I'm here to help you with your insurance needs!\n\nYou can ask me about:\n• **Renewal** dates and options\n• Your **policies** and coverage details\n• Filing **claims**\n• Adding new **coverage**\n• **Premium** information\n\nWhat would you like to know?"
 
 def simulate_image_generation(prompt):
     """Simulate Stable Diffusion image generation"""
@@ -301,6 +429,11 @@ Policy holder: {policy_data['customer_name']}
 Contact: [Your phone]"""
         }
 
+# Stand-in for the customer's name, so the generated flow is cached once per product
+CUSTOMER_NAME_PLACEHOLDER = '[CUSTOMER_NAME]'
+# Pause between quote flow messages (the "typing" indicator); 0 plays the flow back at once
+QUOTE_TYPING_DELAY = float(os.environ.get('PORTAL_TYPING_DELAY', '1.0'))
+
 # AI Quote Flow Function (using OpenAI)
 def get_quote_flow(product_type, user):
     """Generate quote conversation flow using OpenAI GPT-4"""
@@ -309,7 +442,7 @@ def get_quote_flow(product_type, user):
     quote_training = f"""You are generating an insurance quote conversation for {product_type}.
 
 CONVERSATION STRUCTURE (exactly 7 messages):
-1. Bot: Greeting - welcome customer by name ({user.party.name}), mention product and say "15 seconds"
+1. Bot: Greeting - welcome customer by name ({CUSTOMER_NAME_PLACEHOLDER}), mention product and say "15 seconds"
 2. User: "Sounds good!" or similar positive response
 3. Bot: Ask first question relevant to {product_type}
 4. User: Answer with reasonable example details
@@ -324,7 +457,7 @@ CONVERSATION STRUCTURE (exactly 7 messages):
    - "⏱️ Generated in 12 seconds"
 
 EXAMPLE FOR TRAVEL INSURANCE:
-Message 1 (Bot): "Great choice, {user.party.name}! I'll help you get a personalized Travel Insurance quote. This will only take 15 seconds. ✈️"
+Message 1 (Bot): "Great choice, {CUSTOMER_NAME_PLACEHOLDER}! I'll help you get a personalized Travel Insurance quote. This will only take 15 seconds. ✈️"
 Message 2 (User): "Sounds good!"
 Message 3 (Bot): "Perfect! Let me ask you a few quick questions. **Where are you planning to travel?**"
 Message 4 (User): "Europe - planning a 2-week trip to Italy and France"
@@ -335,8 +468,9 @@ Message 7 (Bot): "Perfect! 🎉\n\n**Your Personalized Quote:**\n\n✓ Destinati
 Generate EXACTLY 7 messages following this pattern for {product_type}. Return as JSON array."""
 
     try:
-        # Use OpenAI to generate the conversation
-        response = client.chat.completions.create(
+        # Use OpenAI to generate the conversation (cached per product, shared by all customers)
+        content = cached_completion(
+            get_openai_client(),
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an insurance quote conversation generator. Generate realistic, friendly insurance quote conversations."},
@@ -349,8 +483,10 @@ Generate EXACTLY 7 messages following this pattern for {product_type}. Return as
         # Parse the response (expecting JSON array)
         import json
         try:
-            flow = json.loads(response.choices[0].message.content)
+            flow = json.loads(content)
             if len(flow) == 7:
+                for msg in flow:
+                    msg['text'] = msg['text'].replace(CUSTOMER_NAME_PLACEHOLDER, user.party.name)
                 return flow
         except:
             pass
@@ -381,6 +517,21 @@ Generate EXACTLY 7 messages following this pattern for {product_type}. Return as
         {'type': 'bot', 'text': f"🎉 **Your Quote is Ready!**\n\n**Your Personalized Quote:**\n\n✓ Product: {product_type}\n✓ Coverage: Standard\n✓ Deductible: CHF 500\n✓ Coverage Limit: CHF 50,000\n\n**Total Premium: CHF 95/month**\n\nThis bindable quote was generated in 12 seconds! ⏱️"},
     ]
 
+# Customer Portfolio (cached per user)
+@st.cache_resource(show_spinner=False, ttl=300)
+def load_customer_portfolio(party_id, version):
+    """Policies, quotes, coverages, assets and insurers for a customer, shared across reruns.
+    
+    `version` (policy count, newest role ID and newest policy revision) is part
+    of the cache key, so a write that adds or edits a policy (here or in the
+    other apps) invalidates it on the next rerun.
+    """
+    return get_customer_portfolio(party_id)
+
+def get_portfolio(party_id):
+    """Cached portfolio for the current policy set of a customer"""
+    return load_customer_portfolio(party_id, get_customer_portfolio_version(party_id))
+
 # Main App Logic
 def main():
     # Get user session (in production, use proper authentication)
@@ -394,18 +545,10 @@ def main():
         session.close()
         return
     
-    # Load user's policies
+    # Load user's policies (eager-loaded, cached per user; feeds every tab)
     party = user.party
-    policy_roles = session.query(PartyRole).filter(
-        PartyRole.party_id == party.id,
-        PartyRole.role_name == 'Insured'
-    ).all()
-    
-    policies = []
-    for role in policy_roles:
-        policy = session.query(Policy).get(role.context_id)
-        if policy:
-            policies.append(policy)
+    portfolio = get_portfolio(party.id)
+    policies = portfolio['policies']
     
     # Initialize chat state variables
     if 'quote_flow_active' not in st.session_state:
@@ -460,7 +603,7 @@ def main():
                 current_time = time.time()
                 time_since_last = current_time - st.session_state.last_message_time if st.session_state.last_message_time else 999
                 
-                if time_since_last < 1.0:
+                if time_since_last < QUOTE_TYPING_DELAY:
                     # Still waiting - show typing indicator
                     st.markdown("**🤖 typing...**")
                     time.sleep(0.5)  # Wait a bit
@@ -494,6 +637,9 @@ def main():
                         model_used='OpenAI GPT-4 (Quote Flow)'
                     )
                     session.add(new_chat)
+                    session.flush()
+                    # Committed together, so the STP dashboard sees the event and the quote at once
+                    publish_event(session, user.id, QUOTE_CREATED, new_chat.id)
                     session.commit()
                     st.session_state.quote_saved_to_db = True
                 
@@ -525,8 +671,11 @@ def main():
                     # Clear session state
                     st.session_state.chat_messages = []
                     st.session_state.chat_loaded = False
-                    # Delete from database
+                    # Delete from database, along with the STP inbox classifications built from it
                     session.query(ChatMessage).filter(ChatMessage.user_id == user.id).delete()
+                    from stp_inbox import reset_stp_inbox
+                    reset_stp_inbox(session, user.id)
+                    publish_event(session, user.id, INBOX_RESET)
                     session.commit()
                     st.success("Chat cleared!")
                     st.rerun()
@@ -579,6 +728,12 @@ def main():
             
             st.markdown("---")
             
+            cache_stats = get_cache_stats()
+            st.caption(
+                f"⚡ AI cache: {cache_stats['hits']} hits ({cache_stats['coalesced']} shared) · "
+                f"{cache_stats['misses']} misses · {cache_stats['hit_ratio']:.0%} hit ratio"
+            )
+            
             # Chat input at BOTTOM (using chat_input for Enter-to-send)
             user_input = st.chat_input(
                 placeholder="Type your message and press Enter...",
@@ -595,14 +750,23 @@ def main():
                     "timestamp": current_time
                 })
                 
-                # Show thinking message
+                # Show thinking message until the first token arrives
                 with chat_container:
-                    st.markdown("""
+                    response_placeholder = st.empty()
+                    response_placeholder.markdown("""
                     <div style='background: #FFF3CD; padding: 10px; border-radius: 8px; margin: 6px 0; border-left: 3px solid #FFC107;'>
                         <strong>🤖 Cacti is thinking...</strong>
                     </div>
                     """, unsafe_allow_html=True)
                 
+                def render_response(text, final):
+                    cursor = "" if final else " ▌"
+                    response_placeholder.markdown(f"""
+                    <div style='background: #E8F5E9; padding: 10px; border-radius: 8px; margin: 6px 0; border-left: 3px solid #4CAF50;'>
+                        <strong>🌵 Cacti:</strong> {text}{cursor}
+                    </div>
+                    """, unsafe_allow_html=True)
+                
                 # Get AI response
                 try:
                     user_data = {
@@ -611,7 +775,11 @@ def main():
                         'email': user.email
                     }
                     
-                    response = simulate_chatbot_response(user_input, user_data)
+                    if CHAT_STREAMING:
+                        result = stream_chatbot_response(user_input, user_data, render_response)
+                    else:
+                        result = {'text': simulate_chatbot_response(user_input, user_data), 'source': 'completion', 'first_token_ms': None}
+                    response = result['text']
                     
                     # Add assistant response
                     st.session_state.chat_messages.append({
@@ -620,16 +788,20 @@ def main():
                         "timestamp": current_time
                     })
                     
-                    # Save to database
+                    # Save to database once the stream has finished
                     new_chat = ChatMessage(
                         user_id=user.id,
                         message=user_input,
                         response=response,
                         timestamp=current_time,
                         is_user=True,
-                        model_used='OpenAI GPT-4'
+                        model_used='Keyword fallback' if result['source'] == 'fallback' else 'OpenAI GPT-4',
+                        first_token_ms=result['first_token_ms']
                     )
                     session.add(new_chat)
+                    session.flush()
+                    # The STP inbox classifies every saved message, so subscribers hear about these too
+                    publish_event(session, user.id, CHAT_MESSAGE_SAVED, new_chat.id)
                     session.commit()
                     
                     # Clear input and rerun
@@ -657,7 +829,7 @@ def main():
         # Key Metrics
         col1, col2, col3 = st.columns(3)
         
-        total_premium = sum([p.quote.total_premium for p in policies if p.quote])
+        total_premium = portfolio['total_premium']
         
         with col1:
             st.markdown(f"""
@@ -755,13 +927,7 @@ def main():
             st.info("No active policies found.")
         else:
             for policy in policies:
-                insurer = session.query(Party).join(
-                    PartyRole, PartyRole.party_id == Party.id
-                ).filter(
-                    PartyRole.context_table == 'policy',
-                    PartyRole.context_id == policy.id,
-                    PartyRole.role_name == 'Insurer'
-                ).first()
+                insurer = portfolio['insurers'].get(policy.id)
                 
                 with st.expander(f"🔹 {policy.policy_number} - {insurer.name if insurer else 'Unknown'}", expanded=True):
                     col1, col2, col3 = st.columns(3)
@@ -786,6 +952,7 @@ def main():
                         })
                     
                     if coverage_data:
+                        import pandas as pd
                         st.dataframe(pd.DataFrame(coverage_data), use_container_width=True)
                     
                     # CTI Assistant Actions
@@ -1011,4 +1178,6 @@ def main():
 
 if __name__ == '__main__':
     main()
+    with st.sidebar:
+        render_profile_panel(sql_profile)
 
@@ -2,9 +2,12 @@
 # Story-driven walkthrough of 3 real-world use cases
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 
+# Opt-in SQL profiling of this rerun (PNC_SQL_PROFILE=1)
+from sql_profiler import start_run, render_profile_panel
+sql_profile = start_run('app_v2')
+
 # Initialize database on app startup
 from init_db import init_database
 init_database()
@@ -13,8 +16,11 @@ from database_queries import (
     get_all_insureds, get_policy_details, get_party_by_id,
     get_quotes_for_submission, get_submission_for_policy,
     get_claim_details, get_reinsurance_tower, get_coinsurance_details,
-    get_documents_for_record, get_claim_subrogation, get_session, Policy, PartyRole
+    get_documents_for_record, get_claim_subrogation, get_session, search_text,
+    get_statement_of_values, get_sov_total, get_claim_ledger, Policy, PartyRole
 )
+# pandas and the numpy-based tower modules are imported by the steps that use
+# them, so the overview pages render without loading them
 
 st.set_page_config(layout="wide", page_title="P&C Insurance Process Demo", page_icon="🏢")
 
@@ -49,6 +55,33 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- Claim Search ---
+SEARCH_ICONS = {'claim_detail': '📝', 'claim': '🚨', 'document': '📄'}
+
+def render_claim_search(claims, key):
+    """
+    Full-text search box over claim logs, descriptions and claim documents.
+
+    Args:
+        claims: Claims of the current policy; results are limited to these
+            unless the user widens the search
+        key: Unique widget key prefix for this view
+    """
+    col_query, col_scope = st.columns([3, 1])
+    terms = col_query.text_input("🔎 Search claim logs and documents", key=f"{key}_query",
+                                 placeholder="e.g. water damage, Gutachter, invoice")
+    search_all = col_scope.checkbox("All claims", key=f"{key}_all")
+    if not terms:
+        return
+
+    scope_ids = None if search_all else [c.id for c in claims]
+    hits = search_text(terms, entities=list(SEARCH_ICONS), scope_ids=scope_ids)
+    if not hits:
+        st.caption(f"No matches for \"{terms}\".")
+        return
+    for hit in hits:
+        st.markdown(f"{SEARCH_ICONS[hit['entity']]} **{hit['label']}** · {hit['snippet']}")
+
 # --- Title ---
 st.title("🏢 Interactive P&C Insurance Process Demo")
 st.markdown("### Experience the journey from manual chaos to automated efficiency")
@@ -260,7 +293,7 @@ if "Case 1" in selected_case:
                 "Uploaded": str(d.upload_timestamp),
                 "Status": "✅ Verified"
             } for d in docs]
-            st.table(pd.DataFrame(doc_data))
+            st.table(doc_data)
             
             st.success("💡 **Benefit**: Document requests resolved in hours, not days. Audit trail automatically maintained.")
         else:
@@ -365,7 +398,9 @@ if "Case 1" in selected_case:
                 "Visible to Client": "✅ Yes"
             } for d in claim.details]
             
-            st.dataframe(pd.DataFrame(log_data), width=1000)
+            st.dataframe(log_data, width=1000)
+            
+            render_claim_search(policy.claims, key="case1_claim_log")
             
             st.success("💡 **Benefit**: Client empowerment. Broker can focus on complex cases instead of status updates.")
     
@@ -486,20 +521,19 @@ elif "Case 2" in selected_case:
         st.markdown("---")
         st.subheader("🏭 Live Demo: Unified Statement of Values")
         
-        asset_data = []
-        for asset in policy.assets:
-            location = asset.locations[0] if asset.locations else None
-            value = next((d.detail_value for d in asset.details if d.detail_key == 'Replacement Value'), 'N/A')
-            asset_data.append({
-                "Description": asset.description,
-                "Type": asset.asset_type,
-                "Location": f"{location.city}, {location.country}" if location else "N/A",
-                "Replacement Value (EUR)": value
-            })
+        sov = get_statement_of_values(policy.id)
+        import pandas as pd
+        asset_data = pd.DataFrame({
+            "Description": sov['description'],
+            "Type": sov['asset_type'],
+            "Location": (sov['city'] + ", " + sov['country']).fillna("N/A"),
+            "Replacement Value (EUR)": sov['replacement_value']
+        })
         
-        st.dataframe(pd.DataFrame(asset_data), width=1000)
+        st.dataframe(asset_data, width=1000)
         
-        total_value = sum([float(a["Replacement Value (EUR)"]) for a in asset_data if a["Replacement Value (EUR)"] != 'N/A'])
+        # Aggregated in SQL from the typed asset_attribute table
+        total_value = get_sov_total([policy.id])
         st.metric("Total Insured Value", f"EUR {total_value:,.0f}")
         
         st.success("💡 **Benefit**: 90% time savings. Perfect accuracy. Real-time visibility across all locations.")
@@ -592,7 +626,7 @@ elif "Case 2" in selected_case:
             {"Location": "Stuttgart - Main Production", "Sensor Type": "Smoke Detection", "Status": "✅ Active", "Last Maintenance": "2023-08-15"},
             {"Location": "Hamburg - Assembly", "Sensor Type": "Water Leak", "Status": "✅ Active", "Last Maintenance": "2023-09-01"},
         ]
-        st.table(pd.DataFrame(iot_data))
+        st.table(iot_data)
         
         st.success("💡 **Benefit**: Instant verification. Lower premiums. Better risk management.")
     
@@ -651,7 +685,9 @@ elif "Case 2" in selected_case:
                 {"Activity": "Damage Assessment", "Date": "2023-03-23", "Participants": "Independent Expert", "Status": "✅ Completed"},
                 {"Activity": "Settlement Discussion", "Date": "2023-03-27", "Participants": "All parties", "Status": "✅ Completed"}
             ]
-            st.table(pd.DataFrame(activities))
+            st.table(activities)
+            
+            render_claim_search(policy.claims, key="case2_claim")
             
             st.success("💡 **Benefit**: 70% faster coordination. All parties have visibility. Agent focuses on advocacy.")
     
@@ -703,6 +739,7 @@ elif "Case 2" in selected_case:
             {"Document": "Payroll Records", "Required": "✅", "Received": "✅", "Date": "2023-04-02"}
         ]
         
+        import pandas as pd
         df = pd.DataFrame(checklist_data)
         st.dataframe(df, width=1000)
         
@@ -788,7 +825,7 @@ elif "Case 3" in selected_case:
             {"Entity": "HelvetiaPharma Singapore Pte Ltd", "Jurisdiction": "Singapore", "Status": "✅ Clear", "Last Checked": datetime.now().strftime("%Y-%m-%d %H:%M")},
         ]
         
-        st.table(pd.DataFrame(compliance_data))
+        st.table(compliance_data)
         
         st.success("💡 **Benefit**: 95% time savings. Continuous monitoring. Audit trail for regulators.")
     
@@ -842,6 +879,83 @@ elif "Case 3" in selected_case:
             # Visualize the tower
             st.dataframe(tower_df, width=1000)
             
+            # Run a ground-up loss through the layers and participant shares
+            import pandas as pd
+            from layer_allocation import load_tower, allocate_losses
+            tower = load_tower(policy.id)
+            if not tower_df.empty:
+                loss = st.number_input(
+                    "Ground-up loss to allocate (CHF)", min_value=0.0, step=1_000_000.0,
+                    value=float(tower['attachment'][-1] + tower['limit'][-1] / 2), key="case3_tower_loss"
+                )
+                allocation = allocate_losses([loss], tower)
+                st.dataframe(pd.DataFrame({
+                    'Layer': tower_df['Layer'],
+                    'Coverage': tower_df['Coverage'],
+                    'Recovery': [f"{r:,.0f}" for r in allocation['layer'][0]],
+                }), width=1000)
+                col1, col2 = st.columns(2)
+                col1.metric("Ceded to Reinsurers", f"CHF {allocation['ceded'][0]:,.0f}")
+                col2.metric("Retained", f"CHF {allocation['retained'][0]:,.0f}")
+            
+            # Exceedance curves and layer expected losses from the Monte Carlo engine
+            from cat_simulation import (
+                simulate_policy, DEFAULT_YEARS, DEFAULT_FREQUENCY, DEFAULT_SEVERITY_SIGMA, PML_RETURN_PERIOD
+            )
+            if not tower_df.empty:
+                with st.expander("🎲 Catastrophe Simulation (Monte Carlo)"):
+                    col1, col2, col3 = st.columns(3)
+                    sim_years = col1.select_slider(
+                        "Simulated years", options=[10_000, 100_000, 500_000, 1_000_000],
+                        value=DEFAULT_YEARS, key="case3_sim_years"
+                    )
+                    sim_frequency = col2.number_input(
+                        "Events per year", min_value=0.05, max_value=10.0, value=DEFAULT_FREQUENCY,
+                        step=0.05, key="case3_sim_frequency"
+                    )
+                    sim_sigma = col3.number_input(
+                        "Severity volatility (σ)", min_value=0.2, max_value=3.0, value=DEFAULT_SEVERITY_SIGMA,
+                        step=0.1, key="case3_sim_sigma"
+                    )
+                    if st.button("Run simulation", key="case3_run_simulation"):
+                        with st.spinner(f"Simulating {sim_years:,} years..."):
+                            # One process: a pool would fork the server's threads (spawn re-imports this script)
+                            st.session_state.case3_simulation = simulate_policy(
+                                policy.id, years=sim_years, frequency=sim_frequency, sigma=sim_sigma
+                            )
+                    
+                    simulation = st.session_state.get('case3_simulation')
+                    if simulation:
+                        col1, col2, col3 = st.columns(3)
+                        col1.metric("Expected Annual Loss", f"CHF {simulation['expected_loss']:,.0f}")
+                        col2.metric(f"PML 1-in-{PML_RETURN_PERIOD} (AEP)", f"CHF {simulation['pml']:,.0f}")
+                        col3.metric(f"Net PML 1-in-{PML_RETURN_PERIOD} (AEP)", f"CHF {simulation['net_pml']:,.0f}")
+                        
+                        st.write("**Exceedance probability curves**")
+                        st.line_chart(simulation['ep_curve'].set_index('Return Period'))
+                        
+                        layers = simulation['layers']
+                        st.write("**Layer expected loss**")
+                        st.dataframe(pd.DataFrame({
+                            'Layer': layers['Layer'],
+                            'Coverage': [f"{l:,.0f} xs {a:,.0f}" for l, a in zip(layers['Limit'], layers['Attachment'])],
+                            'Expected Loss': [f"{v:,.0f}" for v in layers['Expected Loss']],
+                            'Loss Cost': [f"{v:.2%}" for v in layers['Loss Cost']],
+                            'P(Attach)': [f"{v:.2%}" for v in layers['P(Attach)']],
+                            'P(Exhaust)': [f"{v:.2%}" for v in layers['P(Exhaust)']],
+                        }), width=1000)
+                        
+                        if not simulation['coinsurers'].empty:
+                            coinsurers = simulation['coinsurers']
+                            st.write("**Co-insurer net shares**")
+                            st.dataframe(pd.DataFrame({
+                                'Insurer': coinsurers['Insurer'],
+                                'Share': [f"{v:.0%}" for v in coinsurers['Share']],
+                                'Expected Net Loss': [f"{v:,.0f}" for v in coinsurers['Expected Net Loss']],
+                                'Net PML (AEP)': [f"{v:,.0f}" for v in coinsurers['Net PML']],
+                            }), width=1000)
+                        st.caption(f"{simulation['years']:,} simulated years")
+            
             # Calculate totals
             num_layers = len(tower_df)
             
@@ -898,7 +1012,7 @@ elif "Case 3" in selected_case:
             {"Location": "Singapore (Local)", "Policy Number": "SG-2023-HP-001", "Status": "✅ Issued", "Limit": "SGD 50M", "Effective": str(policy.effective_date)},
         ]
         
-        st.table(pd.DataFrame(program_data))
+        st.table(program_data)
         
         st.success("💡 **Benefit**: 70% faster global coordination. Consistent coverage. Real-time visibility across regions.")
     
@@ -962,7 +1076,9 @@ elif "Case 3" in selected_case:
                 {"Party": "Layer 2 Reinsurers (3)", "Notification": "Cash call issued", "Date": "2023-09-16", "Status": "✅ Acknowledged"},
                 {"Party": "Layer 3 Reinsurers (3)", "Notification": "Claim monitoring", "Date": "2023-09-16", "Status": "✅ Acknowledged"},
             ]
-            st.table(pd.DataFrame(notifications))
+            st.table(notifications)
+            
+            render_claim_search(policy.claims, key="case3_large_loss")
             
             st.success("💡 **Benefit**: Instant notification. Consistent messaging. Full audit trail. 80% time savings.")
     
@@ -1010,6 +1126,8 @@ elif "Case 3" in selected_case:
         
         if policy.claims:
             claim = get_claim_details(policy.claims[0].id)
+            # Claims are booked in the currency of their transactions; cash calls follow the loss
+            claim_currency = claim.financials[0].currency if claim.financials else 'CHF'
             
             if claim.cash_calls:
                 cash_call_data = []
@@ -1026,44 +1144,43 @@ elif "Case 3" in selected_case:
                         "Status": cc.status
                     })
                 
-                df = pd.DataFrame(cash_call_data)
-                st.dataframe(df, width=1200)
+                st.dataframe(cash_call_data, width=1200)
                 
-                # Summary metrics
-                total_called = sum([cc.call_amount for cc in claim.cash_calls])
-                paid_count = sum([1 for cc in claim.cash_calls if cc.status == 'PAID'])
-                pending_count = sum([1 for cc in claim.cash_calls if cc.status == 'PENDING'])
+                # Summary metrics from the trigger-maintained claim ledger
+                ledger = get_claim_ledger(claim.id)
                 
                 col1, col2, col3, col4 = st.columns(4)
-                col1.metric("Total Called", f"CHF {total_called:,.0f}")
-                col2.metric("Calls Issued", len(claim.cash_calls))
-                col3.metric("Paid", f"{paid_count} ({paid_count/len(claim.cash_calls)*100:.0f}%)")
-                col4.metric("Pending", f"{pending_count}")
+                col1.metric("Total Called", f"{claim_currency} {ledger.called:,.0f}")
+                col2.metric("Calls Issued", ledger.cash_calls)
+                col3.metric("Paid", f"{ledger.cash_calls_paid} ({ledger.cash_calls_paid/ledger.cash_calls*100:.0f}%)")
+                col4.metric("Pending", f"{ledger.cash_calls_pending}")
                 
                 st.success("💡 **Benefit**: Instant issuance. Real-time tracking. Better collection rates. Full transparency.")
+            
+            # Calls the difference between the claim's incurred allocation and what was already called
+            from layer_allocation import load_tower, incurred_losses, generate_cash_calls
+            tower = load_tower(policy.id)
+            if tower is not None and st.button("📨 Issue cash calls from the tower", key="case3_issue_cash_calls"):
+                issued = generate_cash_calls([claim.id], incurred_losses([claim.id]), tower,
+                                             currency=claim_currency)
+                st.toast(f"{issued} cash call(s) issued" if issued else "All layers are fully called")
+                if issued:
+                    st.rerun()
 
 # --- CASE 4: API INTEGRATION DEMO ---
 elif "Case 4" in selected_case:
     
+    EVENT_POLL_INTERVAL = 2  # seconds between outbox checks
+    
     st.sidebar.markdown("---")
     st.sidebar.subheader("Live Demo Controls")
     
-    # Auto-refresh toggle with better implementation
-    auto_refresh = st.sidebar.checkbox("🔄 Auto-refresh (every 2s)", value=True)
+    # Live updates: listen for portal events instead of rerunning on a timer
+    auto_refresh = st.sidebar.checkbox(f"🔄 Live updates (checks every {EVENT_POLL_INTERVAL}s)", value=True)
     
     if st.sidebar.button("🔃 Manual Refresh", use_container_width=True):
         st.rerun()
     
-    # Auto-refresh mechanism using st.empty() placeholder
-    if auto_refresh:
-        import time
-        # Create a placeholder that will trigger rerun after 2 seconds
-        refresh_placeholder = st.sidebar.empty()
-        with refresh_placeholder:
-            st.caption(f"🔄 Last refresh: {time.strftime('%H:%M:%S')}")
-        time.sleep(2)
-        st.rerun()
-    
     # Header
     st.markdown("## 🏢 Guidewire PolicyCenter - STP Dashboard")
     st.caption("Real-time Straight Through Processing (STP) monitoring for API-driven quotes")
@@ -1082,38 +1199,36 @@ elif "Case 4" in selected_case:
         session.close()
         st.stop()
     
-    # Get all quote submissions (chat messages about quotes)
-    all_submissions = session.query(ChatMessage).filter(
-        ChatMessage.user_id == user.id
-    ).order_by(ChatMessage.timestamp.desc()).all()
+    # Classify only quote requests that arrived since the last refresh
+    from stp_inbox import refresh_stp_inbox, get_stp_inbox_rows, build_inbox_table, INBOX_PAGE_SIZE
+    from event_outbox import latest_event_id, fetch_events
+    # Read the event cursor first: anything published during the refresh wakes the listener again
+    st.session_state.stp_last_event_id = latest_event_id(user.id)
+    inbox = refresh_stp_inbox(user.id)
     
-    # Calculate KPI metrics dynamically
-    total_quotes = len(all_submissions)
-    avg_processing_time = 12.1  # seconds (simulated)
+    @st.fragment(run_every=EVENT_POLL_INTERVAL if auto_refresh else None)
+    def listen_for_quote_events(user_id):
+        """Polls the outbox for new portal events and reruns the dashboard only when there are some"""
+        events = fetch_events(user_id, st.session_state.stp_last_event_id)
+        if events:
+            st.session_state.stp_last_event_id = events[-1]['id']
+            st.rerun(scope="app")
+        if auto_refresh:
+            st.caption(f"🔄 Listening for new quotes · last check {datetime.now().strftime('%H:%M:%S')}")
     
-    # Calculate STP rate and average premium from actual submissions
-    stp_count = 0
-    premiums = []
-    premium_map = {"Travel": 89, "Pet": 145, "Life": 450, "Home": 320}
+    with st.sidebar:
+        listen_for_quote_events(user.id)
     
-    for msg in all_submissions:
-        # Determine product type
-        product_type = "General"
-        for prod in ["Travel", "Pet", "Life", "Home"]:
-            if prod.lower() in msg.message.lower():
-                product_type = prod
-                break
-        
-        # Calculate if it's STP (same logic as below)
-        if product_type in ["Travel", "Pet", "Home"]:
-            stp_count += 1
-        
-        # Add premium
-        premium = premium_map.get(product_type, 127)
-        premiums.append(premium)
+    # Calculate KPI metrics from the precomputed aggregates
+    total_quotes = inbox['total_quotes']
+    avg_processing_time = 12.1  # seconds (simulated)
+    
+    # Only Travel, Pet and Home quotes count as STP here; general questions are auto-approved but not quotes
+    product_stp = inbox['stp_count'] - inbox['general_count']
+    stp_rate = int((product_stp / total_quotes * 100)) if total_quotes > 0 else 94
+    avg_premium = inbox['premium_sum'] / total_quotes if total_quotes > 0 else 127
     
-    stp_rate = int((stp_count / total_quotes * 100)) if total_quotes > 0 else 94
-    avg_premium = sum(premiums) / len(premiums) if premiums else 127
+    HIDDEN_COLUMNS = ['_timestamp', '_response', '_premium_raw']
     
     # === TOP KPI SECTION (4 Cards) ===
     col1, col2, col3, col4 = st.columns(4)
@@ -1186,57 +1301,17 @@ elif "Case 4" in selected_case:
             - Click any row to see detailed processing pipeline
             """)
     else:
+        # Newest rows per decision; tabs are boolean masks over one frame
+        inbox_df = build_inbox_table(get_stp_inbox_rows(user.id), user.party.name, avg_processing_time)
+        stp_mask = inbox_df['Decision'] == 'STP'
+        
         with tab1:
-            st.caption(f"Showing {total_quotes} submission(s) - Click any row to view processing details")
-            
-            # Build table data
-            table_data = []
-            for idx, msg in enumerate(all_submissions):
-                # Determine product type
-                product_type = "General"
-                for prod in ["Travel", "Pet", "Life", "Home"]:
-                    if prod.lower() in msg.message.lower():
-                        product_type = prod
-                        break
-                
-                # Determine premium
-                premium_map = {"Travel": 89, "Pet": 145, "Life": 450, "Home": 320, "General": 127}
-                premium = premium_map.get(product_type, 127)
-                
-                # Determine status based on product type and risk profile
-                # High-value/high-risk products (Life) → Manual Review
-                # Low-risk products (Travel, Pet, Home) → Auto-Approved (STP)
-                if product_type in ["Travel", "Pet", "Home"]:
-                    status = "✅ Auto-Approved"
-                    decision = "STP"
-                elif product_type == "Life":
-                    # Life insurance requires manual underwriting
-                    status = "⚠️ Manual Review"
-                    decision = "Referred"
-                else:
-                    # General - auto-approve by default
-                    status = "✅ Auto-Approved"
-                    decision = "STP"
-                
-                quote_id = f"QT-{msg.id + 10000}"
-                
-                table_data.append({
-                    "Quote ID": quote_id,
-                    "Customer": user.party.name,
-                    "Product": product_type + " Insurance",
-                    "Status": status,
-                    "Processing Time": f"{avg_processing_time:.1f}s",
-                    "Premium": f"CHF {premium}",
-                    "Decision": decision,
-                    "Timestamp": msg.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                    "_msg_obj": msg,  # Hidden field for drill-down
-                    "_idx": idx,
-                    "_premium_raw": premium
-                })
+            table_df = inbox_df.head(INBOX_PAGE_SIZE)
+            shown = f"the latest {len(table_df)} of " if len(table_df) < total_quotes else ""
+            st.caption(f"Showing {shown}{total_quotes} submission(s) - Click any row to view processing details")
             
             # Display table with clickable rows
-            df = pd.DataFrame(table_data)
-            display_df = df.drop(columns=['_msg_obj', '_idx', '_premium_raw'])
+            display_df = table_df.drop(columns=HIDDEN_COLUMNS)
             
             st.dataframe(
                 display_df,
@@ -1258,7 +1333,7 @@ elif "Case 4" in selected_case:
             st.markdown("#### 🔍 Drill Down: Select a Submission to View Details")
             
             # Dropdown to select which submission to drill into
-            submission_options = [f"{row['Quote ID']} - {row['Product']} - {row['Timestamp']}" for row in table_data]
+            submission_options = (table_df['Quote ID'] + " - " + table_df['Product'] + " - " + table_df['Timestamp']).tolist()
             
             if submission_options:
                 selected = st.selectbox(
@@ -1272,8 +1347,7 @@ elif "Case 4" in selected_case:
                     selected_idx = submission_options.index(selected)
                     st.session_state.expanded_submission = selected_idx
                     
-                    selected_row = table_data[selected_idx]
-                    msg = selected_row['_msg_obj']
+                    selected_row = table_df.iloc[selected_idx]
                     premium = selected_row['_premium_raw']
                     
                     # Show detailed processing pipeline
@@ -1331,7 +1405,7 @@ elif "Case 4" in selected_case:
                     with st.container():
                         st.markdown(f"""
                         <div style='background: #f8f9fa; padding: 15px; border-radius: 8px; border-left: 3px solid #4CAF50;'>
-                        {msg.response}
+                        {selected_row['_response']}
                         </div>
                         """, unsafe_allow_html=True)
                     
@@ -1348,7 +1422,7 @@ Content-Type: application/json
   "customer_id": "{user.id}",
   "customer_name": "{user.party.name}",
   "product_type": "{selected_row['Product'].lower().replace(' insurance', '')}",
-  "request_timestamp": "{msg.timestamp.isoformat()}",
+  "request_timestamp": "{selected_row['_timestamp'].isoformat()}",
   "context": {{
     "existing_policies": 2,
     "customer_segment": "individual",
@@ -1374,19 +1448,17 @@ Content-Type: application/json
                     st.session_state.expanded_submission = None
         
         with tab2:
-            auto_approved = [row for row in table_data if row['Decision'] == 'STP']
-            st.metric("Auto-Approved Submissions", len(auto_approved))
-            if auto_approved:
-                df_approved = pd.DataFrame(auto_approved).drop(columns=['_msg_obj', '_idx', '_premium_raw'])
+            st.metric("Auto-Approved Submissions", inbox['stp_count'])
+            if inbox['stp_count']:
+                df_approved = inbox_df[stp_mask].drop(columns=HIDDEN_COLUMNS)
                 st.dataframe(df_approved, use_container_width=True, hide_index=True)
             else:
                 st.info("No auto-approved submissions yet.")
         
         with tab3:
-            manual_review = [row for row in table_data if row['Decision'] != 'STP']
-            st.metric("Manual Review Required", len(manual_review))
-            if manual_review:
-                df_manual = pd.DataFrame(manual_review).drop(columns=['_msg_obj', '_idx', '_premium_raw'])
+            st.metric("Manual Review Required", inbox['referred_count'])
+            if inbox['referred_count']:
+                df_manual = inbox_df[~stp_mask].drop(columns=HIDDEN_COLUMNS)
                 st.dataframe(df_manual, use_container_width=True, hide_index=True)
             else:
                 st.info("No submissions requiring manual review.")
@@ -1445,7 +1517,7 @@ Content-Type: application/json
         "Status": ["✅ Good", "✅ Good", "✅ Good", "✅ Good", "✅ Good", "⚠️ Scaling"]
     }
     
-    st.dataframe(pd.DataFrame(metrics_data), use_container_width=True)
+    st.dataframe(metrics_data, use_container_width=True)
     
     st.markdown("---")
     
@@ -1475,3 +1547,5 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+with st.sidebar:
+    render_profile_panel(sql_profile)
@@ -0,0 +1,184 @@
+"""Monte Carlo catastrophe loss simulation over a policy's reinsurance tower.
+
+Each simulated year has a Poisson number of events with lognormal
+severities. The samples depend only on the frequency, the severity shape and
+the seed, not on the policy: they are written once per chunk of years as
+.npy files under SAMPLE_CACHE_DIR and memory-mapped by every later run, and
+a policy only scales them by its median event loss. Chunks are seeded from
+(seed, chunk index), so the result is identical whether the chunks run in
+one process or fan out to a process pool. Every chunk runs its events
+through the tower with the same clip broadcast as layer_allocation and
+reduces them to annual aggregate (AEP) and largest-event (OEP) losses, from
+which the exceedance curves and layer tables are built.
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from database_queries import get_session, get_sov_total
+from db_engine import PROJECT_ROOT
+from layer_allocation import load_tower
+from seed_database import Party, PolicyInsurer
+
+SAMPLE_CACHE_DIR = os.environ.get('PNC_SIM_CACHE', os.path.join(PROJECT_ROOT, '.sim_cache'))
+CHUNK_YEARS = 100000  # simulated years per chunk (also the unit of work per worker task)
+
+DEFAULT_YEARS = 100000
+DEFAULT_FREQUENCY = 0.8  # events per year
+DEFAULT_SEVERITY_SIGMA = 1.4  # lognormal shape; larger means a heavier tail
+RETURN_PERIODS = (10, 25, 50, 100, 200, 250, 500, 1000)
+PML_RETURN_PERIOD = 200
+
+
+def sample_dir(frequency, sigma, seed):
+    """Cache directory for one set of sampling parameters."""
+    key = hashlib.sha256(repr((float(frequency), float(sigma), int(seed))).encode()).hexdigest()[:16]
+    return os.path.join(SAMPLE_CACHE_DIR, f'cat_{key}')
+
+
+def _chunk_samples(cache_dir, seed, chunk_index, years, frequency, sigma):
+    """Event counts per year and unit-median severities for one chunk, memory-mapped.
+
+    Missing chunks are drawn and saved first; the counts file is written
+    last (each via rename), so its presence means the chunk is complete.
+    """
+    prefix = os.path.join(cache_dir, f'chunk_{chunk_index:05d}_{years}')
+    counts_path, severity_path = prefix + '_counts.npy', prefix + '_severity.npy'
+    if not os.path.exists(counts_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        rng = np.random.default_rng([seed, chunk_index])
+        counts = rng.poisson(frequency, years).astype(np.int32)
+        severity = rng.lognormal(0.0, sigma, int(counts.sum()))
+        for path, array in ((severity_path, severity), (counts_path, counts)):
+            partial = f'{path[:-4]}.{os.getpid()}.npy'
+            np.save(partial, array)
+            os.replace(partial, path)
+    return np.load(counts_path, mmap_mode='r'), np.load(severity_path, mmap_mode='r')
+
+
+def _simulate_chunk(task):
+    """Annual aggregate, largest event and per-layer annual losses for one chunk of years."""
+    cache_dir, seed, chunk_index, years, frequency, sigma, scale, exposure, attachment, limit = task
+    counts, severity = _chunk_samples(cache_dir, seed, chunk_index, years, frequency, sigma)
+    events = np.minimum(severity * scale, exposure)
+    year = np.repeat(np.arange(years), counts)
+
+    layer_events = np.clip(events[:, None] - attachment, 0.0, limit)
+    layer = np.column_stack([
+        np.bincount(year, weights=layer_events[:, j], minlength=years) for j in range(len(attachment))
+    ]) if len(attachment) else np.zeros((years, 0))
+
+    # Events are stored year by year, so each non-empty year is one reduceat segment
+    largest = np.zeros(years)
+    occupied = counts > 0
+    if events.size:
+        starts = (np.cumsum(counts) - counts)[occupied]
+        largest[occupied] = np.maximum.reduceat(events, starts)
+    return {
+        'aggregate': np.bincount(year, weights=events, minlength=years),
+        'largest': largest,
+        'layer': layer,
+    }
+
+
+def simulate_losses(attachment, limit, years=DEFAULT_YEARS, frequency=DEFAULT_FREQUENCY,
+                    sigma=DEFAULT_SEVERITY_SIGMA, scale=1.0, exposure=np.inf, seed=42, workers=1):
+    """Simulates `years` years against a tower's layers.
+
+    Returns per-year arrays: 'aggregate' and 'largest' ground-up loss and
+    'layer' (years x layers) recoveries before participant shares.
+    workers > 1 fans the chunks out to a process pool; that is for scripts
+    and benchmarks, not a Streamlit rerun, which should stay in-process.
+    """
+    attachment = np.asarray(attachment, dtype=float)
+    limit = np.asarray(limit, dtype=float)
+    cache_dir = sample_dir(frequency, sigma, seed)
+    tasks = [
+        (cache_dir, seed, chunk_index, min(CHUNK_YEARS, years - first), frequency, sigma,
+         scale, exposure, attachment, limit)
+        for chunk_index, first in enumerate(range(0, years, CHUNK_YEARS))
+    ]
+    if workers <= 1 or len(tasks) == 1:
+        chunks = [_simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            chunks = list(pool.map(_simulate_chunk, tasks))
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def exceedance_curve(losses, return_periods=RETURN_PERIODS):
+    """Loss exceeded once per return period (empirical quantile of annual losses)."""
+    return np.quantile(losses, 1.0 - 1.0 / np.asarray(return_periods, dtype=float))
+
+
+def _coinsurers(policy_id):
+    session = get_session()
+    try:
+        return session.query(Party.name, PolicyInsurer.share_percentage, PolicyInsurer.is_lead).join(
+            Party, Party.id == PolicyInsurer.insurer_party_id
+        ).filter(
+            PolicyInsurer.policy_id == policy_id
+        ).order_by(PolicyInsurer.is_lead.desc(), PolicyInsurer.id).all()
+    finally:
+        session.close()
+
+
+def simulate_policy(policy_id, years=DEFAULT_YEARS, frequency=DEFAULT_FREQUENCY, sigma=DEFAULT_SEVERITY_SIGMA,
+                    severity_median=None, seed=42, workers=1):
+    """Cat simulation for a policy's first treaty, or None when it has no layers.
+
+    Event losses are capped at the policy's Statement of Values total when
+    it has one. The median event loss defaults to the lowest attachment, so
+    about half of all events reach the tower. Returns a dict with
+    'expected_loss', 'pml' and 'net_pml' (annual aggregate loss at
+    PML_RETURN_PERIOD, gross and net of reinsurance, so the net figure never
+    exceeds the gross one), and DataFrames 'ep_curve', 'layers' and 'coinsurers'.
+    """
+    tower = load_tower(policy_id)
+    if tower is None or not len(tower['attachment']):
+        return None
+    exposure = get_sov_total([policy_id]) or np.inf
+    severity_median = severity_median or float(tower['attachment'].min())
+
+    sim = simulate_losses(tower['attachment'], tower['limit'], years, frequency, sigma,
+                          scale=severity_median, exposure=exposure, seed=seed, workers=workers)
+    # Share of each layer that is placed with participants
+    placed = np.bincount(tower['participant_layer'], weights=tower['share'], minlength=len(tower['attachment']))
+    net = sim['aggregate'] - sim['layer'] @ placed
+    exhaustion = tower['attachment'] + tower['limit']
+
+    ep_curve = pd.DataFrame({
+        'Return Period': RETURN_PERIODS,
+        'OEP': exceedance_curve(sim['largest']),
+        'AEP': exceedance_curve(sim['aggregate']),
+        'AEP Net': exceedance_curve(net),
+    })
+    expected_layer_loss = sim['layer'].mean(axis=0)
+    layers = pd.DataFrame({
+        'Layer': np.arange(1, len(tower['attachment']) + 1),
+        'Attachment': tower['attachment'],
+        'Limit': tower['limit'],
+        'Expected Loss': expected_layer_loss,
+        'Loss Cost': expected_layer_loss / tower['limit'],
+        'P(Attach)': (sim['largest'][:, None] > tower['attachment']).mean(axis=0),
+        'P(Exhaust)': (sim['largest'][:, None] >= exhaustion).mean(axis=0),
+        'Placed': placed,
+    })
+    net_pml = float(exceedance_curve(net, [PML_RETURN_PERIOD])[0])
+    coinsurers = pd.DataFrame(
+        [(name, share / 100.0, share / 100.0 * net.mean(), share / 100.0 * net_pml, is_lead)
+         for name, share, is_lead in _coinsurers(policy_id)],
+        columns=['Insurer', 'Share', 'Expected Net Loss', 'Net PML', 'Lead']
+    )
+    return {
+        'years': years,
+        'expected_loss': float(sim['aggregate'].mean()),
+        'pml': float(exceedance_curve(sim['aggregate'], [PML_RETURN_PERIOD])[0]),
+        'net_pml': net_pml,
+        'ep_curve': ep_curve,
+        'layers': layers,
+        'coinsurers': coinsurers,
+    }
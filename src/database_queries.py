@@ -1,20 +1,23 @@
 # database_queries.py
 
-from sqlalchemy import create_engine, desc
-from sqlalchemy.orm import sessionmaker, joinedload
+import json
+import re
+
+from sqlalchemy import desc, func, cast, select, String, text
+from sqlalchemy.orm import sessionmaker, joinedload, selectinload
 from seed_database import (
     Base, Party, Policy, Quote, Submission, Claim, Coverage, 
     InsurableAsset, AssetLocation, AssetDetail, ClaimDetail, 
     FinancialTransaction, Subrogation, PolicyInsurer, ReinsuranceTreaty, 
-    ReinsuranceLayer, LayerParticipant, CashCall, Document, PartyRole,
+    ReinsuranceLayer, LayerParticipant, CashCall, Document, PartyRole, AssetAttribute, ClaimLedger, PolicyRevision,
     CustomerUser, ChatMessage, GeneratedAd, PolicySummary, EmailTemplate
 )
-import pandas as pd
+# pandas is imported by the functions that return DataFrames, so the pages
+# that only run queries never pay for loading it
 
 # --- Database Connection ---
-DB_FILE = "pnc_demo.db"
-engine = create_engine(f'sqlite:///{DB_FILE}')
-Session = sessionmaker(bind=engine)
+# Shared, pooled engine for the single absolute database path (see db_engine.py)
+from db_engine import DB_PATH as DB_FILE, engine, Session
 
 # --- Query Functions ---
 
@@ -34,7 +37,6 @@ def get_policy_details(policy_id):
     session = get_session()
     policy = session.query(Policy).options(
         joinedload(Policy.coverages),
-        joinedload(Policy.assets).joinedload(InsurableAsset.details),
         joinedload(Policy.assets).joinedload(InsurableAsset.locations),
         joinedload(Policy.claims),
         joinedload(Policy.coinsurers),
@@ -50,16 +52,32 @@ def get_party_by_id(party_id):
     session.close()
     return party
 
+def get_parties_by_ids(party_ids, session=None):
+    """Fetches several parties in a single IN query, keyed by party ID."""
+    ids = {pid for pid in party_ids if pid is not None}
+    if not ids:
+        return {}
+    own_session = session is None
+    if own_session:
+        session = get_session()
+    parties = session.query(Party).filter(Party.id.in_(ids)).all()
+    if own_session:
+        session.close()
+    return {p.id: p for p in parties}
+
 def get_quotes_for_submission(submission_id):
     """Fetches all quotes associated with a submission."""
+    import pandas as pd
+
     session = get_session()
     quotes = session.query(Quote).options(
         joinedload(Quote.submission)
     ).filter(Quote.submission_id == submission_id).all()
+    insurers = get_parties_by_ids([q.insurer_party_id for q in quotes], session)
     
     data = []
     for q in quotes:
-        insurer = get_party_by_id(q.insurer_party_id)
+        insurer = insurers[q.insurer_party_id]
         data.append({
             'Insurer': insurer.name,
             'Premium': q.total_premium,
@@ -92,41 +110,119 @@ def get_claim_details(claim_id):
     session.close()
     return claim
 
-def get_reinsurance_tower(policy_id):
-    """Constructs the full reinsurance tower for a policy."""
+TOWER_COLUMNS = (
+    'layer_id', 'layer_order', 'attachment_point', 'layer_limit', 'premium',
+    'participant_count', 'placed_share', 'participants'
+)
+
+def build_reinsurance_towers(policy_ids):
+    """Builds reinsurance towers for several policies with one aggregated query.
+
+    Treaty, layers, participants and reinsurer names are joined in SQL and
+    grouped per layer, so the statement count does not grow with the number
+    of layers or participants. Participants are listed in LayerParticipant.id
+    order (SQLite leaves group_concat order unspecified, so they are collected
+    as JSON pairs and sorted here). Returns {policy_id: {'treaty': ReinsuranceTreaty,
+    'layers': {column: [values per layer]}}} for the first treaty of each policy.
+    """
+    policy_ids = list(policy_ids)
+    if not policy_ids:
+        return {}
+
+    participant_label = (
+        Party.name + ' (' + cast(LayerParticipant.share_percentage, String) + '%)'
+    )
     session = get_session()
-    treaty = session.query(ReinsuranceTreaty).filter(ReinsuranceTreaty.policy_id == policy_id).first()
-    if not treaty:
-        session.close()
-        return None, pd.DataFrame()
+    rows = session.query(
+        ReinsuranceTreaty,
+        ReinsuranceLayer.id,
+        ReinsuranceLayer.layer_order,
+        ReinsuranceLayer.attachment_point,
+        ReinsuranceLayer.layer_limit,
+        ReinsuranceLayer.premium,
+        func.count(LayerParticipant.id),
+        func.coalesce(func.sum(LayerParticipant.share_percentage), 0.0),
+        func.json_group_array(func.json_array(LayerParticipant.id, participant_label)).filter(
+            LayerParticipant.id.isnot(None)
+        )
+    ).outerjoin(
+        ReinsuranceLayer, ReinsuranceLayer.treaty_id == ReinsuranceTreaty.id
+    ).outerjoin(
+        LayerParticipant, LayerParticipant.layer_id == ReinsuranceLayer.id
+    ).outerjoin(
+        Party, Party.id == LayerParticipant.reinsurer_party_id
+    ).filter(
+        ReinsuranceTreaty.policy_id.in_(policy_ids)
+    ).group_by(
+        ReinsuranceTreaty.id, ReinsuranceLayer.id
+    ).order_by(
+        ReinsuranceTreaty.policy_id, ReinsuranceTreaty.id, ReinsuranceLayer.layer_order
+    ).all()
+    session.close()
 
-    layers = session.query(ReinsuranceLayer).filter(ReinsuranceLayer.treaty_id == treaty.id).order_by(ReinsuranceLayer.layer_order).all()
-    
-    tower_data = []
-    for layer in layers:
-        participants = session.query(LayerParticipant).filter(LayerParticipant.layer_id == layer.id).all()
-        participant_names = []
-        for p in participants:
-            reinsurer = get_party_by_id(p.reinsurer_party_id)
-            participant_names.append(f"{reinsurer.name} ({p.share_percentage}%)")
-
-        tower_data.append({
-            'Layer': layer.layer_order,
-            'Attachment': f"{layer.attachment_point:,.0f}",
-            'Limit': f"{layer.layer_limit:,.0f}",
-            'Coverage': f"{layer.layer_limit:,.0f} xs {layer.attachment_point:,.0f}",
-            'Participants': ", ".join(participant_names)
+    towers = {}
+    for treaty, *layer_values in rows:
+        tower = towers.setdefault(treaty.policy_id, {
+            'treaty': treaty,
+            'layers': {column: [] for column in TOWER_COLUMNS}
         })
-    session.close()
-    return treaty, pd.DataFrame(tower_data)
+        # Only the first treaty per policy forms the tower, as in get_reinsurance_tower
+        if tower['treaty'] is not treaty or layer_values[0] is None:
+            continue
+        layer_values[-1] = ', '.join(label for _, label in sorted(json.loads(layer_values[-1])))
+        for column, value in zip(TOWER_COLUMNS, layer_values):
+            tower['layers'][column].append(value)
+    return towers
+
+def build_reinsurance_tower(policy_id):
+    """Builds the columnar reinsurance tower for a single policy, or None."""
+    return build_reinsurance_towers([policy_id]).get(policy_id)
+
+def tower_to_dataframe(layers):
+    """Formats columnar tower layers as the display DataFrame."""
+    import pandas as pd
+
+    return pd.DataFrame({
+        'Layer': layers['layer_order'],
+        'Attachment': [f"{a:,.0f}" for a in layers['attachment_point']],
+        'Limit': [f"{l:,.0f}" for l in layers['layer_limit']],
+        'Coverage': [f"{l:,.0f} xs {a:,.0f}" for l, a in zip(layers['layer_limit'], layers['attachment_point'])],
+        'Participants': layers['participants']
+    })
+
+def _tower_result(tower):
+    import pandas as pd
+
+    if not tower:
+        return None, pd.DataFrame()
+    if not tower['layers']['layer_id']:
+        return tower['treaty'], pd.DataFrame()
+    return tower['treaty'], tower_to_dataframe(tower['layers'])
+
+def get_reinsurance_tower(policy_id):
+    """Constructs the full reinsurance tower for a policy."""
+    return _tower_result(build_reinsurance_tower(policy_id))
+
+def get_reinsurance_towers(policy_ids):
+    """Constructs reinsurance towers for several policies at once.
+
+    Returns {policy_id: (treaty, DataFrame)} for every policy that has a treaty.
+    """
+    return {
+        policy_id: _tower_result(tower)
+        for policy_id, tower in build_reinsurance_towers(policy_ids).items()
+    }
 
 def get_coinsurance_details(policy_id):
     """Fetches co-insurance participation for a policy."""
+    import pandas as pd
+
     session = get_session()
     coinsurers = session.query(PolicyInsurer).filter(PolicyInsurer.policy_id == policy_id).all()
+    insurers = get_parties_by_ids([ci.insurer_party_id for ci in coinsurers], session)
     data = []
     for ci in coinsurers:
-        insurer = get_party_by_id(ci.insurer_party_id)
+        insurer = insurers[ci.insurer_party_id]
         data.append({
             'Insurer': insurer.name,
             'Role': 'Lead' if ci.is_lead else 'Co-insurer',
@@ -135,6 +231,51 @@ def get_coinsurance_details(policy_id):
     session.close()
     return pd.DataFrame(data)
 
+def get_statement_of_values(policy_id):
+    """Statement of Values for a policy: one row per asset with its location and typed values.
+
+    Reads the asset_attribute pivot in a single query instead of walking
+    asset.details. Assets without a replacement value have NaN there.
+    """
+    import pandas as pd
+
+    first_location = (
+        select(func.min(AssetLocation.id))
+        .where(AssetLocation.asset_id == InsurableAsset.id)
+        .correlate(InsurableAsset)
+        .scalar_subquery()
+    )
+    query = select(
+        InsurableAsset.id.label('asset_id'),
+        InsurableAsset.description,
+        InsurableAsset.asset_type,
+        AssetLocation.city,
+        AssetLocation.country,
+        AssetAttribute.replacement_value,
+    ).outerjoin(
+        AssetLocation, AssetLocation.id == first_location
+    ).outerjoin(
+        AssetAttribute, AssetAttribute.asset_id == InsurableAsset.id
+    ).where(InsurableAsset.policy_id == policy_id).order_by(InsurableAsset.id)
+    with engine.connect() as conn:
+        # Typed even when every value is missing, which pandas would otherwise read as None objects
+        return pd.read_sql(query, conn, dtype={'replacement_value': 'float64'})
+
+def get_sov_total(policy_ids=None):
+    """Total replacement value for some policies (all policies when None), as one aggregate query."""
+    query = select(func.coalesce(func.sum(AssetAttribute.replacement_value), 0.0))
+    if policy_ids is not None:
+        query = query.where(AssetAttribute.policy_id.in_(policy_ids))
+    with engine.connect() as conn:
+        return conn.execute(query).scalar()
+
+def get_claim_ledger(claim_id):
+    """Running financial summary of a claim (primary-key lookup), or None when it has no activity."""
+    session = get_session()
+    ledger = session.get(ClaimLedger, claim_id)
+    session.close()
+    return ledger
+
 def get_documents_for_record(table_name, record_id):
     """Fetches all documents linked to a specific record."""
     session = get_session()
@@ -147,8 +288,162 @@ def get_claim_subrogation(claim_id):
     session = get_session()
     subro = session.query(Subrogation).filter(Subrogation.claim_id == claim_id).first()
     if subro:
-        liable_party = get_party_by_id(subro.liable_party_id)
+        liable_party = get_parties_by_ids([subro.liable_party_id], session).get(subro.liable_party_id)
         session.close()
         return subro, liable_party
     session.close()
-    return None, None
\ No newline at end of file
+    return None, None
+
+
+def get_customer_portfolio_version(party_id):
+    """Cheap fingerprint of a customer's portfolio, for cache keys.
+
+    The role count and newest role ID change when policies are added or
+    removed; the newest policy_revision stamp changes on any edit to the
+    policies, their quotes, coverages, assets or roles.
+    """
+    session = get_session()
+    count, newest, revision = session.query(
+        func.count(PartyRole.id), func.max(PartyRole.id), func.max(PolicyRevision.revision)
+    ).outerjoin(
+        PolicyRevision, PolicyRevision.policy_id == PartyRole.context_id
+    ).filter(
+        PartyRole.party_id == party_id,
+        PartyRole.role_name == 'Insured',
+        PartyRole.context_table == 'policy'
+    ).one()
+    session.close()
+    return count, newest, revision
+
+
+def get_customer_portfolio(party_id):
+    """Fetches every policy a party is insured on, with quote, coverages, assets and insurer.
+
+    Four statements regardless of portfolio size: policies joined to their
+    quotes, one IN query each for coverages and assets, and one for the
+    insurers. The returned objects are detached with all of that loaded.
+    """
+    session = get_session()
+    policies = session.query(Policy).join(
+        PartyRole, (PartyRole.context_table == 'policy') & (PartyRole.context_id == Policy.id)
+    ).filter(
+        PartyRole.party_id == party_id,
+        PartyRole.role_name == 'Insured'
+    ).options(
+        joinedload(Policy.quote),
+        selectinload(Policy.coverages),
+        selectinload(Policy.assets)
+    ).order_by(Policy.id).all()
+
+    insurers = {}
+    if policies:
+        rows = session.query(PartyRole.context_id, Party).join(
+            Party, PartyRole.party_id == Party.id
+        ).filter(
+            PartyRole.context_table == 'policy',
+            PartyRole.context_id.in_([p.id for p in policies]),
+            PartyRole.role_name == 'Insurer'
+        ).order_by(PartyRole.id).all()
+        for policy_id, insurer in rows:
+            insurers.setdefault(policy_id, insurer)
+    session.close()
+
+    return {
+        'policies': policies,
+        'insurers': insurers,
+        'total_premium': sum(p.quote.total_premium for p in policies if p.quote)
+    }
+
+# --- Full-Text Search ---
+
+SEARCH_ENTITIES = ('claim_detail', 'claim', 'chat_message', 'document')
+
+# Per entity: the FTS5 join to the source row, the id of the record a hit belongs to, and its label
+_SEARCH_SQL = {
+    'claim_detail': """
+        SELECT d.id, d.claim_id AS parent_id, c.claim_number AS label,
+               snippet(claim_detail_fts, -1, '**', '**', '…', 12) AS snippet, bm25(claim_detail_fts) AS score
+        FROM claim_detail_fts
+        JOIN claim_detail d ON d.id = claim_detail_fts.rowid
+        JOIN claim c ON c.id = d.claim_id
+        WHERE claim_detail_fts MATCH :query {where}
+        ORDER BY score LIMIT :limit""",
+    'claim': """
+        SELECT c.id, c.id AS parent_id, c.claim_number AS label,
+               snippet(claim_fts, -1, '**', '**', '…', 12) AS snippet, bm25(claim_fts) AS score
+        FROM claim_fts
+        JOIN claim c ON c.id = claim_fts.rowid
+        WHERE claim_fts MATCH :query {where}
+        ORDER BY score LIMIT :limit""",
+    'chat_message': """
+        SELECT m.id, m.user_id AS parent_id, strftime('%Y-%m-%d %H:%M', m.timestamp) AS label,
+               snippet(chat_message_fts, -1, '**', '**', '…', 12) AS snippet, bm25(chat_message_fts) AS score
+        FROM chat_message_fts
+        JOIN chat_message m ON m.id = chat_message_fts.rowid
+        WHERE chat_message_fts MATCH :query {where}
+        ORDER BY score LIMIT :limit""",
+    'document': """
+        SELECT doc.id, doc.related_id AS parent_id, COALESCE(c.claim_number, doc.related_table) AS label,
+               snippet(document_fts, -1, '**', '**', '…', 12) AS snippet, bm25(document_fts) AS score
+        FROM document_fts
+        JOIN document doc ON doc.id = document_fts.rowid
+        LEFT JOIN claim c ON doc.related_table = 'claim' AND c.id = doc.related_id
+        WHERE document_fts MATCH :query {where}
+        ORDER BY score LIMIT :limit""",
+}
+
+# Optional scope per entity, e.g. the claim being viewed
+_SEARCH_SCOPE = {
+    'claim_detail': 'AND d.claim_id IN ({ids})',
+    'claim': 'AND c.id IN ({ids})',
+    'chat_message': 'AND m.user_id IN ({ids})',
+    'document': "AND doc.related_table = 'claim' AND doc.related_id IN ({ids})",
+}
+
+
+def to_fts_query(terms):
+    """Turns free text into a safe FTS5 query: every word must match, the last one as a prefix.
+
+    One- and two-letter words ("im", "of") are dropped unless nothing else is
+    left. Returns None when the text has no searchable words.
+    """
+    words = re.findall(r'\w+', terms)
+    words = [word for word in words if len(word) > 2] or words
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_text(terms, entities=SEARCH_ENTITIES, scope_ids=None, limit=20):
+    """Ranked full-text hits across claim logs, claims, chat history and documents.
+
+    Args:
+        terms: What the user typed
+        entities: Which of SEARCH_ENTITIES to search
+        scope_ids: Optional list of ids restricting each entity to one parent
+            (claim ids for claims, logs and claim documents; user ids for chat)
+        limit: Maximum number of hits returned
+
+    Returns:
+        List of dicts (entity, id, parent_id, label, snippet, score), best first.
+        Snippets mark matched words with ** for markdown.
+    """
+    query = to_fts_query(terms)
+    if query is None:
+        return []
+
+    hits = []
+    with engine.connect() as conn:
+        for entity in entities:
+            where = ''
+            if scope_ids is not None:
+                where = _SEARCH_SCOPE[entity].format(ids=','.join(str(int(i)) for i in scope_ids) or 'NULL')
+            rows = conn.execute(text(_SEARCH_SQL[entity].format(where=where)),
+                                {'query': query, 'limit': limit})
+            hits.extend({'entity': entity, **row._mapping} for row in rows)
+
+    # bm25 scores are lower-is-better and comparable enough across these short texts
+    hits.sort(key=lambda hit: hit['score'])
+    return hits[:limit]
@@ -0,0 +1,67 @@
+"""Shared SQLAlchemy engine registry.
+
+Every app and script resolves the demo database through this module, so the
+customer portal, the STP dashboard and the underwriting center always open
+the same file (regardless of the working directory) and reuse one pooled
+engine per process.
+"""
+import os
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# --- Database Location ---
+# One absolute path at the project root; PNC_DEMO_DB overrides it.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DB_PATH = os.path.abspath(os.environ.get('PNC_DEMO_DB', os.path.join(PROJECT_ROOT, 'pnc_demo.db')))
+
+# Applied to every new DBAPI connection. WAL lets the portal write while the
+# dashboards read; busy_timeout makes writers wait instead of failing.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,   # 256 MB
+    'cache_size': -65536,     # 64 MB (negative = KiB)
+    'busy_timeout': 5000,     # ms
+    'temp_store': 'MEMORY',
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def get_engine(db_path=None):
+    """Returns the process-wide engine for a database file, creating it once."""
+    db_path = os.path.abspath(db_path or DB_PATH)
+    with _engines_lock:
+        engine = _engines.get(db_path)
+        if engine is None:
+            engine = create_engine(
+                f'sqlite:///{db_path}',
+                pool_size=10,
+                max_overflow=20,
+            )
+            event.listen(engine, 'connect', _apply_pragmas)
+            _engines[db_path] = engine
+        return engine
+
+
+def dispose_engine(db_path=None):
+    """Closes all pooled connections for a database file (e.g. before replacing it)."""
+    db_path = os.path.abspath(db_path or DB_PATH)
+    with _engines_lock:
+        engine = _engines.get(db_path)
+    if engine is not None:
+        engine.dispose()
+
+
+engine = get_engine()
+Session = sessionmaker(bind=engine)
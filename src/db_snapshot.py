@@ -0,0 +1,95 @@
+"""Golden database snapshots for instant demo resets.
+
+Each market (german / us) gets a pre-seeded snapshot file next to the demo
+database, built once on first use. Resetting copies the snapshot into the
+live database in-process with the SQLite online backup API, instead of
+spawning a new interpreter to drop, recreate and re-seed every table.
+"""
+import os
+import sqlite3
+import tempfile
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_engine import DB_PATH, PROJECT_ROOT, SQLITE_PRAGMAS, dispose_engine
+
+MARKETS = ('german', 'us')
+
+# A snapshot older than any of these is rebuilt on next use
+SEED_SOURCES = ('seed_database.py', 'seed_data_german.py', 'seed_data_us.py')
+
+
+def snapshot_path(market):
+    """Location of the golden snapshot file for a market."""
+    return os.path.join(PROJECT_ROOT, f'pnc_snapshot_{market}.db')
+
+
+def build_snapshot(market, force=False):
+    """Seed a fresh database for `market` and store it as its golden snapshot."""
+    if market not in MARKETS:
+        raise ValueError(f"Unknown market '{market}' (expected one of {MARKETS})")
+    path = snapshot_path(market)
+    if not force and os.path.exists(path):
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        newest_source = max(os.path.getmtime(os.path.join(src_dir, name)) for name in SEED_SOURCES)
+        if os.path.getmtime(path) >= newest_source:
+            return path
+
+    from seed_database import upgrade_schema, set_schema_version
+    from seed_data_german import seed_german_data
+    from seed_data_us import seed_us_data
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f'pnc_snapshot_{market}_', suffix='.db', dir=PROJECT_ROOT)
+    os.close(fd)
+    engine = create_engine(f'sqlite:///{tmp_path}')
+    try:
+        upgrade_schema(engine)
+        session = sessionmaker(bind=engine)()
+        try:
+            if market == 'us':
+                seed_us_data(session)
+            else:
+                seed_german_data(session)
+        finally:
+            session.close()
+        # Restores copy the header too, so a reset database starts stamped
+        set_schema_version(engine)
+        with engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+    except Exception:
+        engine.dispose()
+        os.remove(tmp_path)
+        raise
+    engine.dispose()
+    # Atomic publish, so a half-built snapshot is never picked up
+    os.replace(tmp_path, path)
+    return path
+
+
+def restore_snapshot(market, db_path=None):
+    """Replace the contents of the live database with the market's snapshot.
+
+    Pooled connections are disposed first so no session keeps reading the old
+    pages; the copy itself runs through the backup API under SQLite's own
+    locking, so other processes (the second Streamlit app) see either the old
+    or the new database, never a mix.
+    """
+    source_path = build_snapshot(market)
+    db_path = os.path.abspath(db_path or DB_PATH)
+
+    dispose_engine(db_path)
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(db_path, timeout=SQLITE_PRAGMAS['busy_timeout'] / 1000)
+    try:
+        source.backup(target)
+        target.execute(f"PRAGMA journal_mode={SQLITE_PRAGMAS['journal_mode']}")
+    finally:
+        target.close()
+        source.close()
+    return db_path
+
+
+if __name__ == '__main__':
+    for market in MARKETS:
+        print(f"Built {build_snapshot(market, force=True)}")
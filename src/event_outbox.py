@@ -0,0 +1,60 @@
+"""Local event channel between the customer portal and the STP dashboard.
+
+A transactional outbox in the demo database: the portal inserts an event row
+in the same transaction that saves the ChatMessage, so an event is visible
+exactly when its message is. Subscribers remember the last event id they
+handled and ask only for newer ones, which is a single indexed range scan
+instead of re-reading chat_message. SQLite in WAL mode lets the dashboard
+read while the portal writes; no broker process is involved.
+"""
+import datetime
+
+from database_queries import get_session
+from seed_database import OutboxEvent
+
+QUOTE_CREATED = 'quote_created'
+CHAT_MESSAGE_SAVED = 'chat_message_saved'
+INBOX_RESET = 'inbox_reset'
+
+# Subscribers are expected to poll far more often than this
+EVENT_RETENTION = datetime.timedelta(days=1)
+
+
+def publish_event(session, user_id, event_type, chat_message_id=None):
+    """Adds an event to the caller's session; it is delivered when the caller commits.
+
+    Expired events are pruned in the same transaction.
+    """
+    cutoff = datetime.datetime.now() - EVENT_RETENTION
+    session.query(OutboxEvent).filter(OutboxEvent.created_at < cutoff).delete(synchronize_session=False)
+    session.add(OutboxEvent(user_id=user_id, event_type=event_type, chat_message_id=chat_message_id,
+                            created_at=datetime.datetime.now()))
+
+
+def latest_event_id(user_id):
+    """Id of the newest event for a user, or 0; a new subscriber starts from here."""
+    session = get_session()
+    try:
+        newest = session.query(OutboxEvent.id).filter(
+            OutboxEvent.user_id == user_id
+        ).order_by(OutboxEvent.id.desc()).limit(1).scalar()
+        return newest or 0
+    finally:
+        session.close()
+
+
+def fetch_events(user_id, after_id, limit=100):
+    """Events for a user with id > after_id, oldest first, as dicts."""
+    session = get_session()
+    try:
+        events = session.query(OutboxEvent).filter(
+            OutboxEvent.user_id == user_id,
+            OutboxEvent.id > after_id
+        ).order_by(OutboxEvent.id).limit(limit).all()
+        return [
+            {'id': e.id, 'event_type': e.event_type, 'chat_message_id': e.chat_message_id,
+             'created_at': e.created_at}
+            for e in events
+        ]
+    finally:
+        session.close()
@@ -1,50 +1,34 @@
 """Database initialization module - automatically sets up database if needed."""
-import os
-from seed_database import DB_FILE, Base, engine, Session, seed_data
+from seed_database import DB_FILE, SCHEMA_VERSION, Session, Party, get_schema_version, set_schema_version, upgrade_schema
 
 
-def init_database():
-    """Initialize database if it doesn't exist or is empty."""
-    
-    # Check if database file exists
-    db_exists = os.path.exists(DB_FILE)
-    
-    if not db_exists:
-        print(f"Database {DB_FILE} not found. Creating and seeding...")
-        # Create all tables
-        Base.metadata.create_all(engine)
-        
-        # Seed with demo data
-        session = Session()
-        try:
-            seed_data()
-            session.close()
-            print(f"✓ Database created and seeded successfully!")
-        except Exception as e:
-            session.close()
-            print(f"Error seeding database: {e}")
-            raise
-    else:
-        # Database exists, check if it has data
-        session = Session()
-        try:
-            from seed_database import Party
-            party_count = session.query(Party).count()
-            session.close()
-            
-            if party_count == 0:
-                print(f"Database {DB_FILE} exists but is empty. Seeding...")
-                session = Session()
-                seed_data()
-                session.close()
-                print(f"✓ Database seeded successfully!")
-            else:
-                print(f"✓ Database {DB_FILE} ready ({party_count} parties found)")
-        except Exception as e:
-            session.close()
-            print(f"Note: Database exists but may need initialization: {e}")
+def init_database(seed=None):
+    """Initialize the database if it is new, empty or from an older schema.
+
+    A file stamped with the current SCHEMA_VERSION is ready, so the usual
+    startup costs one PRAGMA read. Otherwise the schema is upgraded, an
+    empty database is seeded with `seed(session)` (the German SHUK demo data
+    by default) and the file is stamped. Returns True when work was done.
+    """
+    if get_schema_version() == SCHEMA_VERSION:
+        return False
+
+    upgrade_schema()
+    session = Session()
+    try:
+        if session.query(Party.id).first() is None:
+            print(f"Database {DB_FILE} is empty. Seeding...")
+            if seed is None:
+                from seed_data_german import seed_german_data as seed
+            seed(session)
+            print(f"✓ Database seeded successfully!")
+    finally:
+        session.close()
+
+    set_schema_version()
+    print(f"✓ Database {DB_FILE} ready (schema version {SCHEMA_VERSION})")
+    return True
 
 
 if __name__ == '__main__':
     init_database()
-
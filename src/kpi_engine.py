@@ -0,0 +1,141 @@
+"""KPI engine for the underwriting center dashboard.
+
+Reads the kpi_rollup table, which triggers keep current as submissions,
+quotes, policies, claims and financial transactions change (see
+create_kpi_rollup in seed_database). A dashboard rerun sums a few rows per
+quarter for the chosen market and broker, however large the portfolio is.
+
+KPIs:
+- turnaround: average days from a submission coming in to its first quote
+- hit ratio: bound submissions as a share of quoted ones
+- earned premium: premium earned pro rata over policy terms, year to date
+- loss ratio: incurred losses by date of loss over earned premium
+"""
+import datetime
+
+from sqlalchemy import func, select
+
+from database_queries import get_session
+from seed_database import KpiRollup
+
+_MEASURES = (
+    'submissions', 'quoted', 'bound', 'turnaround_count', 'turnaround_days',
+    'written_premium', 'earned_premium', 'claims', 'incurred_losses',
+)
+
+
+def quarter_label(day):
+    """The kpi_rollup quarter key of a date, e.g. "2025-Q4"."""
+    return f"{day.year}-Q{(day.month + 2) // 3}"
+
+
+def quarter_bounds(quarter):
+    """First day of `quarter` and of the quarter after it."""
+    year, number = int(quarter[:4]), int(quarter[-1])
+    start = datetime.date(year, 3 * number - 2, 1)
+    end = datetime.date(year + 1, 1, 1) if number == 4 else datetime.date(year, 3 * number + 1, 1)
+    return start, end
+
+
+def previous_quarter(quarter):
+    """The quarter key before `quarter`."""
+    year, number = int(quarter[:4]), int(quarter[-1])
+    return f"{year - 1}-Q4" if number == 1 else f"{year}-Q{number - 1}"
+
+
+def get_quarterly_totals(market=None, broker_party_id=None):
+    """Rollup totals per quarter, as {quarter: {measure: total}}, optionally for one market and broker.
+
+    broker_party_id=0 selects direct business (submissions without a broker).
+    """
+    columns = [func.sum(getattr(KpiRollup, measure)).label(measure) for measure in _MEASURES]
+    query = select(KpiRollup.quarter, *columns).group_by(KpiRollup.quarter)
+    if market is not None:
+        query = query.where(KpiRollup.market == market)
+    if broker_party_id is not None:
+        query = query.where(KpiRollup.broker_party_id == broker_party_id)
+    session = get_session()
+    try:
+        return {row.quarter: {measure: getattr(row, measure) or 0 for measure in _MEASURES}
+                for row in session.execute(query)}
+    finally:
+        session.close()
+
+
+def _ratio(numerator, denominator, scale=1):
+    return numerator * scale / denominator if denominator else None
+
+
+def _difference(current, previous):
+    # A real 0 (no binds, same-day quotes) has a change; None (nothing to divide by) has not
+    return None if current is None or previous is None else current - previous
+
+
+def get_dashboard_kpis(market=None, broker_party_id=None, as_of=None):
+    """Dashboard KPI cards and quarterly chart series.
+
+    The reporting quarter is the latest one up to `as_of` (default today)
+    with submissions, so a demo database from an earlier year still fills
+    the dashboard. Turnaround and hit ratio are for that quarter, with the
+    change from the quarter before; earned premium and loss ratio are year
+    to date. Premium for the quarter containing `as_of` counts only the
+    elapsed part of it, assuming it earns evenly across the quarter.
+
+    The chart series cover Q1-Q4 of the reporting year: hit ratio, earned
+    premium to date and loss ratio per quarter. Ratios are percentages;
+    values are None where there is nothing to divide by or the quarter is
+    still ahead. Earned premium is None, not 0, when no policy has earned
+    anything this year or last (the demo seeds hold submissions only), and
+    changes are None when either quarter has nothing to divide by.
+    """
+    as_of = as_of or datetime.date.today()
+    totals = get_quarterly_totals(market, broker_party_id)
+    current = quarter_label(as_of)
+    active = [quarter for quarter, row in totals.items() if row['submissions'] and quarter <= current]
+    reporting = max(active, default=current)
+    empty = dict.fromkeys(_MEASURES, 0)
+
+    def earned(quarter):
+        premium = totals.get(quarter, empty)['earned_premium']
+        if quarter == current:
+            start, end = quarter_bounds(quarter)
+            premium *= (as_of - start).days / (end - start).days
+        return premium if quarter <= current else 0
+
+    def year_to_date(year, last):
+        quarters = [f"{year}-Q{number}" for number in range(1, last + 1)]
+        return (sum(earned(quarter) for quarter in quarters),
+                sum(totals.get(quarter, empty)['incurred_losses'] for quarter in quarters))
+
+    def turnaround(quarter):
+        row = totals.get(quarter, empty)
+        return _ratio(row['turnaround_days'], row['turnaround_count'])
+
+    def hit_ratio(quarter):
+        row = totals.get(quarter, empty)
+        return _ratio(row['bound'], row['quoted'], 100)
+
+    year, number = int(reporting[:4]), int(reporting[-1])
+    earned_ytd, incurred_ytd = year_to_date(year, number)
+    earned_prior_ytd, _ = year_to_date(year - 1, number)
+    quarters = [f"{year}-Q{n}" for n in range(1, 5)]
+    has_premium = bool(earned_ytd or earned_prior_ytd)
+    return {
+        'quarter': reporting,
+        'previous_quarter': previous_quarter(reporting),
+        'turnaround_days': turnaround(reporting),
+        'turnaround_change': _difference(turnaround(reporting), turnaround(previous_quarter(reporting))),
+        'hit_ratio': hit_ratio(reporting),
+        'hit_ratio_change': _difference(hit_ratio(reporting), hit_ratio(previous_quarter(reporting))),
+        'earned_premium': earned_ytd if has_premium else None,
+        'earned_premium_growth': _ratio(earned_ytd - earned_prior_ytd, earned_prior_ytd, 100),
+        'loss_ratio': _ratio(incurred_ytd, earned_ytd, 100),
+        'chart_quarters': [quarter[-2:] for quarter in quarters],
+        'hit_ratio_by_quarter': [hit_ratio(quarter) for quarter in quarters],
+        'earned_premium_by_quarter': [
+            year_to_date(year, n)[0] if has_premium and quarters[n - 1] <= current else None for n in range(1, 5)
+        ],
+        'loss_ratio_by_quarter': [
+            _ratio(totals.get(quarter, empty)['incurred_losses'], earned(quarter), 100) for quarter in quarters
+        ],
+    }
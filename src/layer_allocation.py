@@ -0,0 +1,179 @@
+"""Vectorized loss-to-layer allocation for reinsurance towers.
+
+A tower is held as flat NumPy arrays: one entry per layer (attachment,
+limit) and one per participant (the position of its layer and its share).
+For a vector of ground-up losses, every layer's recovery is
+clip(loss - attachment, 0, limit) as one (claims x layers) broadcast, and
+every participant's recovery is a column gather of its layer times its
+share. Thousands of claims against a full tower take milliseconds, and the
+result feeds generate_cash_calls(), which writes the non-zero participant
+amounts as CashCall rows in one executemany.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, select, func
+
+from database_queries import get_session
+from db_engine import engine
+from seed_database import (
+    ReinsuranceTreaty, ReinsuranceLayer, LayerParticipant, CashCall, ClaimLedger
+)
+
+CASH_CALL_DUE_DAYS = 30
+# Amounts below this (in the call currency) are rounding noise, not a cash call
+MIN_CALL_AMOUNT = 0.01
+_IN_CHUNK = 5000
+
+
+def make_tower(attachment, limit, participant_layer, share, layer_id=None, participant_id=None,
+               reinsurer_party_id=None):
+    """Builds a tower from plain sequences; shares are fractions (0.2 for 20%)."""
+    attachment = np.asarray(attachment, dtype=float)
+    participant_layer = np.asarray(participant_layer, dtype=np.intp)
+    return {
+        'layer_id': np.asarray(layer_id if layer_id is not None else np.arange(len(attachment)), dtype=np.int64),
+        'attachment': attachment,
+        'limit': np.asarray(limit, dtype=float),
+        'participant_id': np.asarray(
+            participant_id if participant_id is not None else np.arange(len(participant_layer)), dtype=np.int64),
+        'participant_layer': participant_layer,
+        'share': np.asarray(share, dtype=float),
+        'reinsurer_party_id': np.asarray(
+            reinsurer_party_id if reinsurer_party_id is not None else np.zeros(len(participant_layer)), dtype=np.int64),
+    }
+
+
+def load_tower(policy_id):
+    """Loads the first treaty of a policy as tower arrays (one query), or None without a treaty.
+
+    Layers are ordered by layer_order; a layer without participants keeps
+    its row in the layer arrays and simply has nobody to recover from.
+    """
+    session = get_session()
+    try:
+        treaty_id = session.query(ReinsuranceTreaty.id).filter(
+            ReinsuranceTreaty.policy_id == policy_id
+        ).order_by(ReinsuranceTreaty.id).limit(1).scalar()
+        if treaty_id is None:
+            return None
+        rows = pd.read_sql(
+            select(
+                ReinsuranceLayer.id.label('layer_id'), ReinsuranceLayer.attachment_point,
+                ReinsuranceLayer.layer_limit, LayerParticipant.id.label('participant_id'),
+                LayerParticipant.reinsurer_party_id, LayerParticipant.share_percentage
+            ).outerjoin(
+                LayerParticipant, LayerParticipant.layer_id == ReinsuranceLayer.id
+            ).where(
+                ReinsuranceLayer.treaty_id == treaty_id
+            ).order_by(ReinsuranceLayer.layer_order, LayerParticipant.id),
+            session.connection()
+        )
+    finally:
+        session.close()
+
+    layers = rows.drop_duplicates('layer_id')
+    participants = rows.dropna(subset=['participant_id'])
+    return make_tower(
+        attachment=layers['attachment_point'],
+        limit=layers['layer_limit'],
+        layer_id=layers['layer_id'],
+        participant_layer=pd.Index(layers['layer_id']).get_indexer(participants['layer_id']),
+        share=participants['share_percentage'] / 100.0,
+        participant_id=participants['participant_id'],
+        reinsurer_party_id=participants['reinsurer_party_id'],
+    )
+
+
+def allocate_losses(losses, tower):
+    """Allocates ground-up losses through a tower in one vectorized pass.
+
+    Returns a dict of arrays: 'layer' (claims x layers) and 'participant'
+    (claims x participants) recoveries, 'ceded' (sum over participants) and
+    'retained' (everything the participants do not pay: below and between
+    layers, above the top and any unplaced share).
+    """
+    losses = np.asarray(losses, dtype=float)
+    layer = np.clip(losses[:, None] - tower['attachment'], 0.0, tower['limit'])
+    participant = layer[:, tower['participant_layer']] * tower['share']
+    ceded = participant.sum(axis=1)
+    return {'layer': layer, 'participant': participant, 'ceded': ceded, 'retained': losses - ceded}
+
+
+def incurred_losses(claim_ids):
+    """Incurred amount per claim from the claim ledger, aligned with claim_ids (0 without activity)."""
+    claim_ids = list(claim_ids)
+    incurred = np.zeros(len(claim_ids))
+    position = pd.Index(claim_ids)
+    session = get_session()
+    try:
+        for start in range(0, len(claim_ids), _IN_CHUNK):
+            rows = session.execute(
+                select(ClaimLedger.claim_id, ClaimLedger.incurred).where(
+                    ClaimLedger.claim_id.in_(claim_ids[start:start + _IN_CHUNK]))
+            ).all()
+            if rows:
+                ids, amounts = zip(*rows)
+                incurred[position.get_indexer(ids)] = amounts
+    finally:
+        session.close()
+    return incurred
+
+
+def called_amounts(claim_ids, tower):
+    """Amounts already called per (claim, participant), as a claims x participants array."""
+    claim_ids = list(claim_ids)
+    called = np.zeros((len(claim_ids), len(tower['participant_id'])))
+    claim_position = pd.Index(claim_ids)
+    participant_position = pd.Index(tower['participant_id'])
+    session = get_session()
+    try:
+        for start in range(0, len(claim_ids), _IN_CHUNK):
+            rows = pd.read_sql(
+                select(
+                    CashCall.claim_id, CashCall.layer_participant_id,
+                    func.sum(CashCall.call_amount).label('called')
+                ).where(
+                    CashCall.claim_id.in_(claim_ids[start:start + _IN_CHUNK]),
+                    CashCall.layer_participant_id.in_(tower['participant_id'].tolist())
+                ).group_by(CashCall.claim_id, CashCall.layer_participant_id),
+                session.connection()
+            )
+            called[claim_position.get_indexer(rows['claim_id']),
+                   participant_position.get_indexer(rows['layer_participant_id'])] = rows['called']
+    finally:
+        session.close()
+    return called
+
+
+def generate_cash_calls(claim_ids, losses, tower, currency='CHF', due_date=None, status='ISSUED',
+                        incremental=True):
+    """Allocates the losses and inserts the resulting CashCall rows in bulk.
+
+    With incremental=True only the amount above what each participant has
+    already been called for is issued, so re-running after a reserve
+    increase calls the difference instead of the full recovery again.
+    The claim ledger triggers pick up the new rows. Returns the number of
+    cash calls inserted.
+    """
+    claim_ids = np.asarray(claim_ids, dtype=np.int64)
+    amounts = allocate_losses(losses, tower)['participant']
+    if incremental:
+        amounts = amounts - called_amounts(claim_ids.tolist(), tower)
+    rows, columns = np.nonzero(amounts >= MIN_CALL_AMOUNT)
+    if not len(rows):
+        return 0
+
+    due_date = due_date or datetime.date.today() + datetime.timedelta(days=CASH_CALL_DUE_DAYS)
+    calls = pd.DataFrame({
+        'claim_id': claim_ids[rows],
+        'layer_participant_id': tower['participant_id'][columns],
+        'call_amount': amounts[rows, columns].round(2),
+    })
+    calls['currency'] = currency
+    calls['status'] = status
+    calls['due_date'] = due_date
+    with engine.begin() as conn:
+        conn.execute(insert(CashCall), calls.to_dict('records'))
+    return len(calls)
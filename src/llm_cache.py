@@ -0,0 +1,190 @@
+"""Two-tier response cache for OpenAI chat completions.
+
+Tier one is an in-process LRU shared by every Streamlit session of the app;
+tier two is the llm_response_cache table in the demo database, so answers
+survive restarts. Entries are keyed by a hash of the normalized messages,
+the model and the temperature bucket. Identical requests that are already
+in flight are coalesced: later callers wait for the first upstream call
+instead of issuing their own.
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from db_engine import engine, Session
+from seed_database import LLMResponseCache
+
+LRU_SIZE = 512
+# Temperatures within the same bucket (0.7 and 0.8 both map to 3) share entries
+TEMPERATURE_BUCKET = 0.25
+
+_lock = threading.Lock()
+_lru = OrderedDict()
+_in_flight = {}
+_stats = {'lru_hits': 0, 'db_hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0}
+_table_ready = False
+
+
+def normalize_prompt(text):
+    """Collapse whitespace and case so trivially different prompts share a key."""
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def cache_key(model, messages, temperature):
+    """Stable hash for a chat completion request."""
+    payload = json.dumps([
+        model,
+        round(temperature / TEMPERATURE_BUCKET),
+        [[m['role'], normalize_prompt(m['content'])] for m in messages],
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _count(stat):
+    with _lock:
+        _stats[stat] += 1
+
+
+def _lru_put(key, text):
+    with _lock:
+        _lru[key] = text
+        _lru.move_to_end(key)
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def _ensure_table():
+    global _table_ready
+    if not _table_ready:
+        # Older database files predate the cache table
+        LLMResponseCache.__table__.create(engine, checkfirst=True)
+        _table_ready = True
+
+
+def _db_get(key):
+    _ensure_table()
+    session = Session()
+    try:
+        row = session.get(LLMResponseCache, key)
+        if row is None:
+            return None
+        row.hit_count += 1
+        session.commit()
+        return row.response
+    finally:
+        session.close()
+
+
+def _db_put(key, model, text):
+    _ensure_table()
+    session = Session()
+    try:
+        session.merge(LLMResponseCache(cache_key=key, model=model, response=text, hit_count=0))
+        session.commit()
+    finally:
+        session.close()
+
+
+def cached_completion(client, model, messages, temperature, max_tokens):
+    """Returns the completion text for a chat request, calling OpenAI only on a cache miss.
+
+    Upstream errors propagate to every coalesced caller and are not cached, so
+    callers keep their existing fallbacks.
+    """
+    key = cache_key(model, messages, temperature)
+
+    with _lock:
+        if key in _lru:
+            _lru.move_to_end(key)
+            _stats['lru_hits'] += 1
+            return _lru[key]
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight[key] = Future()
+        else:
+            _stats['coalesced'] += 1
+
+    if not leader:
+        return future.result()
+
+    try:
+        text = _db_get(key)
+        if text is not None:
+            _count('db_hits')
+        else:
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            text = response.choices[0].message.content
+            _count('misses')
+            _db_put(key, model, text)
+        _lru_put(key, text)
+        future.set_result(text)
+        return text
+    except Exception as e:
+        _count('errors')
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _in_flight.pop(key, None)
+
+
+def get_cached(model, messages, temperature):
+    """Returns the cached text for a request, or None, without calling OpenAI."""
+    key = cache_key(model, messages, temperature)
+    with _lock:
+        if key in _lru:
+            _lru.move_to_end(key)
+            _stats['lru_hits'] += 1
+            return _lru[key]
+    text = _db_get(key)
+    if text is not None:
+        _count('db_hits')
+        _lru_put(key, text)
+    return text
+
+
+def put_cached(model, messages, temperature, text):
+    """Stores a completion obtained outside cached_completion (e.g. a finished stream)."""
+    key = cache_key(model, messages, temperature)
+    _count('misses')
+    _db_put(key, model, text)
+    _lru_put(key, text)
+
+
+def get_cache_stats():
+    """Hit/miss counters since process start.
+
+    'hits' counts every request answered without its own upstream call
+    (either tier, or coalesced onto one in flight); 'hit_ratio' is its share
+    of all lookups.
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats['lru_size'] = len(_lru)
+    stats['hits'] = stats['lru_hits'] + stats['db_hits'] + stats['coalesced']
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def clear_cache(persistent=False):
+    """Empty the in-process LRU (and the database table when persistent=True)."""
+    with _lock:
+        _lru.clear()
+    if persistent:
+        _ensure_table()
+        session = Session()
+        try:
+            session.query(LLMResponseCache).delete()
+            session.commit()
+        finally:
+            session.close()
@@ -0,0 +1,350 @@
+"""
+Synthetic Portfolio Generator
+==============================
+Deterministic, seedable load-test data for either market (german / us).
+
+Builds parties, submissions, quotes, policies, coverages, party roles, claims,
+financial transactions and facultative reinsurance towers at any volume
+(10k - 10M policies) using SQLAlchemy Core executemany inserts in large
+transactions. Work is split into fixed-size chunks, each seeded from
+(seed, chunk index) and given a fixed ID range, so the output is identical
+whether it is generated in one process or fanned out to worker processes
+that write separate shard files which are then merged.
+
+Usage:
+    python seed_data_synthetic.py --market us --policies 100000 --workers 4 --db ../pnc_synthetic.db
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import create_engine, func, select
+from seed_database import (
+    Base, Party, PartyRole, Submission, Quote, Policy, Coverage, Claim,
+    FinancialTransaction, ReinsuranceTreaty, ReinsuranceLayer, LayerParticipant
+)
+
+CHUNK_SIZE = 10000  # policies per chunk (also the unit of work per worker task)
+
+# Per-policy upper bounds; every child table gets a fixed ID stride per policy
+MAX_QUOTES = 3
+MAX_COVERAGES = 2
+MAX_TRANSACTIONS = 4
+MAX_LAYERS = 4
+MAX_PARTICIPANTS = 5
+ROLES_PER_POLICY = 2
+
+CLAIM_RATE = 0.25
+TOWER_RATE = 0.05
+
+MARKETS = {
+    'german': {
+        'country': 'Germany',
+        'currency': 'EUR',
+        'suffix': '-DE',
+        'cities': ['Berlin', 'Hamburg', 'München', 'Köln', 'Frankfurt', 'Stuttgart', 'Düsseldorf', 'Leipzig'],
+        'legal_forms': ['GmbH', 'AG', 'KG', 'GmbH & Co. KG'],
+        'name_stems': ['Möbel', 'Maschinenbau', 'Logistik', 'Gastro', 'Präzision', 'Bau', 'Handel', 'Technik'],
+        'insurers': ['Dräum Versicherung AG', 'Allianz Versicherungs-AG', 'HDI Global SE', 'R+V Allgemeine'],
+        'brokers': ['Marsh GmbH', 'Willis Towers Watson GmbH', 'Aon Deutschland GmbH', 'Funk Gruppe GmbH'],
+        'coverages': ['Betriebshaftpflicht', 'Sachversicherung', 'Betriebsunterbrechung'],
+    },
+    'us': {
+        'country': 'USA',
+        'currency': 'USD',
+        'suffix': '',
+        'cities': ['Atlanta', 'Chicago', 'Dallas', 'Denver', 'Los Angeles', 'Miami', 'New York', 'Seattle'],
+        'legal_forms': ['Inc.', 'LLC', 'Corp.', 'Holdings'],
+        'name_stems': ['Floor', 'Retail', 'Restaurant', 'Construction', 'Manufacturing', 'Nursery', 'Logistics', 'Health'],
+        'insurers': ['Hartwell Insurance Company', 'Travelers', 'Liberty Mutual', 'The Hartford'],
+        'brokers': ['Marsh McLennan', 'Willis Towers Watson', 'Alliant Insurance Services', 'Lockton'],
+        'coverages': ["Workers' Compensation", "Employer's Liability", 'General Liability'],
+    },
+}
+REINSURERS = ['Swiss Re', 'Munich Re', 'Hannover Re', 'SCOR', 'Gen Re', 'Partner Re', 'Everest Re', 'Lloyd\'s Syndicate 2001']
+
+# Insert order respects foreign keys
+TABLES = [
+    Party.__table__, Submission.__table__, Quote.__table__, Policy.__table__,
+    PartyRole.__table__, Coverage.__table__, Claim.__table__, FinancialTransaction.__table__,
+    ReinsuranceTreaty.__table__, ReinsuranceLayer.__table__, LayerParticipant.__table__,
+]
+
+
+def _reference_parties(market):
+    """Shared insurers, brokers and reinsurers, in a fixed order."""
+    cfg = MARKETS[market]
+    rows = []
+    for kind, names in (('insurer', cfg['insurers']), ('broker', cfg['brokers']), ('reinsurer', REINSURERS)):
+        for name in names:
+            rows.append({'kind': kind, 'party_type': 'ORGANIZATION', 'name': name, 'country': cfg['country']})
+    return rows
+
+
+def id_offsets(conn):
+    """Current max ID per table, so generated rows can be appended to existing data."""
+    return {t.name: conn.execute(select(func.coalesce(func.max(t.c.id), 0))).scalar() for t in TABLES}
+
+
+def generate_chunk(market, seed, chunk_index, first_policy, policies, offsets, reference_ids):
+    """Generate rows for policies [first_policy, first_policy + policies).
+
+    Returns {table_name: [row dicts]}. IDs are derived from the policy number
+    and the table offsets, so chunks never collide and can be produced in any
+    order or process.
+    """
+    cfg = MARKETS[market]
+    rng = random.Random(f"{seed}-{market}-{chunk_index}")
+    insurer_ids, broker_ids, reinsurer_ids = reference_ids
+    base_date = datetime.date(2024, 1, 1)
+    rows = {t.name: [] for t in TABLES}
+
+    for n in range(first_policy, first_policy + policies):
+        party_id = offsets['party'] + len(insurer_ids) + len(broker_ids) + len(reinsurer_ids) + n + 1
+        submission_id = offsets['submission'] + n + 1
+        policy_id = offsets['policy'] + n + 1
+        insurer_id = rng.choice(insurer_ids)
+        effective = base_date + datetime.timedelta(days=rng.randrange(730))
+        created = datetime.datetime.combine(effective, datetime.time(9)) - datetime.timedelta(days=rng.randint(14, 90))
+
+        rows['party'].append({
+            'id': party_id,
+            'party_type': 'ORGANIZATION',
+            'name': f"{rng.choice(cfg['name_stems'])} {n + 1} {rng.choice(cfg['legal_forms'])}",
+            'city': rng.choice(cfg['cities']),
+            'country': cfg['country'],
+            'created_at': created,
+        })
+
+        rows['submission'].append({
+            'id': submission_id,
+            'submission_number': f"SUB-SYN-{n + 1:08d}{cfg['suffix']}",
+            'insured_party_id': party_id,
+            'broker_party_id': rng.choice(broker_ids),
+            'status': 'BOUND',
+            'effective_date': effective,
+            'completeness': 100,
+            'priority_score': round(rng.uniform(1.0, 5.0), 1),
+            'risk_appetite': rng.choice(['High', 'Medium', 'Low']),
+            'broker_tier': rng.choice(['Tier 1', 'Tier 2', 'Tier 3']),
+            'accepted': True,
+            'created_at': created,
+        })
+
+        premium = round(rng.lognormvariate(10.5, 0.8), 2)
+        quote_base = offsets['quote'] + n * MAX_QUOTES
+        for k in range(rng.randint(1, MAX_QUOTES)):
+            rows['quote'].append({
+                'id': quote_base + k + 1,
+                'submission_id': submission_id,
+                'insurer_party_id': insurer_id if k == 0 else rng.choice(insurer_ids),
+                'total_premium': premium if k == 0 else round(premium * rng.uniform(0.9, 1.2), 2),
+                'currency': cfg['currency'],
+                'status': 'ACCEPTED' if k == 0 else 'DECLINED',
+                'created_at': created + datetime.timedelta(days=rng.randint(1, 10)),
+            })
+
+        rows['policy'].append({
+            'id': policy_id,
+            'policy_number': f"POL-SYN-{n + 1:08d}{cfg['suffix']}",
+            'quote_id': quote_base + 1,
+            'effective_date': effective,
+            'expiration_date': effective + datetime.timedelta(days=365),
+            'status': 'ACTIVE',
+            'created_at': datetime.datetime.combine(effective, datetime.time(9)),
+        })
+
+        role_base = offsets['party_role'] + n * ROLES_PER_POLICY
+        for k, (role_party, role_name) in enumerate(((party_id, 'Insured'), (insurer_id, 'Insurer'))):
+            rows['party_role'].append({
+                'id': role_base + k + 1,
+                'party_id': role_party,
+                'role_name': role_name,
+                'context_table': 'policy',
+                'context_id': policy_id,
+            })
+
+        limit = round(premium * rng.uniform(50, 200), -3)
+        coverage_base = offsets['coverage'] + n * MAX_COVERAGES
+        for k in range(rng.randint(1, MAX_COVERAGES)):
+            rows['coverage'].append({
+                'id': coverage_base + k + 1,
+                'policy_id': policy_id,
+                'coverage_type': cfg['coverages'][k % len(cfg['coverages'])],
+                'limit_amount': limit,
+                'deductible_amount': rng.choice([1000.0, 2500.0, 5000.0, 10000.0]),
+            })
+
+        if rng.random() < CLAIM_RATE:
+            claim_id = offsets['claim'] + n + 1
+            loss_date = effective + datetime.timedelta(days=rng.randrange(365))
+            rows['claim'].append({
+                'id': claim_id,
+                'policy_id': policy_id,
+                'claim_number': f"CLM-SYN-{n + 1:08d}{cfg['suffix']}",
+                'date_of_loss': loss_date,
+                'reported_date': loss_date + datetime.timedelta(days=rng.randint(0, 30)),
+                'status': rng.choice(['OPEN', 'OPEN', 'CLOSED']),
+                'reported_by_party_id': party_id,
+                'description': 'Synthetic load-test claim',
+            })
+            severity = rng.lognormvariate(9.5, 1.2)
+            transaction_base = offsets['financial_transaction'] + n * MAX_TRANSACTIONS
+            kinds = ['RESERVE', 'PAYMENT_EXPENSE', 'PAYMENT_INDEMNITY', 'PAYMENT_INDEMNITY']
+            for k in range(rng.randint(1, MAX_TRANSACTIONS)):
+                rows['financial_transaction'].append({
+                    'id': transaction_base + k + 1,
+                    'claim_id': claim_id,
+                    'transaction_type': kinds[k],
+                    'amount': round(severity * (1.0 if k == 0 else rng.uniform(0.05, 0.5)), 2),
+                    'currency': cfg['currency'],
+                    'transaction_date': loss_date + datetime.timedelta(days=7 * (k + 1)),
+                })
+
+        if rng.random() < TOWER_RATE:
+            treaty_id = offsets['reinsurance_treaty'] + n + 1
+            rows['reinsurance_treaty'].append({
+                'id': treaty_id,
+                'policy_id': policy_id,
+                'treaty_type': 'FACULTATIVE',
+                'description': f"Synthetic tower for POL-SYN-{n + 1:08d}",
+            })
+            attachment = limit * 0.1
+            for k in range(rng.randint(2, MAX_LAYERS)):
+                layer_id = offsets['reinsurance_layer'] + n * MAX_LAYERS + k + 1
+                layer_limit = round(limit * rng.uniform(0.2, 0.5), -3)
+                rows['reinsurance_layer'].append({
+                    'id': layer_id,
+                    'treaty_id': treaty_id,
+                    'layer_order': k + 1,
+                    'attachment_point': attachment,
+                    'layer_limit': layer_limit,
+                    'premium': round(premium * 0.1 / (k + 1), 2),
+                })
+                attachment += layer_limit
+                participants = rng.sample(reinsurer_ids, rng.randint(2, MAX_PARTICIPANTS))
+                for j, reinsurer_id in enumerate(participants):
+                    rows['layer_participant'].append({
+                        'id': offsets['layer_participant'] + (n * MAX_LAYERS + k) * MAX_PARTICIPANTS + j + 1,
+                        'layer_id': layer_id,
+                        'reinsurer_party_id': reinsurer_id,
+                        'share_percentage': round(100.0 / len(participants), 4),
+                        'status': 'BOUND',
+                    })
+    return rows
+
+
+def _insert_rows(conn, rows):
+    for table in TABLES:
+        if rows[table.name]:
+            conn.execute(table.insert(), rows[table.name])
+
+
+def _write_shard(args):
+    """Worker: generate a chunk into its own shard database file."""
+    shard_path, market, seed, chunk_index, first_policy, policies, offsets, reference_ids = args
+    engine = create_engine(f'sqlite:///{shard_path}')
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=OFF")
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        # Shards are scratch files: tables only, no indexes or constraints to maintain
+        for table in TABLES:
+            conn.exec_driver_sql(f"CREATE TABLE {table.name} ({', '.join(c.name for c in table.columns)})")
+        _insert_rows(conn, generate_chunk(market, seed, chunk_index, first_policy, policies, offsets, reference_ids))
+    engine.dispose()
+    return shard_path
+
+
+def _merge_shard(db_path, shard_path):
+    """Copy every table of a shard into the target database in one transaction."""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("ATTACH DATABASE ? AS shard", (shard_path,))
+        with conn:
+            for table in TABLES:
+                columns = ', '.join(column.name for column in table.columns)
+                conn.execute(f"INSERT INTO main.{table.name} ({columns}) SELECT {columns} FROM shard.{table.name}")
+        conn.execute("DETACH DATABASE shard")
+    finally:
+        conn.close()
+    os.remove(shard_path)
+
+
+def generate_portfolio(db_path, market='german', policies=10000, seed=42, workers=1, chunk_size=CHUNK_SIZE):
+    """Append a synthetic portfolio of `policies` policies to the database at `db_path`.
+
+    With workers > 1, chunks are generated in a process pool into shard files
+    next to the target and merged as they complete. The resulting rows are the
+    same for any worker count.
+    """
+    if market not in MARKETS:
+        raise ValueError(f"Unknown market '{market}' (expected one of {sorted(MARKETS)})")
+
+    db_path = os.path.abspath(db_path)
+    engine = create_engine(f'sqlite:///{db_path}')
+    Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        offsets = id_offsets(conn)
+        reference = _reference_parties(market)
+        ids = {'insurer': [], 'broker': [], 'reinsurer': []}
+        for i, row in enumerate(reference):
+            ids[row['kind']].append(offsets['party'] + i + 1)
+        conn.execute(Party.__table__.insert(), [
+            {'id': offsets['party'] + i + 1, 'party_type': r['party_type'], 'name': r['name'], 'country': r['country'],
+             'created_at': datetime.datetime(2024, 1, 1)}
+            for i, r in enumerate(reference)
+        ])
+    # Reference parties were inserted at the head of the party ID range
+    reference_ids = (ids['insurer'], ids['broker'], ids['reinsurer'])
+
+    chunks = [
+        (chunk_index, first, min(chunk_size, policies - first))
+        for chunk_index, first in enumerate(range(0, policies, chunk_size))
+    ]
+
+    if workers <= 1:
+        for chunk_index, first, count in chunks:
+            rows = generate_chunk(market, seed, chunk_index, first, count, offsets, reference_ids)
+            with engine.begin() as conn:
+                _insert_rows(conn, rows)
+        engine.dispose()
+        return
+
+    engine.dispose()
+    shard_dir = tempfile.mkdtemp(prefix='pnc_shards_', dir=os.path.dirname(db_path))
+    tasks = [
+        (os.path.join(shard_dir, f'shard_{chunk_index:05d}.db'), market, seed, chunk_index, first, count,
+         offsets, reference_ids)
+        for chunk_index, first, count in chunks
+    ]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for shard_path in pool.map(_write_shard, tasks):
+                _merge_shard(db_path, shard_path)
+    finally:
+        for leftover in os.listdir(shard_dir):
+            os.remove(os.path.join(shard_dir, leftover))
+        os.rmdir(shard_dir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a synthetic insurance portfolio for load testing.")
+    parser.add_argument('--market', choices=sorted(MARKETS), default='german')
+    parser.add_argument('--policies', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--db', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pnc_synthetic.db'))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    print(f"Generating {args.policies:,} synthetic {args.market} policies into {os.path.abspath(args.db)}...")
+    generate_portfolio(args.db, args.market, args.policies, args.seed, args.workers)
+    print(f"[OK] Done in {time.perf_counter() - start:.1f}s")
@@ -1,15 +1,14 @@
 import os
 import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, Boolean, ForeignKey, TIMESTAMP, TEXT, CheckConstraint
-from sqlalchemy.orm import sessionmaker, relationship, declarative_base
+from sqlalchemy import Column, Integer, String, Float, Date, Boolean, ForeignKey, TIMESTAMP, TEXT, CheckConstraint, Index, inspect, text
+from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
+from db_engine import DB_PATH, engine, Session
 
 # --- Database Setup ---
-DB_FILE = "pnc_demo.db"
+DB_FILE = DB_PATH
 
 # Don't delete database on import - only when running as script
-engine = create_engine(f'sqlite:///{DB_FILE}')
-Session = sessionmaker(bind=engine)
 Base = declarative_base()
 
 # --- SQLAlchemy ORM Model Definitions ---
@@ -35,6 +34,10 @@ class PartyRole(Base):
     context_table = Column(String, nullable=False)
     context_id = Column(Integer, nullable=False)
     party = relationship("Party", back_populates="roles")
+    __table_args__ = (
+        Index('ix_party_role_context', 'context_table', 'context_id', 'role_name'),
+        Index('ix_party_role_party_role', 'party_id', 'role_name'),
+    )
 
 class Submission(Base):
     __tablename__ = 'submission'
@@ -58,7 +61,7 @@ class Submission(Base):
 class Quote(Base):
     __tablename__ = 'quote'
     id = Column(Integer, primary_key=True)
-    submission_id = Column(Integer, ForeignKey('submission.id', ondelete='CASCADE'), nullable=False)
+    submission_id = Column(Integer, ForeignKey('submission.id', ondelete='CASCADE'), nullable=False, index=True)
     insurer_party_id = Column(Integer, ForeignKey('party.id'), nullable=False)
     total_premium = Column(Float, nullable=False)
     currency = Column(String, default='CHF', nullable=False)
@@ -71,7 +74,7 @@ class Policy(Base):
     __tablename__ = 'policy'
     id = Column(Integer, primary_key=True)
     policy_number = Column(String, unique=True, nullable=False)
-    quote_id = Column(Integer, ForeignKey('quote.id'))
+    quote_id = Column(Integer, ForeignKey('quote.id'), index=True)
     effective_date = Column(Date, nullable=False)
     expiration_date = Column(Date, nullable=False)
     status = Column(String, default='ACTIVE', nullable=False)
@@ -86,7 +89,7 @@ class Policy(Base):
 class Coverage(Base):
     __tablename__ = 'coverage'
     id = Column(Integer, primary_key=True)
-    policy_id = Column(Integer, ForeignKey('policy.id', ondelete='CASCADE'), nullable=False)
+    policy_id = Column(Integer, ForeignKey('policy.id', ondelete='CASCADE'), nullable=False, index=True)
     coverage_type = Column(String, nullable=False)
     limit_amount = Column(Float, nullable=False)
     deductible_amount = Column(Float, nullable=False)
@@ -95,7 +98,7 @@ class Coverage(Base):
 class InsurableAsset(Base):
     __tablename__ = 'insurable_asset'
     id = Column(Integer, primary_key=True)
-    policy_id = Column(Integer, ForeignKey('policy.id', ondelete='CASCADE'), nullable=False)
+    policy_id = Column(Integer, ForeignKey('policy.id', ondelete='CASCADE'), nullable=False, index=True)
     asset_type = Column(String, nullable=False)
     description = Column(String)
     policy = relationship("Policy", back_populates="assets")
@@ -105,7 +108,7 @@ class InsurableAsset(Base):
 class AssetLocation(Base):
     __tablename__ = 'asset_location'
     id = Column(Integer, primary_key=True)
-    asset_id = Column(Integer, ForeignKey('insurable_asset.id', ondelete='CASCADE'), nullable=False)
+    asset_id = Column(Integer, ForeignKey('insurable_asset.id', ondelete='CASCADE'), nullable=False, index=True)
     address = Column(String, nullable=False)
     city = Column(String, nullable=False)
     country = Column(String, nullable=False)
@@ -114,15 +117,30 @@ class AssetLocation(Base):
 class AssetDetail(Base):
     __tablename__ = 'asset_detail'
     id = Column(Integer, primary_key=True)
-    asset_id = Column(Integer, ForeignKey('insurable_asset.id', ondelete='CASCADE'), nullable=False)
+    asset_id = Column(Integer, ForeignKey('insurable_asset.id', ondelete='CASCADE'), nullable=False, index=True)
     detail_key = Column(String, nullable=False)
     detail_value = Column(String, nullable=False)
     asset = relationship("InsurableAsset", back_populates="details")
 
+class AssetAttribute(Base):
+    """Typed, one-row-per-asset pivot of asset_detail, maintained by triggers (see create_asset_attributes)."""
+    __tablename__ = 'asset_attribute'
+    asset_id = Column(Integer, ForeignKey('insurable_asset.id', ondelete='CASCADE'), primary_key=True)
+    policy_id = Column(Integer, nullable=False)
+    replacement_value = Column(Float)
+    contents_value = Column(Float)
+    business_interruption_value = Column(Float)
+    year_built = Column(Integer)
+    construction = Column(String)
+    __table_args__ = (
+        # Covering index: a policy's SOV total never touches the table rows
+        Index('ix_asset_attribute_policy_value', 'policy_id', 'replacement_value'),
+    )
+
 class Claim(Base):
     __tablename__ = 'claim'
     id = Column(Integer, primary_key=True)
-    policy_id = Column(Integer, ForeignKey('policy.id'), nullable=False)
+    policy_id = Column(Integer, ForeignKey('policy.id'), nullable=False, index=True)
     claim_number = Column(String, unique=True, nullable=False)
     date_of_loss = Column(Date, nullable=False)
     reported_date = Column(Date, nullable=False)
@@ -138,7 +156,7 @@ class Claim(Base):
 class ClaimDetail(Base):
     __tablename__ = 'claim_detail'
     id = Column(Integer, primary_key=True)
-    claim_id = Column(Integer, ForeignKey('claim.id', ondelete='CASCADE'), nullable=False)
+    claim_id = Column(Integer, ForeignKey('claim.id', ondelete='CASCADE'), nullable=False, index=True)
     log_entry = Column(TEXT, nullable=False)
     entry_timestamp = Column(TIMESTAMP, server_default=func.now())
     author_party_id = Column(Integer, ForeignKey('party.id'))
@@ -147,7 +165,7 @@ class ClaimDetail(Base):
 class FinancialTransaction(Base):
     __tablename__ = 'financial_transaction'
     id = Column(Integer, primary_key=True)
-    claim_id = Column(Integer, ForeignKey('claim.id', ondelete='CASCADE'), nullable=False)
+    claim_id = Column(Integer, ForeignKey('claim.id', ondelete='CASCADE'), nullable=False, index=True)
     transaction_type = Column(String, CheckConstraint("transaction_type IN ('RESERVE', 'PAYMENT_EXPENSE', 'PAYMENT_INDEMNITY')"), nullable=False)
     amount = Column(Float, nullable=False)
     currency = Column(String, nullable=False)
@@ -158,7 +176,7 @@ class FinancialTransaction(Base):
 class Subrogation(Base):
     __tablename__ = 'subrogation'
     id = Column(Integer, primary_key=True)
-    claim_id = Column(Integer, ForeignKey('claim.id', ondelete='CASCADE'), nullable=False)
+    claim_id = Column(Integer, ForeignKey('claim.id', ondelete='CASCADE'), nullable=False, index=True)
     liable_party_id = Column(Integer, ForeignKey('party.id'), nullable=False)
     potential_recovery_amount = Column(Float)
     actual_recovery_amount = Column(Float)
@@ -168,7 +186,7 @@ class Subrogation(Base):
 class PolicyInsurer(Base):
     __tablename__ = 'policy_insurer'
     id = Column(Integer, primary_key=True)
-    policy_id = Column(Integer, ForeignKey('policy.id', ondelete='CASCADE'), nullable=False)
+    policy_id = Column(Integer, ForeignKey('policy.id', ondelete='CASCADE'), nullable=False, index=True)
     insurer_party_id = Column(Integer, ForeignKey('party.id'), nullable=False)
     share_percentage = Column(Float, nullable=False)
     is_lead = Column(Boolean, default=False, nullable=False)
@@ -177,7 +195,7 @@ class PolicyInsurer(Base):
 class ReinsuranceTreaty(Base):
     __tablename__ = 'reinsurance_treaty'
     id = Column(Integer, primary_key=True)
-    policy_id = Column(Integer, ForeignKey('policy.id', ondelete='CASCADE'), nullable=False)
+    policy_id = Column(Integer, ForeignKey('policy.id', ondelete='CASCADE'), nullable=False, index=True)
     treaty_type = Column(String, default='FACULTATIVE', nullable=False)
     description = Column(String)
     policy = relationship("Policy", back_populates="reinsurance_treaties")
@@ -186,7 +204,7 @@ class ReinsuranceTreaty(Base):
 class ReinsuranceLayer(Base):
     __tablename__ = 'reinsurance_layer'
     id = Column(Integer, primary_key=True)
-    treaty_id = Column(Integer, ForeignKey('reinsurance_treaty.id', ondelete='CASCADE'), nullable=False)
+    treaty_id = Column(Integer, ForeignKey('reinsurance_treaty.id', ondelete='CASCADE'), nullable=False, index=True)
     layer_order = Column(Integer, nullable=False)
     attachment_point = Column(Float, nullable=False)
     layer_limit = Column(Float, nullable=False)
@@ -197,7 +215,7 @@ class ReinsuranceLayer(Base):
 class LayerParticipant(Base):
     __tablename__ = 'layer_participant'
     id = Column(Integer, primary_key=True)
-    layer_id = Column(Integer, ForeignKey('reinsurance_layer.id', ondelete='CASCADE'), nullable=False)
+    layer_id = Column(Integer, ForeignKey('reinsurance_layer.id', ondelete='CASCADE'), nullable=False, index=True)
     reinsurer_party_id = Column(Integer, ForeignKey('party.id'), nullable=False)
     share_percentage = Column(Float, nullable=False)
     status = Column(String, default='QUOTED', nullable=False)
@@ -207,8 +225,8 @@ class LayerParticipant(Base):
 class CashCall(Base):
     __tablename__ = 'cash_call'
     id = Column(Integer, primary_key=True)
-    claim_id = Column(Integer, ForeignKey('claim.id', ondelete='CASCADE'), nullable=False)
-    layer_participant_id = Column(Integer, ForeignKey('layer_participant.id', ondelete='CASCADE'), nullable=False)
+    claim_id = Column(Integer, ForeignKey('claim.id', ondelete='CASCADE'), nullable=False, index=True)
+    layer_participant_id = Column(Integer, ForeignKey('layer_participant.id', ondelete='CASCADE'), nullable=False, index=True)
     call_amount = Column(Float, nullable=False)
     currency = Column(String, nullable=False)
     status = Column(String, default='ISSUED', nullable=False)
@@ -217,6 +235,46 @@ class CashCall(Base):
     claim = relationship("Claim", back_populates="cash_calls")
     participant = relationship("LayerParticipant", back_populates="cash_calls")
 
+class ClaimLedger(Base):
+    """Running per-claim financial summary, maintained by triggers (see create_claim_ledger)."""
+    __tablename__ = 'claim_ledger'
+    claim_id = Column(Integer, ForeignKey('claim.id', ondelete='CASCADE'), primary_key=True)
+    reserve_total = Column(Float, nullable=False, server_default='0')  # sum of RESERVE transactions
+    paid_indemnity = Column(Float, nullable=False, server_default='0')
+    paid_expense = Column(Float, nullable=False, server_default='0')
+    outstanding_reserve = Column(Float, nullable=False, server_default='0')  # reserve not yet paid out, never negative
+    incurred = Column(Float, nullable=False, server_default='0')  # paid + outstanding reserve
+    called = Column(Float, nullable=False, server_default='0')  # all cash call amounts
+    collected = Column(Float, nullable=False, server_default='0')  # PAID cash call amounts
+    cash_calls = Column(Integer, nullable=False, server_default='0')
+    cash_calls_paid = Column(Integer, nullable=False, server_default='0')
+    cash_calls_pending = Column(Integer, nullable=False, server_default='0')
+
+class KpiRollup(Base):
+    """Dashboard KPI totals per quarter, market and broker, maintained by triggers (see create_kpi_rollup)."""
+    __tablename__ = 'kpi_rollup'
+    quarter = Column(String, primary_key=True)  # e.g. "2025-Q4"
+    market = Column(String, primary_key=True)  # german, us (as market_config.detect_market)
+    broker_party_id = Column(Integer, primary_key=True)  # 0 for direct business
+    # Submission funnel, by the quarter the submission came in
+    submissions = Column(Integer, nullable=False, server_default='0')
+    quoted = Column(Integer, nullable=False, server_default='0')
+    bound = Column(Integer, nullable=False, server_default='0')
+    turnaround_count = Column(Integer, nullable=False, server_default='0')  # submissions with a quote
+    turnaround_days = Column(Float, nullable=False, server_default='0')  # summed days to the first quote
+    # Premium: written in the effective quarter, earned pro rata over the policy term
+    written_premium = Column(Float, nullable=False, server_default='0')
+    earned_premium = Column(Float, nullable=False, server_default='0')
+    # Losses, by the quarter of the date of loss (incurred as in claim_ledger)
+    claims = Column(Integer, nullable=False, server_default='0')
+    incurred_losses = Column(Float, nullable=False, server_default='0')
+
+class PolicyRevision(Base):
+    """Change stamp per policy, bumped by triggers on writes to it and its portfolio rows (see create_policy_revisions)."""
+    __tablename__ = 'policy_revision'
+    policy_id = Column(Integer, primary_key=True)  # kept after the policy is deleted, so stamps are never reused
+    revision = Column(Integer, nullable=False, index=True)  # one global sequence: the latest write has the highest
+
 class Document(Base):
     __tablename__ = 'document'
     id = Column(Integer, primary_key=True)
@@ -226,6 +284,9 @@ class Document(Base):
     related_table = Column(String, nullable=False)
     related_id = Column(Integer, nullable=False)
     uploader_party_id = Column(Integer, ForeignKey('party.id'))
+    __table_args__ = (
+        Index('ix_document_related', 'related_table', 'related_id'),
+    )
 
 # --- Customer Portal Tables ---
 
@@ -246,18 +307,19 @@ class CustomerUser(Base):
 class ChatMessage(Base):
     __tablename__ = 'chat_message'
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('customer_user.id', ondelete='CASCADE'), nullable=False)
+    user_id = Column(Integer, ForeignKey('customer_user.id', ondelete='CASCADE'), nullable=False, index=True)
     message = Column(TEXT, nullable=False)
     response = Column(TEXT, nullable=False)
     timestamp = Column(TIMESTAMP, server_default=func.now())
     is_user = Column(Boolean, nullable=False)
     model_used = Column(String)
+    first_token_ms = Column(Integer)  # time to first streamed token; NULL when not streamed
     user = relationship("CustomerUser", back_populates="chat_messages")
 
 class GeneratedAd(Base):
     __tablename__ = 'generated_ad'
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('customer_user.id', ondelete='CASCADE'), nullable=False)
+    user_id = Column(Integer, ForeignKey('customer_user.id', ondelete='CASCADE'), nullable=False, index=True)
     product_type = Column(String, nullable=False)
     image_prompt = Column(TEXT)
     image_url = Column(String)
@@ -270,8 +332,8 @@ class GeneratedAd(Base):
 class PolicySummary(Base):
     __tablename__ = 'policy_summary'
     id = Column(Integer, primary_key=True)
-    policy_id = Column(Integer, ForeignKey('policy.id', ondelete='CASCADE'), nullable=False)
-    user_id = Column(Integer, ForeignKey('customer_user.id'), nullable=False)
+    policy_id = Column(Integer, ForeignKey('policy.id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey('customer_user.id'), nullable=False, index=True)
     summary_text = Column(TEXT, nullable=False)
     generated_at = Column(TIMESTAMP, server_default=func.now())
     model_used = Column(String)
@@ -279,9 +341,9 @@ class PolicySummary(Base):
 class EmailTemplate(Base):
     __tablename__ = 'email_template'
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('customer_user.id', ondelete='CASCADE'), nullable=False)
-    policy_id = Column(Integer, ForeignKey('policy.id'))
-    claim_id = Column(Integer, ForeignKey('claim.id'))
+    user_id = Column(Integer, ForeignKey('customer_user.id', ondelete='CASCADE'), nullable=False, index=True)
+    policy_id = Column(Integer, ForeignKey('policy.id'), index=True)
+    claim_id = Column(Integer, ForeignKey('claim.id'), index=True)
     template_type = Column(String, nullable=False)
     subject = Column(String, nullable=False)
     body = Column(TEXT, nullable=False)
@@ -289,6 +351,599 @@ class EmailTemplate(Base):
     sent = Column(Boolean, default=False)
     sent_at = Column(TIMESTAMP)
 
+class StpClassification(Base):
+    __tablename__ = 'stp_classification'
+    chat_message_id = Column(Integer, ForeignKey('chat_message.id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(Integer, ForeignKey('customer_user.id', ondelete='CASCADE'), nullable=False)
+    product_type = Column(String, nullable=False)  # Travel, Pet, Life, Home, General
+    decision = Column(String, nullable=False)  # STP, Referred
+    premium = Column(Float, nullable=False)
+    classified_at = Column(TIMESTAMP, server_default=func.now())
+    __table_args__ = (
+        # Newest-first inbox pages, optionally filtered by decision
+        Index('ix_stp_classification_user', 'user_id', 'chat_message_id'),
+        Index('ix_stp_classification_user_decision', 'user_id', 'decision', 'chat_message_id'),
+    )
+
+class StpInboxState(Base):
+    __tablename__ = 'stp_inbox_state'
+    user_id = Column(Integer, ForeignKey('customer_user.id', ondelete='CASCADE'), primary_key=True)
+    last_message_id = Column(Integer, nullable=False, default=0)  # high-water mark of classified chat messages
+    total_quotes = Column(Integer, nullable=False, default=0)
+    stp_count = Column(Integer, nullable=False, default=0)
+    referred_count = Column(Integer, nullable=False, default=0)
+    premium_sum = Column(Float, nullable=False, default=0.0)
+    # General questions: auto-approved, but not product quotes, so left out of the STP rate.
+    # NULL on states from before the column, which are rebuilt on their next refresh
+    general_count = Column(Integer)
+
+class OutboxEvent(Base):
+    __tablename__ = 'outbox_event'
+    id = Column(Integer, primary_key=True, autoincrement=True)  # AUTOINCREMENT so pruned ids are never reused
+    user_id = Column(Integer, ForeignKey('customer_user.id', ondelete='CASCADE'), nullable=False)
+    event_type = Column(String, nullable=False)  # quote_created, chat_message_saved, inbox_reset
+    chat_message_id = Column(Integer)  # no FK: the event outlives a cleared chat
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    __table_args__ = (
+        Index('ix_outbox_event_user', 'user_id', 'id'),
+        Index('ix_outbox_event_created_at', 'created_at'),
+        {'sqlite_autoincrement': True},
+    )
+
+class LLMResponseCache(Base):
+    __tablename__ = 'llm_response_cache'
+    cache_key = Column(String, primary_key=True)  # sha256 of model, temperature bucket and normalized messages
+    model = Column(String, nullable=False)
+    response = Column(TEXT, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    hit_count = Column(Integer, nullable=False, default=0)
+
+# --- Schema Migration ---
+def create_missing_indexes(bind=None):
+    """Create any declared index that an existing database file does not have yet.
+
+    create_all() skips tables that already exist, so databases seeded before the
+    indexes were declared need this to pick them up. Safe to run repeatedly.
+    """
+    bind = bind or engine
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+
+def create_missing_columns(bind=None):
+    """Add declared nullable columns that an existing table does not have yet.
+
+    Only plain nullable columns are handled (SQLite's ADD COLUMN limits), which
+    covers the optional fields added after the original schema.
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable and column.server_default is None:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+
+
+# --- Full-Text Search ---
+# FTS5 indexes over free-text columns, as external-content tables so the text
+# is stored once. Triggers keep each index in step with its source table.
+SEARCH_INDEXES = {
+    'claim_detail': ['log_entry'],
+    'claim': ['description'],
+    'chat_message': ['message', 'response'],
+    'document': ['document_name'],
+}
+# remove_diacritics folds umlauts and accents, so "schaden" also finds "Schäden"
+SEARCH_TOKENIZER = 'unicode61 remove_diacritics 2'
+
+
+def create_search_index(bind=None):
+    """Create any missing FTS5 index and its sync triggers, filling it from existing rows.
+
+    Safe to run repeatedly. An index whose triggers are gone (its source table
+    was dropped and recreated) is rebuilt, since it can no longer be trusted.
+    """
+    bind = bind or engine
+    with bind.begin() as conn:
+        triggers = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        for table, columns in SEARCH_INDEXES.items():
+            fts = f'{table}_fts'
+            if {f'{fts}_ai', f'{fts}_ad', f'{fts}_au'} <= triggers:
+                continue
+            for suffix in ('ai', 'ad', 'au'):
+                conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS {fts}')
+            cols = ', '.join(columns)
+            new_values = ', '.join(f'new.{c}' for c in columns)
+            old_values = ', '.join(f'old.{c}' for c in columns)
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+                f"tokenize='{SEARCH_TOKENIZER}', prefix='2 3')"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END"
+            )
+            # Only edits to the indexed columns touch the index (not e.g. claim status changes)
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+            )
+            conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+# --- Asset Attributes ---
+# asset_detail key -> asset_attribute column; the value is cast to the column's type
+ASSET_ATTRIBUTES = {
+    'Replacement Value': 'replacement_value',
+    'Contents Value': 'contents_value',
+    'Business Interruption Value': 'business_interruption_value',
+    'Year Built': 'year_built',
+    'Construction': 'construction',
+}
+
+
+def _asset_attribute_pivot(where=''):
+    """INSERT OR REPLACE of the CASE-aggregated pivot, for all assets or those matching `where`."""
+    columns = AssetAttribute.__table__.columns
+    pivots = ', '.join(
+        f"MAX(CASE WHEN d.detail_key = '{key}' THEN CAST(d.detail_value AS "
+        f"{columns[column].type.compile(dialect=engine.dialect)}) END)"
+        for key, column in ASSET_ATTRIBUTES.items()
+    )
+    return (
+        f"INSERT OR REPLACE INTO asset_attribute (asset_id, policy_id, {', '.join(ASSET_ATTRIBUTES.values())}) "
+        f"SELECT a.id, a.policy_id, {pivots} FROM insurable_asset a "
+        f"LEFT JOIN asset_detail d ON d.asset_id = a.id {where} GROUP BY a.id"
+    )
+
+
+def create_asset_attributes(bind=None):
+    """Install the triggers that keep asset_attribute in step with asset_detail, and backfill it.
+
+    Safe to run repeatedly: the backfill only runs when the triggers are new.
+    """
+    bind = bind or engine
+    triggers = {
+        'asset_attribute_detail_ai': f"AFTER INSERT ON asset_detail BEGIN "
+                                     f"{_asset_attribute_pivot('WHERE a.id = new.asset_id')}; END",
+        'asset_attribute_detail_au': f"AFTER UPDATE ON asset_detail BEGIN "
+                                     f"{_asset_attribute_pivot('WHERE a.id IN (old.asset_id, new.asset_id)')}; END",
+        'asset_attribute_detail_ad': f"AFTER DELETE ON asset_detail BEGIN "
+                                     f"{_asset_attribute_pivot('WHERE a.id = old.asset_id')}; END",
+        'asset_attribute_asset_au': "AFTER UPDATE OF policy_id ON insurable_asset BEGIN "
+                                    "UPDATE asset_attribute SET policy_id = new.policy_id WHERE asset_id = new.id; END",
+        # SQLite foreign keys are off here, so ON DELETE CASCADE alone would not fire
+        'asset_attribute_asset_ad': "AFTER DELETE ON insurable_asset BEGIN "
+                                    "DELETE FROM asset_attribute WHERE asset_id = old.id; END",
+    }
+    with bind.begin() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        if set(triggers) <= existing:
+            return
+        for name, body in triggers.items():
+            conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+            conn.exec_driver_sql(f'CREATE TRIGGER {name} {body}')
+        conn.exec_driver_sql('DELETE FROM asset_attribute')
+        # Only assets that have details get a row, as the triggers would have produced
+        conn.exec_driver_sql(_asset_attribute_pivot('WHERE a.id IN (SELECT asset_id FROM asset_detail)'))
+
+
+# --- Claim Ledger ---
+# Additive ledger columns and the amount each source row contributes to them
+_LEDGER_TRANSACTION_TERMS = {
+    'reserve_total': "CASE WHEN {row}.transaction_type = 'RESERVE' THEN {row}.amount ELSE 0 END",
+    'paid_indemnity': "CASE WHEN {row}.transaction_type = 'PAYMENT_INDEMNITY' THEN {row}.amount ELSE 0 END",
+    'paid_expense': "CASE WHEN {row}.transaction_type = 'PAYMENT_EXPENSE' THEN {row}.amount ELSE 0 END",
+}
+_LEDGER_CASH_CALL_TERMS = {
+    'called': "{row}.call_amount",
+    'collected': "CASE WHEN {row}.status = 'PAID' THEN {row}.call_amount ELSE 0 END",
+    'cash_calls': "1",
+    'cash_calls_paid': "CASE WHEN {row}.status = 'PAID' THEN 1 ELSE 0 END",
+    'cash_calls_pending': "CASE WHEN {row}.status = 'PENDING' THEN 1 ELSE 0 END",
+}
+_LEDGER_DERIVED = (
+    "outstanding_reserve = MAX(reserve_total - paid_indemnity - paid_expense, 0), "
+    "incurred = paid_indemnity + paid_expense + MAX(reserve_total - paid_indemnity - paid_expense, 0)"
+)
+
+
+def _ledger_apply(terms, row, sign):
+    """Trigger statements that add (sign '+') or remove (sign '-') one source row's contribution."""
+    deltas = ', '.join(f"{column} = {column} {sign} ({term.format(row=row)})" for column, term in terms.items())
+    return (
+        f"INSERT OR IGNORE INTO claim_ledger (claim_id) VALUES ({row}.claim_id); "
+        f"UPDATE claim_ledger SET {deltas} WHERE claim_id = {row}.claim_id; "
+        f"UPDATE claim_ledger SET {_LEDGER_DERIVED} WHERE claim_id = {row}.claim_id;"
+    )
+
+
+def _ledger_expected_sql():
+    """The ledger recomputed from financial_transaction and cash_call, one row per claim with activity."""
+    def sums(terms, table):
+        return ', '.join(f"SUM({term.format(row=table)}) AS {column}" for column, term in terms.items())
+    additive = list(_LEDGER_TRANSACTION_TERMS) + list(_LEDGER_CASH_CALL_TERMS)
+    return (
+        "SELECT c.claim_id, "
+        + ', '.join(f"COALESCE({column}, 0) AS {column}" for column in additive)
+        + " FROM (SELECT claim_id FROM financial_transaction UNION SELECT claim_id FROM cash_call) c"
+        f" LEFT JOIN (SELECT claim_id, {sums(_LEDGER_TRANSACTION_TERMS, 'financial_transaction')}"
+        " FROM financial_transaction GROUP BY claim_id) t ON t.claim_id = c.claim_id"
+        f" LEFT JOIN (SELECT claim_id, {sums(_LEDGER_CASH_CALL_TERMS, 'cash_call')}"
+        " FROM cash_call GROUP BY claim_id) k ON k.claim_id = c.claim_id"
+    )
+
+
+def rebuild_claim_ledger(bind=None, claim_ids=None):
+    """Recompute claim_ledger from the raw ledger rows (all claims, or just claim_ids)."""
+    bind = bind or engine
+    additive = list(_LEDGER_TRANSACTION_TERMS) + list(_LEDGER_CASH_CALL_TERMS)
+    scope = '' if claim_ids is None else f" WHERE claim_id IN ({','.join(str(int(i)) for i in claim_ids) or 'NULL'})"
+    with bind.begin() as conn:
+        conn.exec_driver_sql(f"DELETE FROM claim_ledger{scope}")
+        conn.exec_driver_sql(
+            f"INSERT INTO claim_ledger (claim_id, {', '.join(additive)}) "
+            f"SELECT claim_id, {', '.join(additive)} FROM ({_ledger_expected_sql()}){scope}"
+        )
+        conn.exec_driver_sql(f"UPDATE claim_ledger SET {_LEDGER_DERIVED}{scope}")
+
+
+def check_claim_ledger(bind=None, repair=False, tolerance=0.005):
+    """Compare claim_ledger with a full recomputation from the raw ledger.
+
+    Returns the ids of claims whose summary is missing, stale or orphaned;
+    with repair=True those claims are rebuilt before returning.
+    """
+    bind = bind or engine
+    additive = list(_LEDGER_TRANSACTION_TERMS) + list(_LEDGER_CASH_CALL_TERMS)
+    differs = ' OR '.join(f"ABS(e.{column} - l.{column}) > :tolerance" for column in additive)
+    with bind.connect() as conn:
+        mismatched = [row[0] for row in conn.execute(text(
+            f"SELECT e.claim_id FROM ({_ledger_expected_sql()}) e "
+            f"LEFT JOIN claim_ledger l ON l.claim_id = e.claim_id WHERE l.claim_id IS NULL OR {differs} "
+            f"UNION SELECT claim_id FROM claim_ledger WHERE claim_id NOT IN "
+            f"(SELECT claim_id FROM financial_transaction UNION SELECT claim_id FROM cash_call)"
+        ), {'tolerance': tolerance})]
+    if repair and mismatched:
+        rebuild_claim_ledger(bind, mismatched)
+    return mismatched
+
+
+def create_claim_ledger(bind=None):
+    """Install the triggers that keep claim_ledger current, rebuilding it when they are new.
+
+    Safe to run repeatedly.
+    """
+    bind = bind or engine
+    triggers = {}
+    for table, terms in (('financial_transaction', _LEDGER_TRANSACTION_TERMS), ('cash_call', _LEDGER_CASH_CALL_TERMS)):
+        triggers[f'claim_ledger_{table}_ai'] = f"AFTER INSERT ON {table} BEGIN {_ledger_apply(terms, 'new', '+')} END"
+        triggers[f'claim_ledger_{table}_ad'] = f"AFTER DELETE ON {table} BEGIN {_ledger_apply(terms, 'old', '-')} END"
+        triggers[f'claim_ledger_{table}_au'] = (
+            f"AFTER UPDATE ON {table} BEGIN "
+            f"{_ledger_apply(terms, 'old', '-')} {_ledger_apply(terms, 'new', '+')} END"
+        )
+    # SQLite foreign keys are off here, so ON DELETE CASCADE alone would not fire
+    triggers['claim_ledger_claim_ad'] = "AFTER DELETE ON claim BEGIN DELETE FROM claim_ledger WHERE claim_id = old.id; END"
+
+    with bind.begin() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        if set(triggers) <= existing:
+            return
+        for name, body in triggers.items():
+            conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+            conn.exec_driver_sql(f'CREATE TRIGGER {name} {body}')
+    rebuild_claim_ledger(bind)
+
+
+# --- KPI Rollup ---
+# Every kpi_rollup total is a sum of per-submission and per-policy contributions
+# (a policy's contribution covers its premium and its claims). The triggers on a
+# source table subtract the contributions a change can affect before it is made
+# and add them back afterwards, so each write costs a few indexed lookups.
+_KPI_MEASURES = (
+    'submissions', 'quoted', 'bound', 'turnaround_count', 'turnaround_days',
+    'written_premium', 'earned_premium', 'claims', 'incurred_losses',
+)
+# Mirrors market_config.detect_market(submission_number, insured country)
+_KPI_MARKET = (
+    "CASE WHEN instr(s.submission_number, '-DE') > 0 "
+    "OR UPPER(ip.country) IN ('GERMANY', 'DEUTSCHLAND', 'DE') THEN 'german' ELSE 'us' END"
+)
+# Source table -> (columns the rollup depends on, affected submissions, affected policies)
+_KPI_SOURCES = {
+    'submission': ('created_at, status, broker_party_id, insured_party_id, submission_number',
+                   "s.id = {row}.id",
+                   "p.quote_id IN (SELECT id FROM quote WHERE submission_id = {row}.id)"),
+    'quote': ('submission_id, created_at, total_premium', "s.id = {row}.submission_id", "p.quote_id = {row}.id"),
+    'policy': ('quote_id, effective_date, expiration_date', None, "p.id = {row}.id"),
+    'claim': ('policy_id, date_of_loss', None, "p.id = {row}.policy_id"),
+}
+
+
+def _kpi_quarter(date):
+    """SQL for the "2025-Q4" quarter label of a date or timestamp column."""
+    return f"(strftime('%Y', {date}) || '-Q' || ((CAST(strftime('%m', {date}) AS INTEGER) + 2) / 3))"
+
+
+def _kpi_submission_rows(where):
+    """Funnel contributions of the submissions `s` matching `where`; turnaround runs to the first quote."""
+    turnaround = "julianday(f.created_at) - julianday(s.created_at)"
+    return (
+        f"SELECT {_kpi_quarter('s.created_at')} AS quarter, {_KPI_MARKET} AS market, "
+        "COALESCE(s.broker_party_id, 0) AS broker_party_id, 1 AS submissions, "
+        "(UPPER(s.status) IN ('QUOTED', 'BOUND') OR f.id IS NOT NULL) AS quoted, "
+        "(UPPER(s.status) = 'BOUND') AS bound, "
+        f"({turnaround}) IS NOT NULL AS turnaround_count, COALESCE(MAX({turnaround}, 0), 0) AS turnaround_days, "
+        "0 AS written_premium, 0 AS earned_premium, 0 AS claims, 0 AS incurred_losses "
+        "FROM submission s LEFT JOIN party ip ON ip.id = s.insured_party_id "
+        "LEFT JOIN quote f ON f.id = (SELECT q.id FROM quote q WHERE q.submission_id = s.id "
+        "ORDER BY q.created_at, q.id LIMIT 1) "
+        f"WHERE {where}"
+    )
+
+
+def _kpi_policy_rows(where):
+    """Premium and loss contributions of the policies `p` matching `where`.
+
+    Written premium lands in the effective quarter. Earned premium is spread
+    over the quarters of the term in proportion to the days in each, and a
+    claim's incurred amount lands in the quarter of its date of loss.
+    """
+    quarter_start = "date({d}, 'start of month', '-' || ((CAST(strftime('%m', {d}) AS INTEGER) - 1) % 3) || ' months')"
+    next_quarter = "julianday(start, '+3 months')"
+    written = (
+        f"SELECT p.quote_id, {_kpi_quarter('p.effective_date')} AS quarter, COALESCE(q.total_premium, 0) AS written, "
+        "0 AS earned, 0 AS claims, 0 AS incurred "
+        f"FROM policy p LEFT JOIN quote q ON q.id = p.quote_id WHERE {where}"
+    )
+    earned = (
+        f"SELECT quote_id, {_kpi_quarter('start')}, 0, "
+        f"CASE WHEN expiry > eff THEN premium * (MIN(expiry, {next_quarter}) - MAX(eff, julianday(start))) / (expiry - eff) "
+        "ELSE premium END, 0, 0 "
+        "FROM (WITH RECURSIVE earning(quote_id, premium, eff, expiry, start) AS ("
+        "SELECT p.quote_id, COALESCE(q.total_premium, 0), julianday(p.effective_date), julianday(p.expiration_date), "
+        f"{quarter_start.format(d='p.effective_date')} "
+        f"FROM policy p LEFT JOIN quote q ON q.id = p.quote_id WHERE {where} "
+        "UNION ALL SELECT quote_id, premium, eff, expiry, date(start, '+3 months') FROM earning "
+        f"WHERE {next_quarter} < expiry) SELECT * FROM earning)"
+    )
+    losses = (
+        f"SELECT p.quote_id, {_kpi_quarter('c.date_of_loss')}, 0, 0, 1, COALESCE(l.incurred, 0) "
+        "FROM policy p JOIN claim c ON c.policy_id = p.id LEFT JOIN claim_ledger l ON l.claim_id = c.id "
+        f"WHERE {where}"
+    )
+    return (
+        f"SELECT x.quarter, {_KPI_MARKET} AS market, COALESCE(s.broker_party_id, 0) AS broker_party_id, "
+        "0 AS submissions, 0 AS quoted, 0 AS bound, 0 AS turnaround_count, 0 AS turnaround_days, "
+        "x.written AS written_premium, x.earned AS earned_premium, x.claims, x.incurred AS incurred_losses "
+        f"FROM ({written} UNION ALL {earned} UNION ALL {losses}) x "
+        "LEFT JOIN quote q ON q.id = x.quote_id LEFT JOIN submission s ON s.id = q.submission_id "
+        "LEFT JOIN party ip ON ip.id = s.insured_party_id"
+    )
+
+
+def _kpi_rows_sql(submissions=None, policies=None):
+    """Summed contributions per (quarter, market, broker) of the matching submissions and policies."""
+    parts = []
+    if submissions:
+        parts.append(_kpi_submission_rows(submissions))
+    if policies:
+        parts.append(_kpi_policy_rows(policies))
+    sums = ', '.join(f"SUM({column}) AS {column}" for column in _KPI_MEASURES)
+    return (
+        f"SELECT quarter, market, broker_party_id, {sums} FROM ({' UNION ALL '.join(parts)}) "
+        "WHERE quarter IS NOT NULL GROUP BY quarter, market, broker_party_id"
+    )
+
+
+def _kpi_upsert(select, columns):
+    """Statement adding the (quarter, market, broker_party_id, *columns) rows of `select` into kpi_rollup."""
+    # WHERE true keeps SQLite from reading ON CONFLICT as a join constraint
+    return (
+        f"INSERT INTO kpi_rollup (quarter, market, broker_party_id, {', '.join(columns)}) "
+        f"SELECT * FROM ({select}) WHERE true ON CONFLICT (quarter, market, broker_party_id) DO UPDATE SET "
+        + ', '.join(f"{column} = {column} + excluded.{column}" for column in columns) + ';'
+    )
+
+
+def _kpi_scope(template, rows):
+    """A _KPI_SOURCES predicate for any of the trigger rows ('old', 'new'), or None."""
+    return template and '(' + ' OR '.join(template.format(row=row) for row in rows) + ')'
+
+
+def _kpi_apply(sign, submissions=None, policies=None):
+    """Trigger statement that adds (sign '+') or removes (sign '-') the matching contributions."""
+    negated = ', '.join(f"{sign}{column}" for column in _KPI_MEASURES)
+    select = f"SELECT quarter, market, broker_party_id, {negated} FROM ({_kpi_rows_sql(submissions, policies)})"
+    return _kpi_upsert(select, _KPI_MEASURES)
+
+
+def _kpi_ledger_apply(row, delta):
+    """Trigger statement moving the incurred_losses of claim `row`.claim_id by `delta`."""
+    select = (
+        f"SELECT {_kpi_quarter('c.date_of_loss')} AS quarter, {_KPI_MARKET}, COALESCE(s.broker_party_id, 0), {delta} "
+        "FROM claim c JOIN policy p ON p.id = c.policy_id LEFT JOIN quote q ON q.id = p.quote_id "
+        "LEFT JOIN submission s ON s.id = q.submission_id LEFT JOIN party ip ON ip.id = s.insured_party_id "
+        f"WHERE c.id = {row}.claim_id AND quarter IS NOT NULL"
+    )
+    return _kpi_upsert(select, ('incurred_losses',))
+
+
+def rebuild_kpi_rollup(bind=None):
+    """Recompute kpi_rollup from the source tables."""
+    bind = bind or engine
+    with bind.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM kpi_rollup")
+        conn.exec_driver_sql(
+            f"INSERT INTO kpi_rollup (quarter, market, broker_party_id, {', '.join(_KPI_MEASURES)}) "
+            f"{_kpi_rows_sql(submissions='1', policies='1')}"
+        )
+
+
+def check_kpi_rollup(bind=None, repair=False, tolerance=0.005):
+    """Compare kpi_rollup with a full recomputation from the source tables.
+
+    Returns the (quarter, market, broker_party_id) keys whose totals differ;
+    with repair=True the rollup is rebuilt before returning. Edits to an
+    insured party's country are not tracked by the triggers, so run this
+    after changing one.
+    """
+    bind = bind or engine
+    differs = ' OR '.join(f"ABS(COALESCE(e.{column}, 0) - COALESCE(r.{column}, 0)) > :tolerance"
+                          for column in _KPI_MEASURES)
+    expected = _kpi_rows_sql(submissions='1', policies='1')
+    with bind.connect() as conn:
+        mismatched = [tuple(row) for row in conn.execute(text(
+            f"SELECT e.quarter, e.market, e.broker_party_id FROM ({expected}) e "
+            "LEFT JOIN kpi_rollup r USING (quarter, market, broker_party_id) "
+            f"WHERE {differs} "
+            f"UNION SELECT r.quarter, r.market, r.broker_party_id FROM kpi_rollup r "
+            f"LEFT JOIN ({expected}) e USING (quarter, market, broker_party_id) "
+            f"WHERE e.quarter IS NULL AND ({differs})"
+        ), {'tolerance': tolerance})]
+    if repair and mismatched:
+        rebuild_kpi_rollup(bind)
+    return mismatched
+
+
+def create_kpi_rollup(bind=None):
+    """Install the triggers that keep kpi_rollup current, rebuilding it when they are new.
+
+    Safe to run repeatedly.
+    """
+    bind = bind or engine
+    triggers = {}
+    for table, (columns, submissions, policies) in _KPI_SOURCES.items():
+        events = {
+            'i': ('INSERT', ['new']),
+            'u': (f'UPDATE OF {columns}', ['old', 'new']),
+            'd': ('DELETE', ['old']),
+        }
+        for suffix, (event, rows) in events.items():
+            affected = {'submissions': _kpi_scope(submissions, rows), 'policies': _kpi_scope(policies, rows)}
+            triggers[f'kpi_rollup_{table}_b{suffix}'] = f"BEFORE {event} ON {table} BEGIN {_kpi_apply('-', **affected)} END"
+            triggers[f'kpi_rollup_{table}_a{suffix}'] = f"AFTER {event} ON {table} BEGIN {_kpi_apply('+', **affected)} END"
+    # claim_ledger is itself trigger-maintained (and uses INSERT OR IGNORE), so apply its deltas directly
+    triggers['kpi_rollup_claim_ledger_ai'] = f"AFTER INSERT ON claim_ledger BEGIN {_kpi_ledger_apply('new', 'new.incurred')} END"
+    triggers['kpi_rollup_claim_ledger_au'] = (
+        f"AFTER UPDATE OF incurred ON claim_ledger BEGIN {_kpi_ledger_apply('new', 'new.incurred - old.incurred')} END"
+    )
+    triggers['kpi_rollup_claim_ledger_ad'] = f"AFTER DELETE ON claim_ledger BEGIN {_kpi_ledger_apply('old', '-old.incurred')} END"
+
+    with bind.begin() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        if set(triggers) <= existing:
+            return
+        for name, body in triggers.items():
+            conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+            conn.exec_driver_sql(f'CREATE TRIGGER {name} {body}')
+    rebuild_kpi_rollup(bind)
+
+
+# --- Policy Revisions ---
+# Every write that changes what get_customer_portfolio returns stamps the
+# affected policies with the next value of one global sequence, so the newest
+# revision among a customer's policies only ever grows and serves as a cache key.
+# Source table -> the affected policy ids, selected from the trigger row
+_REVISION_SOURCES = {
+    'policy': "SELECT {row}.id AS policy_id",
+    'quote': "SELECT id AS policy_id FROM policy WHERE quote_id = {row}.id",
+    'coverage': "SELECT {row}.policy_id AS policy_id",
+    'insurable_asset': "SELECT {row}.policy_id AS policy_id",
+    'party_role': "SELECT {row}.context_id AS policy_id WHERE {row}.context_table = 'policy'",
+}
+
+
+def _revision_bump(policies):
+    """Trigger statement stamping the `policies` ids with the next revision."""
+    # WHERE true keeps SQLite from reading ON CONFLICT as a join constraint
+    return (
+        "INSERT INTO policy_revision (policy_id, revision) "
+        f"SELECT policy_id, (SELECT COALESCE(MAX(revision), 0) + 1 FROM policy_revision) FROM ({policies}) "
+        "WHERE true ON CONFLICT (policy_id) DO UPDATE SET revision = excluded.revision;"
+    )
+
+
+def create_policy_revisions(bind=None):
+    """Install the triggers that stamp policy_revision; safe to run repeatedly.
+
+    Nothing is backfilled: a policy without a stamp has simply not changed
+    since the triggers were installed.
+    """
+    bind = bind or engine
+    triggers = {}
+    for table, policies in _REVISION_SOURCES.items():
+        triggers[f'policy_revision_{table}_ai'] = (
+            f"AFTER INSERT ON {table} BEGIN {_revision_bump(policies.format(row='new'))} END"
+        )
+        triggers[f'policy_revision_{table}_au'] = (
+            f"AFTER UPDATE ON {table} BEGIN "
+            f"{_revision_bump(policies.format(row='old') + ' UNION ' + policies.format(row='new'))} END"
+        )
+        triggers[f'policy_revision_{table}_ad'] = (
+            f"AFTER DELETE ON {table} BEGIN {_revision_bump(policies.format(row='old'))} END"
+        )
+
+    with bind.begin() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        if set(triggers) <= existing:
+            return
+        for name, body in triggers.items():
+            conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+            conn.exec_driver_sql(f'CREATE TRIGGER {name} {body}')
+
+
+# --- Schema Version ---
+# Stamped into the file header (PRAGMA user_version) once upgrade_schema() has
+# run, so app startup can skip the DDL checks on an up-to-date file. Bump it
+# whenever the declared tables, columns, indexes, search or derived tables change.
+SCHEMA_VERSION = 4
+
+
+def get_schema_version(bind=None):
+    """The schema version stamped on a database file (0 if it was never stamped)."""
+    bind = bind or engine
+    with bind.connect() as conn:
+        return conn.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def set_schema_version(bind=None, version=SCHEMA_VERSION):
+    """Stamps a database file as being at `version`."""
+    bind = bind or engine
+    with bind.begin() as conn:
+        conn.exec_driver_sql(f'PRAGMA user_version = {int(version)}')
+
+
+def upgrade_schema(bind=None):
+    """Bring a database file up to the declared schema; safe to run repeatedly.
+
+    Does not stamp the file, so callers can seed it first.
+    """
+    bind = bind or engine
+    Base.metadata.create_all(bind)
+    create_missing_columns(bind)
+    create_missing_indexes(bind)
+    create_search_index(bind)
+    create_asset_attributes(bind)
+    create_claim_ledger(bind)
+    create_kpi_rollup(bind)
+    create_policy_revisions(bind)
+
+
 # --- Data Seeding Function ---
 def clear_all_data():
     """Clear all data from the database while keeping the schema."""
@@ -357,6 +1012,11 @@ if __name__ == '__main__':
     print("Creating/updating database schema...")
     Base.metadata.drop_all(engine)
     Base.metadata.create_all(engine)
+    create_search_index(engine)
+    create_asset_attributes(engine)
+    create_claim_ledger(engine)
+    create_kpi_rollup(engine)
+    create_policy_revisions(engine)
     print("[OK] Schema ready")
     
     # Seed data based on market selection
@@ -375,4 +1035,5 @@ if __name__ == '__main__':
     finally:
         session.close()
     
+    set_schema_version(engine)
     print("Database seeded successfully.")
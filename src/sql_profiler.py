@@ -0,0 +1,200 @@
+"""Opt-in SQL statement profiler for the Streamlit apps.
+
+Set PNC_SQL_PROFILE=1 to enable it. Listeners on the shared engine's
+before/after_cursor_execute events time every statement and attribute it
+to the project function that issued it and that function's caller (the
+nearest frames in src/ or underwritingcenter/). Each app calls start_run()
+at the top of its script, which opens a RunProfile for the current
+Streamlit session (worker threads started with add_script_run_ctx report
+into the same one), and render_profile_panel() at the end to show query
+count, total DB time, the slowest statements and repeated-statement (N+1)
+patterns. Statements slower than SLOW_QUERY_MS are also appended to the
+slow-query log.
+"""
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import event
+
+from db_engine import PROJECT_ROOT, engine
+
+PROFILE_ENABLED = os.environ.get('PNC_SQL_PROFILE', '').lower() in ('1', 'true', 'yes')
+SLOW_QUERY_MS = float(os.environ.get('PNC_SLOW_QUERY_MS', '100'))
+SLOW_QUERY_LOG = os.environ.get('PNC_SLOW_QUERY_LOG', os.path.join(PROJECT_ROOT, 'slow_queries.log'))
+
+# Statements kept per run for the panel; counts and totals cover all of them
+MAX_RECORDS = 5000
+# The same statement from the same caller this often, with varying parameters, looks like N+1
+N_PLUS_ONE_MIN_CALLS = 5
+# Sessions whose latest run is kept; the oldest is dropped beyond this
+MAX_SESSIONS = 100
+
+_SOURCE_DIRS = tuple(os.path.join(PROJECT_ROOT, d) + os.sep for d in ('src', 'underwritingcenter'))
+_THIS_FILE = os.path.abspath(__file__)
+
+_lock = threading.Lock()
+_runs = {}
+_installed = set()
+_slow_log = logging.getLogger('pnc.slow_sql')
+
+
+class RunProfile:
+    """Statements recorded during one script run."""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.time()
+        self.count = 0
+        self.total_ms = 0.0
+        self.records = []  # (statement, fingerprint, duration_ms, caller)
+
+    def add(self, statement, fingerprint, duration_ms, caller):
+        self.count += 1
+        self.total_ms += duration_ms
+        if len(self.records) < MAX_RECORDS:
+            self.records.append((statement, fingerprint, duration_ms, caller))
+
+    def _by_statement(self):
+        groups = defaultdict(list)
+        for statement, fingerprint, duration_ms, caller in self.records:
+            groups[(statement, caller)].append((fingerprint, duration_ms))
+        return groups
+
+    def slowest(self, limit=10):
+        """Statements grouped per caller, by total time: dicts with calls, total_ms and max_ms."""
+        rows = [
+            {'statement': statement, 'caller': caller, 'calls': len(runs),
+             'total_ms': sum(d for _, d in runs), 'max_ms': max(d for _, d in runs)}
+            for (statement, caller), runs in self._by_statement().items()
+        ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)[:limit]
+
+    def n_plus_one(self, min_calls=N_PLUS_ONE_MIN_CALLS):
+        """Statements one caller issued at least min_calls times with different parameters."""
+        rows = []
+        for (statement, caller), runs in self._by_statement().items():
+            distinct = len({fingerprint for fingerprint, _ in runs})
+            if len(runs) >= min_calls and distinct > 1:
+                rows.append({'statement': statement, 'caller': caller, 'calls': len(runs),
+                             'distinct_parameters': distinct, 'total_ms': sum(d for _, d in runs)})
+        return sorted(rows, key=lambda row: row['calls'], reverse=True)
+
+
+def _scope_key():
+    """The Streamlit session of the running script, or the thread outside Streamlit."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        ctx = None
+    return ctx.session_id if ctx is not None else threading.get_ident()
+
+
+def _caller():
+    """The issuing project function and its project call site, as 'module.function:line <- module.function:line'."""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < 2:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_SOURCE_DIRS) and filename != _THIS_FILE:
+            module = os.path.splitext(os.path.basename(filename))[0]
+            frames.append(f"{module}.{frame.f_code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ' <- '.join(frames) or '?'
+
+
+def _fingerprint(parameters, executemany):
+    if executemany:
+        return f"{len(parameters)} rows"
+    return hashlib.blake2b(repr(parameters).encode(), digest_size=4).hexdigest()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('profiler_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('profiler_start')
+    if not starts:  # listeners were installed while this statement was running
+        return
+    started = starts.pop()
+    duration_ms = (time.perf_counter() - started) * 1000
+    run = _runs.get(_scope_key())
+    slow = duration_ms >= SLOW_QUERY_MS
+    if run is None and not slow:
+        return
+    caller = _caller()
+    fingerprint = _fingerprint(parameters, executemany)
+    if run is not None:
+        run.add(statement, fingerprint, duration_ms, caller)
+    if slow:
+        _slow_log.warning("%.1f ms | %s | %s | %s", duration_ms, caller, fingerprint, ' '.join(statement.split()))
+
+
+def enable_profiling(bind=None):
+    """Installs the timing listeners and the slow-query log on an engine (once)."""
+    bind = bind or engine
+    with _lock:
+        if id(bind) in _installed:
+            return
+        if not _slow_log.handlers:
+            handler = logging.FileHandler(SLOW_QUERY_LOG, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            _slow_log.addHandler(handler)
+            _slow_log.propagate = False
+        event.listen(bind, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(bind, 'after_cursor_execute', _after_cursor_execute)
+        _installed.add(id(bind))
+
+
+def start_run(label):
+    """Starts recording for the current script run; returns its RunProfile, or None when profiling is off."""
+    if not PROFILE_ENABLED:
+        return None
+    enable_profiling()
+    run = RunProfile(label)
+    key = _scope_key()
+    with _lock:
+        _runs.pop(key, None)
+        _runs[key] = run
+        while len(_runs) > MAX_SESSIONS:
+            del _runs[next(iter(_runs))]
+    return run
+
+
+def render_profile_panel(run):
+    """Collapsible debug panel for a RunProfile (no-op for None)."""
+    if run is None:
+        return
+    import streamlit as st
+    import pandas as pd
+
+    with st.expander(f"🛠️ SQL profiler · {run.count} queries · {run.total_ms:.0f} ms"):
+        slow = sum(1 for record in run.records if record[2] >= SLOW_QUERY_MS)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Queries", run.count)
+        col2.metric("DB Time", f"{run.total_ms:.1f} ms")
+        col3.metric(f"Slow (≥{SLOW_QUERY_MS:.0f} ms)", slow)
+
+        for pattern in run.n_plus_one():
+            st.warning(f"N+1 suspected: `{pattern['caller']}` ran the same statement {pattern['calls']}× "
+                       f"with {pattern['distinct_parameters']} different parameter sets "
+                       f"({pattern['total_ms']:.1f} ms)")
+
+        slowest = run.slowest()
+        if slowest:
+            st.dataframe(pd.DataFrame({
+                'Statement': [' '.join(row['statement'].split())[:160] for row in slowest],
+                'Caller': [row['caller'] for row in slowest],
+                'Calls': [row['calls'] for row in slowest],
+                'Total ms': [round(row['total_ms'], 2) for row in slowest],
+                'Max ms': [round(row['max_ms'], 2) for row in slowest],
+            }), hide_index=True)
+        if run.count > len(run.records):
+            st.caption(f"Showing the first {len(run.records)} of {run.count} statements.")
+        st.caption(f"Slow-query log: {SLOW_QUERY_LOG}")
@@ -0,0 +1,162 @@
+"""Incremental STP inbox for the PolicyCenter dashboard in app_v2.
+
+Quote requests arrive as ChatMessage rows from the customer portal. Each
+refresh classifies only the messages above a per-user high-water mark,
+stores the product/decision/premium in stp_classification and folds them
+into the running totals in stp_inbox_state. The dashboard reads those
+totals and a bounded page of recent rows, so a rerun costs the same with
+ten quotes or several hundred thousand.
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, insert, select, union_all
+from sqlalchemy.exc import IntegrityError
+
+from database_queries import get_session
+from seed_database import ChatMessage, StpClassification, StpInboxState
+
+# Checked in this order; the first product mentioned anywhere in the request wins
+PRODUCTS = ["Travel", "Pet", "Life", "Home"]
+PREMIUM_MAP = {"Travel": 89, "Pet": 145, "Life": 450, "Home": 320, "General": 127}
+# High-value/high-risk products need manual underwriting; everything else is auto-approved
+REFERRED_PRODUCTS = {"Life"}
+
+INBOX_PAGE_SIZE = 200
+CLASSIFY_BATCH_SIZE = 5000
+
+# Lookup arrays indexed by product code (position in PRODUCTS, then General)
+_CATEGORIES = PRODUCTS + ["General"]
+_PREMIUMS = np.array([PREMIUM_MAP[p] for p in _CATEGORIES], dtype=float)
+_DECISIONS = np.array(["Referred" if p in REFERRED_PRODUCTS else "STP" for p in _CATEGORIES], dtype=object)
+
+
+def classify_messages(messages):
+    """Vectorized classification of a Series of quote requests.
+
+    Returns a DataFrame with product_type, decision and premium columns,
+    aligned with the input index.
+    """
+    lowered = messages.str.lower()
+    # np.select takes the first true condition, which keeps the PRODUCTS priority;
+    # working on integer codes keeps the premium/decision lookups as array takes
+    mentions = [lowered.str.contains(p.lower(), regex=False) for p in PRODUCTS]
+    codes = np.select(mentions, range(len(PRODUCTS)), default=len(PRODUCTS))
+    return pd.DataFrame({
+        'product_type': pd.Categorical.from_codes(codes, _CATEGORIES),
+        'decision': _DECISIONS[codes],
+        'premium': _PREMIUMS[codes],
+    }, index=messages.index)
+
+
+def _state_dict(state):
+    return {
+        'last_message_id': state.last_message_id,
+        'total_quotes': state.total_quotes,
+        'stp_count': state.stp_count,
+        'referred_count': state.referred_count,
+        'general_count': state.general_count,
+        'premium_sum': state.premium_sum,
+    }
+
+
+def reset_stp_inbox(session, user_id):
+    """Forgets a user's classifications (e.g. after their chat history was deleted)."""
+    session.query(StpClassification).filter(StpClassification.user_id == user_id).delete()
+    session.query(StpInboxState).filter(StpInboxState.user_id == user_id).delete()
+
+
+def refresh_stp_inbox(user_id):
+    """Classifies messages newer than the high-water mark and returns the updated totals."""
+    session = get_session()
+    try:
+        state = session.get(StpInboxState, user_id)
+        newest = session.query(func.max(ChatMessage.id)).filter(ChatMessage.user_id == user_id).scalar() or 0
+
+        if state is not None and (newest < state.last_message_id or state.general_count is None):
+            # Messages below the mark were deleted (or the totals predate general_count); rebuild from scratch
+            reset_stp_inbox(session, user_id)
+            session.flush()
+            state = None
+        if state is None:
+            state = StpInboxState(user_id=user_id, last_message_id=0, total_quotes=0,
+                                  stp_count=0, referred_count=0, general_count=0, premium_sum=0.0)
+            session.add(state)
+
+        while state.last_message_id < newest:
+            batch = pd.read_sql(
+                select(ChatMessage.id, ChatMessage.message).where(
+                    ChatMessage.user_id == user_id,
+                    ChatMessage.id > state.last_message_id,
+                    ChatMessage.id <= newest
+                ).order_by(ChatMessage.id).limit(CLASSIFY_BATCH_SIZE),
+                session.connection()
+            )
+            if batch.empty:
+                break
+
+            classified = classify_messages(batch['message'])
+            classified.insert(0, 'chat_message_id', batch['id'])
+            classified.insert(1, 'user_id', user_id)
+            session.execute(insert(StpClassification), classified.to_dict('records'))
+
+            stp = int((classified['decision'] == "STP").sum())
+            state.total_quotes += len(classified)
+            state.stp_count += stp
+            state.referred_count += len(classified) - stp
+            state.general_count += int((classified['product_type'] == "General").sum())
+            state.premium_sum += float(classified['premium'].sum())
+            state.last_message_id = int(batch['id'].iloc[-1])
+
+        session.commit()
+        return _state_dict(state)
+    except IntegrityError:
+        # A concurrent rerun classified the same messages first; its totals stand
+        session.rollback()
+        state = session.get(StpInboxState, user_id)
+        if state is None:
+            raise
+        return _state_dict(state)
+    finally:
+        session.close()
+
+
+def get_stp_inbox_rows(user_id, limit=INBOX_PAGE_SIZE):
+    """Newest classified quote requests as one DataFrame, sorted newest first.
+
+    Holds the latest `limit` rows of each decision (one indexed UNION ALL
+    query), so the Active tab is the head of the frame and the decision tabs
+    are boolean masks over it.
+    """
+    def newest(decision):
+        return select(
+            ChatMessage.id, ChatMessage.timestamp, ChatMessage.response,
+            StpClassification.product_type, StpClassification.decision, StpClassification.premium
+        ).join(
+            StpClassification, StpClassification.chat_message_id == ChatMessage.id
+        ).where(
+            StpClassification.user_id == user_id,
+            StpClassification.decision == decision
+        ).order_by(StpClassification.chat_message_id.desc()).limit(limit).subquery().select()
+
+    session = get_session()
+    rows = pd.read_sql(union_all(newest("STP"), newest("Referred")), session.connection(),
+                       parse_dates=['timestamp'])
+    session.close()
+    return rows.sort_values('id', ascending=False, ignore_index=True)
+
+
+def build_inbox_table(rows, customer_name, processing_time):
+    """Display columns for the rows from get_stp_inbox_rows (vectorized)."""
+    return pd.DataFrame({
+        "Quote ID": "QT-" + (rows['id'] + 10000).astype(str),
+        "Customer": customer_name,
+        "Product": rows['product_type'] + " Insurance",
+        "Status": np.where(rows['decision'] == "STP", "✅ Auto-Approved", "⚠️ Manual Review"),
+        "Processing Time": f"{processing_time:.1f}s",
+        "Premium": "CHF " + rows['premium'].astype(int).astype(str),
+        "Decision": rows['decision'],
+        "Timestamp": rows['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+        "_timestamp": rows['timestamp'],
+        "_response": rows['response'],
+        "_premium_raw": rows['premium'].astype(int)
+    })
@@ -0,0 +1,133 @@
+"""Trigger checks for the asset_attribute pivot behind the Statement of Values.
+
+After every insert, update and delete on asset_detail and insurable_asset
+the pivot must equal the typed key/value rows, and get_statement_of_values
+and get_sov_total must agree with a direct aggregate over asset_detail.
+"""
+import sys
+import os
+import datetime
+import math
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+from sqlalchemy import create_engine
+
+import database_queries
+from seed_database import (
+    Base, Policy, InsurableAsset, AssetLocation, AssetDetail, AssetAttribute,
+    ASSET_ATTRIBUTES, create_asset_attributes
+)
+
+TYPES = {'replacement_value': float, 'contents_value': float, 'business_interruption_value': float,
+         'year_built': int, 'construction': str}
+
+
+@pytest.fixture
+def sov_db(tmp_path, monkeypatch):
+    """A scratch database with the pivot triggers, shared with database_queries."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'asset_attributes.db'}")
+    Base.metadata.create_all(engine)
+    create_asset_attributes(engine)
+    monkeypatch.setattr(database_queries, 'engine', engine)
+    monkeypatch.setattr(database_queries, 'Session', database_queries.sessionmaker(bind=engine))
+    session = database_queries.get_session()
+    yield engine, session
+    session.close()
+    engine.dispose()
+
+
+def _policy(session, number):
+    policy = Policy(policy_number=number, effective_date=datetime.date(2025, 1, 1),
+                    expiration_date=datetime.date(2025, 12, 31))
+    session.add(policy)
+    session.flush()
+    return policy
+
+
+def _asset(session, policy, description, **details):
+    asset = InsurableAsset(policy_id=policy.id, asset_type='Building', description=description)
+    session.add(asset)
+    session.flush()
+    session.add(AssetLocation(asset_id=asset.id, address='Hauptstr. 1', city='Köln', country='Germany'))
+    session.add_all([AssetDetail(asset_id=asset.id, detail_key=key, detail_value=value)
+                     for key, value in details.items()])
+    session.flush()
+    return asset
+
+
+def _expected(engine):
+    """The pivot and per-policy replacement totals computed straight from asset_detail."""
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            "SELECT a.id, a.policy_id, d.detail_key, d.detail_value "
+            "FROM insurable_asset a JOIN asset_detail d ON d.asset_id = a.id").fetchall()
+        totals = dict(conn.exec_driver_sql(
+            "SELECT a.policy_id, SUM(CAST(d.detail_value AS REAL)) FROM asset_detail d "
+            "JOIN insurable_asset a ON a.id = d.asset_id WHERE d.detail_key = 'Replacement Value' "
+            "GROUP BY a.policy_id").fetchall())
+    pivot = {}
+    for asset_id, policy_id, key, value in rows:
+        attributes = pivot.setdefault(asset_id, dict({'policy_id': policy_id}, **dict.fromkeys(TYPES)))
+        if key in ASSET_ATTRIBUTES:
+            column = ASSET_ATTRIBUTES[key]
+            attributes[column] = TYPES[column](value)
+    return pivot, totals
+
+
+def _assert_in_sync(engine, session, policies):
+    session.commit()
+    session.expire_all()
+    pivot, totals = _expected(engine)
+    actual = {row.asset_id: dict({'policy_id': row.policy_id}, **{column: getattr(row, column) for column in TYPES})
+              for row in session.query(AssetAttribute)}
+    assert actual == pivot
+
+    for policy in policies:
+        sov = database_queries.get_statement_of_values(policy.id)
+        for asset_id, value in zip(sov['asset_id'], sov['replacement_value']):
+            expected = pivot.get(asset_id, {}).get('replacement_value')
+            assert math.isnan(value) if expected is None else value == expected
+        assert sov['city'].eq('Köln').all()
+        assert database_queries.get_sov_total([policy.id]) == pytest.approx(totals.get(policy.id, 0.0))
+    assert database_queries.get_sov_total() == pytest.approx(sum(totals.values()))
+
+
+def test_pivot_follows_detail_and_asset_writes(sov_db):
+    engine, session = sov_db
+    first, second = _policy(session, 'POL-SOV-1'), _policy(session, 'POL-SOV-2')
+    warehouse = _asset(session, first, 'Warehouse', **{'Replacement Value': '1500000', 'Year Built': '1998',
+                                                       'Construction': 'Masonry', 'Roof Type': 'Flat'})
+    office = _asset(session, first, 'Office', **{'Replacement Value': '800000.50', 'Contents Value': '120000'})
+    _asset(session, second, 'Shop', **{'Sprinklered': 'Yes'})
+    _asset(session, second, 'Yard')
+    _assert_in_sync(engine, session, [first, second])
+    attributes = session.get(AssetAttribute, warehouse.id)
+    assert (attributes.replacement_value, attributes.year_built, attributes.construction) == (1500000.0, 1998, 'Masonry')
+
+    # Inserting, updating and deleting an attribute
+    session.add(AssetDetail(asset_id=office.id, detail_key='Business Interruption Value', detail_value='250000'))
+    _assert_in_sync(engine, session, [first, second])
+    value = session.query(AssetDetail).filter_by(asset_id=warehouse.id, detail_key='Replacement Value').one()
+    value.detail_value = '1750000'
+    _assert_in_sync(engine, session, [first, second])
+    session.delete(session.query(AssetDetail).filter_by(asset_id=office.id, detail_key='Replacement Value').one())
+    _assert_in_sync(engine, session, [first, second])
+    assert session.get(AssetAttribute, office.id).replacement_value is None
+
+    # Renaming a key moves the value out of the pivot; moving a detail moves it to another asset
+    year = session.query(AssetDetail).filter_by(asset_id=warehouse.id, detail_key='Year Built').one()
+    year.detail_key = 'Year Renovated'
+    value.asset_id = office.id
+    _assert_in_sync(engine, session, [first, second])
+
+    # Moving and deleting assets
+    office.policy_id = second.id
+    _assert_in_sync(engine, session, [first, second])
+    for child in warehouse.details + warehouse.locations:
+        session.delete(child)
+    session.flush()
+    session.delete(warehouse)
+    _assert_in_sync(engine, session, [first, second])
+    assert database_queries.get_sov_total([first.id]) == 0.0
@@ -0,0 +1,78 @@
+"""Checks for the Monte Carlo cat simulation behind Case 3.
+
+The gross and net PML must be read off the same (annual aggregate) curve,
+so reinsurance can only lower the net figure.
+"""
+import sys
+import os
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+from sqlalchemy import create_engine
+
+import cat_simulation
+import database_queries
+from seed_database import (
+    Base, Party, Policy, PolicyInsurer, ReinsuranceTreaty, ReinsuranceLayer, LayerParticipant
+)
+
+
+@pytest.fixture
+def tower_db(tmp_path, monkeypatch):
+    """A scratch database shared with database_queries, and a scratch sample cache."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'cat_simulation.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database_queries, 'engine', engine)
+    monkeypatch.setattr(database_queries, 'Session', database_queries.sessionmaker(bind=engine))
+    monkeypatch.setattr(cat_simulation, 'SAMPLE_CACHE_DIR', str(tmp_path / 'sim_cache'))
+    session = database_queries.get_session()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _policy(session, placed):
+    """A policy with 1M xs 1M, 2M xs 2M and 4M xs 4M layers, each `placed` with one reinsurer."""
+    reinsurer = Party(party_type='ORGANIZATION', name='Rück AG')
+    insurer = Party(party_type='ORGANIZATION', name='Versicherung AG')
+    session.add_all([reinsurer, insurer])
+    session.flush()
+    policy = Policy(policy_number=f'POL-CAT-{placed}', effective_date=datetime.date(2026, 1, 1),
+                    expiration_date=datetime.date(2026, 12, 31))
+    session.add(policy)
+    session.flush()
+    session.add(PolicyInsurer(policy_id=policy.id, insurer_party_id=insurer.id, share_percentage=100.0,
+                              is_lead=True))
+    treaty = ReinsuranceTreaty(policy_id=policy.id)
+    session.add(treaty)
+    session.flush()
+    for order, size in enumerate((1e6, 2e6, 4e6), start=1):
+        layer = ReinsuranceLayer(treaty_id=treaty.id, layer_order=order, attachment_point=size, layer_limit=size)
+        session.add(layer)
+        session.flush()
+        if placed:
+            session.add(LayerParticipant(layer_id=layer.id, reinsurer_party_id=reinsurer.id,
+                                         share_percentage=placed))
+    session.commit()
+    return policy
+
+
+@pytest.mark.parametrize('placed', [50.0, 100.0])
+def test_net_pml_never_exceeds_gross(tower_db, placed):
+    policy = _policy(tower_db, placed)
+    simulation = cat_simulation.simulate_policy(policy.id, years=20000, frequency=2.0)
+
+    assert simulation['net_pml'] < simulation['pml']
+    curve = simulation['ep_curve'].set_index('Return Period').loc[cat_simulation.PML_RETURN_PERIOD]
+    assert (simulation['pml'], simulation['net_pml']) == pytest.approx((curve['AEP'], curve['AEP Net']))
+    assert (simulation['ep_curve']['AEP Net'] <= simulation['ep_curve']['AEP']).all()
+    coinsurer = simulation['coinsurers'].iloc[0]
+    assert coinsurer['Net PML'] == pytest.approx(simulation['net_pml'])
+
+
+def test_unplaced_tower_keeps_the_gross_pml(tower_db):
+    policy = _policy(tower_db, 0)
+    simulation = cat_simulation.simulate_policy(policy.id, years=20000, frequency=2.0)
+    assert simulation['net_pml'] == pytest.approx(simulation['pml'])
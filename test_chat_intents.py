@@ -0,0 +1,51 @@
+"""Routing checks for the underwriting assistant's intent table.
+
+Search keywords must be whole words, while the other keywords keep matching
+as word stems ("updates", "Aktionsliste").
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'underwritingcenter'))
+
+import pytest
+
+from chat_intents import route_intent
+
+
+@pytest.mark.parametrize('message, terms', [
+    ("search for sprinkler systems", 'sprinkler systems'),
+    ("Find roof damage", 'roof damage'),
+    ("find: hail", 'hail'),
+    ("Suche nach Brandschutz", 'Brandschutz'),
+    ("Finde die Sturmschäden", 'Sturmschäden'),
+])
+def test_search_keywords_route_to_search(message, terms):
+    route = route_intent(message)
+    assert route['intent'] == 'search'
+    assert route['search_terms'] == terms
+
+
+@pytest.mark.parametrize('message, intent', [
+    ("research the market", None),
+    ("Any findings on the roof?", None),
+    ("Ich besuche den Kunden morgen", None),
+    ("What did the researchers say? Any updates?", 'update'),
+    ("Help me with the findings", 'help'),
+])
+def test_search_keywords_inside_other_words_are_ignored(message, intent):
+    route = route_intent(message)
+    assert route['intent'] == intent
+    assert route['search_terms'] is None
+
+
+@pytest.mark.parametrize('message, intent', [
+    ("Any updates on my submissions?", 'update'),
+    ("Bitte aktualisieren", 'update'),
+    ("Zeig mir meine Aktionsliste", 'priority'),
+    ("Catch me up", 'catch_up'),
+    ("Please open Floor & Decor", 'open_submission'),
+    ("Öffne SUB-2026-001-DE", 'open_submission'),
+])
+def test_stem_keywords_still_match_inflections(message, intent):
+    assert route_intent(message)['intent'] == intent
@@ -0,0 +1,139 @@
+"""Trigger checks for the claim_ledger summary table.
+
+Every write to financial_transaction, cash_call or claim must leave
+claim_ledger equal to a full recomputation, and rebuild_claim_ledger must
+repair a ledger that has drifted from the raw rows.
+"""
+import sys
+import os
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from seed_database import (
+    Base, Party, Policy, Claim, FinancialTransaction, CashCall, ClaimLedger,
+    check_claim_ledger, create_claim_ledger, rebuild_claim_ledger
+)
+
+
+@pytest.fixture
+def ledger_db(tmp_path):
+    """A scratch database with the claim ledger triggers installed, and a session on it."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'claim_ledger.db'}")
+    Base.metadata.create_all(engine)
+    create_claim_ledger(engine)
+    session = sessionmaker(bind=engine)()
+    yield engine, session
+    session.close()
+    engine.dispose()
+
+
+def _claims(session, count):
+    insured = Party(party_type='ORGANIZATION', name='Insured AG')
+    session.add(insured)
+    session.flush()
+    policy = Policy(policy_number='POL-LEDGER', effective_date=datetime.date(2025, 1, 1),
+                    expiration_date=datetime.date(2025, 12, 31))
+    session.add(policy)
+    session.flush()
+    claims = [Claim(policy_id=policy.id, claim_number=f'CLM-{i}', date_of_loss=datetime.date(2025, 3, 1),
+                    reported_date=datetime.date(2025, 3, 2), reported_by_party_id=insured.id)
+              for i in range(count)]
+    session.add_all(claims)
+    session.commit()
+    return claims
+
+
+def _transaction(claim, transaction_type, amount):
+    return FinancialTransaction(claim_id=claim.id, transaction_type=transaction_type, amount=amount,
+                                currency='EUR', transaction_date=datetime.date(2025, 3, 10))
+
+
+def _ledger(session, claim):
+    session.expire_all()
+    return session.get(ClaimLedger, claim.id)
+
+
+def test_triggers_follow_inserts_updates_and_deletes(ledger_db):
+    engine, session = ledger_db
+    first, second = _claims(session, 2)
+
+    reserve = _transaction(first, 'RESERVE', 100000.0)
+    indemnity = _transaction(first, 'PAYMENT_INDEMNITY', 30000.0)
+    expense = _transaction(first, 'PAYMENT_EXPENSE', 5000.0)
+    calls = [CashCall(claim_id=first.id, layer_participant_id=1, call_amount=amount, currency='EUR',
+                      status=status, due_date=datetime.date(2025, 4, 1))
+             for amount, status in ((20000.0, 'ISSUED'), (10000.0, 'PENDING'))]
+    session.add_all([reserve, indemnity, expense, *calls])
+    session.commit()
+    ledger = _ledger(session, first)
+    assert (ledger.reserve_total, ledger.paid_indemnity, ledger.paid_expense) == (100000.0, 30000.0, 5000.0)
+    assert ledger.outstanding_reserve == 65000.0
+    assert ledger.incurred == 100000.0
+    assert (ledger.called, ledger.collected, ledger.cash_calls, ledger.cash_calls_pending) == (30000.0, 0, 2, 1)
+    assert check_claim_ledger(engine) == []
+
+    # Payments beyond the reserve leave nothing outstanding
+    indemnity.amount = 120000.0
+    calls[0].status = 'PAID'
+    session.commit()
+    ledger = _ledger(session, first)
+    assert ledger.outstanding_reserve == 0
+    assert ledger.incurred == 125000.0
+    assert (ledger.collected, ledger.cash_calls_paid) == (20000.0, 1)
+    assert check_claim_ledger(engine) == []
+
+    # Reclassify a payment and move another to the second claim
+    expense.transaction_type = 'RESERVE'
+    indemnity.claim_id = second.id
+    session.commit()
+    assert _ledger(session, first).reserve_total == 105000.0
+    assert _ledger(session, second).paid_indemnity == 120000.0
+    assert check_claim_ledger(engine) == []
+
+    session.delete(calls[1])
+    session.delete(reserve)
+    session.commit()
+    ledger = _ledger(session, first)
+    assert (ledger.reserve_total, ledger.cash_calls, ledger.cash_calls_pending) == (5000.0, 1, 0)
+    assert check_claim_ledger(engine) == []
+
+    # A claim's ledger row goes with the claim once its transactions are gone
+    session.delete(indemnity)
+    session.flush()
+    session.delete(second)
+    session.commit()
+    assert _ledger(session, second) is None
+    assert check_claim_ledger(engine) == []
+
+
+def test_rebuild_repairs_drift(ledger_db):
+    engine, session = ledger_db
+    claims = _claims(session, 3)
+    session.add_all([_transaction(claim, 'RESERVE', 50000.0) for claim in claims])
+    session.add(_transaction(claims[0], 'PAYMENT_INDEMNITY', 20000.0))
+    session.commit()
+    assert check_claim_ledger(engine) == []
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"UPDATE claim_ledger SET paid_indemnity = 0 WHERE claim_id = {claims[0].id}")
+        conn.exec_driver_sql(f"DELETE FROM claim_ledger WHERE claim_id = {claims[1].id}")
+        conn.exec_driver_sql("INSERT INTO claim_ledger (claim_id, reserve_total) VALUES (999, 1.0)")
+    assert sorted(check_claim_ledger(engine)) == [claims[0].id, claims[1].id, 999]
+
+    rebuild_claim_ledger(engine, [claims[0].id])
+    assert sorted(check_claim_ledger(engine)) == [claims[1].id, 999]
+
+    rebuild_claim_ledger(engine)
+    assert check_claim_ledger(engine) == []
+    ledger = _ledger(session, claims[0])
+    assert (ledger.paid_indemnity, ledger.outstanding_reserve, ledger.incurred) == (20000.0, 30000.0, 50000.0)
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE claim_ledger SET reserve_total = reserve_total + 1")
+    assert len(check_claim_ledger(engine, repair=True)) == 3
+    assert check_claim_ledger(engine) == []
@@ -0,0 +1,214 @@
+"""Trigger checks for the kpi_rollup table behind the underwriting dashboard.
+
+Writes to submissions, quotes, policies, claims and claim payments must
+leave kpi_rollup equal to a full recomputation (check_kpi_rollup() == []),
+and get_dashboard_kpis() must report the quarter-on-quarter values those
+writes imply.
+"""
+import sys
+import os
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+from sqlalchemy import create_engine
+
+import database_queries
+from kpi_engine import get_dashboard_kpis
+from seed_database import (
+    Base, Party, Submission, Quote, Policy, Claim, FinancialTransaction,
+    check_kpi_rollup, create_claim_ledger, create_kpi_rollup, rebuild_kpi_rollup
+)
+
+# Reporting on 2025-Q3, with nothing of Q4 elapsed yet
+AS_OF = datetime.date(2025, 10, 1)
+
+
+@pytest.fixture
+def rollup_db(tmp_path, monkeypatch):
+    """A scratch database with the ledger and rollup triggers, shared with kpi_engine."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'kpi_rollup.db'}")
+    Base.metadata.create_all(engine)
+    create_claim_ledger(engine)
+    create_kpi_rollup(engine)
+    monkeypatch.setattr(database_queries, 'Session', database_queries.sessionmaker(bind=engine))
+    session = database_queries.get_session()
+    yield engine, session
+    session.close()
+    engine.dispose()
+
+
+def _submission(session, insured, broker, number, created, status, quoted=None, premium=36500.0):
+    submission = Submission(submission_number=number, insured_party_id=insured.id, broker_party_id=broker.id,
+                            status=status, created_at=created)
+    session.add(submission)
+    session.flush()
+    quote = None
+    if quoted:
+        quote = Quote(submission_id=submission.id, insurer_party_id=broker.id, total_premium=premium,
+                      created_at=quoted)
+        session.add(quote)
+        session.flush()
+    return submission, quote
+
+
+def _kpis():
+    return get_dashboard_kpis(market='german', as_of=AS_OF)
+
+
+def test_rollup_follows_writes_and_quarter_on_quarter_kpis(rollup_db):
+    engine, session = rollup_db
+    insured = Party(party_type='ORGANIZATION', name='Möbel Schmidt GmbH', country='Germany')
+    broker = Party(party_type='ORGANIZATION', name='Broker AG', country='Germany')
+    session.add_all([insured, broker])
+    session.flush()
+
+    # Q2: one submission quoted after two days and bound
+    _, quote_a = _submission(session, insured, broker, 'SUB-A', datetime.datetime(2025, 5, 10),
+                             'BOUND', quoted=datetime.datetime(2025, 5, 12))
+    # Q3: two quoted submissions, four days and one day to quote, neither bound yet
+    submission_b, quote_b = _submission(session, insured, broker, 'SUB-B', datetime.datetime(2025, 8, 1),
+                                        'Quoted', quoted=datetime.datetime(2025, 8, 5))
+    _submission(session, insured, broker, 'SUB-C', datetime.datetime(2025, 8, 2),
+                'Quoted', quoted=datetime.datetime(2025, 8, 3))
+    session.commit()
+    assert check_kpi_rollup(engine) == []
+
+    kpis = _kpis()
+    assert (kpis['quarter'], kpis['previous_quarter']) == ('2025-Q3', '2025-Q2')
+    assert kpis['turnaround_days'] == pytest.approx(2.5)
+    assert kpis['turnaround_change'] == pytest.approx(0.5)
+    assert kpis['hit_ratio'] == 0
+    assert kpis['hit_ratio_change'] == pytest.approx(-100.0)  # quoted but unbound is a real 0%
+    assert kpis['hit_ratio_by_quarter'] == [None, 100.0, 0.0, None]
+    assert kpis['earned_premium'] is None and kpis['loss_ratio'] is None
+
+    # Binding in Q3 and an earlier quote for B move the hit ratio and turnaround
+    submission_b.status = 'BOUND'
+    session.add(Quote(submission_id=submission_b.id, insurer_party_id=broker.id, total_premium=30000.0,
+                      created_at=datetime.datetime(2025, 8, 2)))
+    session.commit()
+    assert check_kpi_rollup(engine) == []
+    kpis = _kpis()
+    assert kpis['hit_ratio'] == pytest.approx(50.0)
+    assert kpis['hit_ratio_change'] == pytest.approx(-50.0)
+    assert kpis['turnaround_days'] == pytest.approx(1.0)
+    assert kpis['turnaround_change'] == pytest.approx(-1.0)
+
+    # A one-year policy on A's quote earns 100 a day: 91 days in Q2, 92 in Q3
+    policy = Policy(policy_number='POL-A', quote_id=quote_a.id, effective_date=datetime.date(2025, 4, 1),
+                    expiration_date=datetime.date(2026, 4, 1))
+    session.add(policy)
+    session.commit()
+    assert check_kpi_rollup(engine) == []
+    kpis = _kpis()
+    assert kpis['earned_premium'] == pytest.approx(18300.0)
+    # Cumulative; Q4 is under way but has earned nothing yet
+    assert kpis['earned_premium_by_quarter'] == pytest.approx([0, 9100.0, 18300.0, 18300.0])
+
+    # Claims land in the quarter of their date of loss, at the ledger's incurred amount
+    claim = Claim(policy_id=policy.id, claim_number='CLM-A', date_of_loss=datetime.date(2025, 8, 15),
+                  reported_date=datetime.date(2025, 8, 16), reported_by_party_id=insured.id)
+    session.add(claim)
+    session.flush()
+    payment = FinancialTransaction(claim_id=claim.id, transaction_type='PAYMENT_INDEMNITY', amount=9150.0,
+                                   currency='EUR', transaction_date=datetime.date(2025, 9, 1))
+    session.add_all([
+        FinancialTransaction(claim_id=claim.id, transaction_type='RESERVE', amount=9150.0,
+                             currency='EUR', transaction_date=datetime.date(2025, 8, 20)),
+        payment,
+    ])
+    session.commit()
+    assert check_kpi_rollup(engine) == []
+    kpis = _kpis()
+    assert kpis['loss_ratio'] == pytest.approx(50.0)
+    assert kpis['loss_ratio_by_quarter'] == pytest.approx([None, 0.0, 9150.0 / 9200.0 * 100, None])
+
+    # Repricing the quote, moving the loss into Q2 and a larger payment
+    quote_a.total_premium = 73000.0
+    claim.date_of_loss = datetime.date(2025, 6, 1)
+    payment.amount = 18300.0
+    session.commit()
+    assert check_kpi_rollup(engine) == []
+    kpis = _kpis()
+    assert kpis['earned_premium'] == pytest.approx(36600.0)
+    assert kpis['loss_ratio'] == pytest.approx(50.0)
+    assert kpis['loss_ratio_by_quarter'][1] == pytest.approx(18300.0 / 18200.0 * 100)
+
+    # A shorter term earns the same premium faster
+    policy.expiration_date = datetime.date(2025, 10, 1)
+    session.commit()
+    assert check_kpi_rollup(engine) == []
+    assert _kpis()['earned_premium'] == pytest.approx(73000.0)
+
+    session.delete(payment)
+    session.flush()
+    session.delete(quote_b)
+    session.commit()
+    assert check_kpi_rollup(engine) == []
+    assert _kpis()['turnaround_days'] == pytest.approx(1.0)
+
+    for transaction in session.query(FinancialTransaction).all():
+        session.delete(transaction)
+    session.flush()
+    session.delete(claim)
+    session.flush()
+    session.delete(policy)
+    session.commit()
+    assert check_kpi_rollup(engine) == []
+    kpis = _kpis()
+    assert kpis['earned_premium'] is None and kpis['loss_ratio'] is None
+
+
+def test_zero_values_keep_their_change(rollup_db):
+    engine, session = rollup_db
+    insured = Party(party_type='ORGANIZATION', name='Bäckerei Huber', country='Germany')
+    broker = Party(party_type='ORGANIZATION', name='Makler GmbH', country='Germany')
+    session.add_all([insured, broker])
+    session.flush()
+    # Q2: quoted the same day and not bound, so 0.0 days and a 0% hit ratio
+    _submission(session, insured, broker, 'SUB-Z1', datetime.datetime(2025, 5, 5), 'Quoted',
+                quoted=datetime.datetime(2025, 5, 5))
+    session.commit()
+
+    # Against an empty Q1 there is nothing to compare with
+    kpis = get_dashboard_kpis(market='german', as_of=datetime.date(2025, 6, 30))
+    assert (kpis['turnaround_days'], kpis['hit_ratio']) == (0, 0)
+    assert kpis['turnaround_change'] is None and kpis['hit_ratio_change'] is None
+
+    # Q3: three days to quote and bound; the change is measured from the zeros
+    _submission(session, insured, broker, 'SUB-Z2', datetime.datetime(2025, 8, 1), 'BOUND',
+                quoted=datetime.datetime(2025, 8, 4))
+    session.commit()
+    kpis = _kpis()
+    assert kpis['turnaround_change'] == pytest.approx(3.0)
+    assert kpis['hit_ratio_change'] == pytest.approx(100.0)
+
+
+def test_check_reports_and_repairs_drift(rollup_db):
+    engine, session = rollup_db
+    insured = Party(party_type='ORGANIZATION', name='Insured Inc', country='USA')
+    broker = Party(party_type='ORGANIZATION', name='Broker LLC', country='USA')
+    session.add_all([insured, broker])
+    session.flush()
+    _submission(session, insured, broker, 'SUB-US', datetime.datetime(2025, 8, 1), 'BOUND',
+                quoted=datetime.datetime(2025, 8, 3))
+    session.commit()
+    assert check_kpi_rollup(engine) == []
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE kpi_rollup SET bound = 0")
+        conn.exec_driver_sql("INSERT INTO kpi_rollup (quarter, market, broker_party_id, submissions) "
+                             "VALUES ('2024-Q1', 'us', 0, 3)")
+    assert sorted(check_kpi_rollup(engine)) == [('2024-Q1', 'us', 0), ('2025-Q3', 'us', broker.id)]
+    assert get_dashboard_kpis(market='us', as_of=AS_OF)['hit_ratio'] == 0
+
+    rebuild_kpi_rollup(engine)
+    assert check_kpi_rollup(engine) == []
+    assert get_dashboard_kpis(market='us', as_of=AS_OF)['hit_ratio'] == pytest.approx(100.0)
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE kpi_rollup SET quoted = quoted + 1")
+    assert check_kpi_rollup(engine, repair=True) == [('2025-Q3', 'us', broker.id)]
+    assert check_kpi_rollup(engine) == []
@@ -0,0 +1,131 @@
+"""Cash call checks for the vectorized layer allocation.
+
+generate_cash_calls must issue each participant's share of the claim's
+incurred loss once, call only the difference after a reserve increase,
+skip amounts below MIN_CALL_AMOUNT, and book the calls in the currency it
+is given, with the claim ledger following every run.
+"""
+import sys
+import os
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+from sqlalchemy import create_engine
+
+import database_queries
+import layer_allocation
+from seed_database import (
+    Base, Party, Policy, Claim, FinancialTransaction, CashCall, ClaimLedger,
+    ReinsuranceTreaty, ReinsuranceLayer, LayerParticipant, check_claim_ledger, create_claim_ledger
+)
+
+
+@pytest.fixture
+def tower_db(tmp_path, monkeypatch):
+    """A scratch database with the claim ledger triggers, shared with layer_allocation."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'layer_allocation.db'}")
+    Base.metadata.create_all(engine)
+    create_claim_ledger(engine)
+    monkeypatch.setattr(layer_allocation, 'engine', engine)
+    monkeypatch.setattr(database_queries, 'Session', database_queries.sessionmaker(bind=engine))
+    session = database_queries.get_session()
+    yield engine, session
+    session.close()
+    engine.dispose()
+
+
+def _claim_with_tower(session):
+    """A claim on a policy with 1M xs 1M (60% / 40%) and 2M xs 2M (50% placed)."""
+    insured = Party(party_type='ORGANIZATION', name='Insured AG')
+    reinsurers = [Party(party_type='ORGANIZATION', name=f'Reinsurer {i}') for i in range(3)]
+    session.add_all([insured, *reinsurers])
+    session.flush()
+    policy = Policy(policy_number='POL-TOWER', effective_date=datetime.date(2025, 1, 1),
+                    expiration_date=datetime.date(2025, 12, 31))
+    session.add(policy)
+    session.flush()
+    treaty = ReinsuranceTreaty(policy_id=policy.id)
+    session.add(treaty)
+    session.flush()
+    participants = []
+    for order, size, shares in ((1, 1e6, (60.0, 40.0)), (2, 2e6, (50.0,))):
+        layer = ReinsuranceLayer(treaty_id=treaty.id, layer_order=order, attachment_point=size, layer_limit=size)
+        session.add(layer)
+        session.flush()
+        for share in shares:
+            participant = LayerParticipant(layer_id=layer.id, reinsurer_party_id=reinsurers[len(participants)].id,
+                                           share_percentage=share)
+            session.add(participant)
+            participants.append(participant)
+    claim = Claim(policy_id=policy.id, claim_number='CLM-TOWER', date_of_loss=datetime.date(2025, 3, 1),
+                  reported_date=datetime.date(2025, 3, 2), reported_by_party_id=insured.id)
+    session.add(claim)
+    session.commit()
+    return policy, claim, [participant.id for participant in participants]
+
+
+def _reserve(session, claim, amount):
+    session.add(FinancialTransaction(claim_id=claim.id, transaction_type='RESERVE', amount=amount,
+                                     currency='EUR', transaction_date=datetime.date(2025, 3, 10)))
+    session.commit()
+
+
+def _issue(policy, claim):
+    tower = layer_allocation.load_tower(policy.id)
+    return layer_allocation.generate_cash_calls([claim.id], layer_allocation.incurred_losses([claim.id]), tower,
+                                                currency='EUR', due_date=datetime.date(2025, 4, 1))
+
+
+def _called(session, participants):
+    session.expire_all()
+    totals = dict.fromkeys(participants, 0.0)
+    for call in session.query(CashCall):
+        totals[call.layer_participant_id] += call.call_amount
+    return [totals[participant] for participant in participants]
+
+
+def test_reissue_calls_only_the_difference(tower_db):
+    engine, session = tower_db
+    policy, claim, participants = _claim_with_tower(session)
+    assert _issue(policy, claim) == 0  # no reserve, nothing incurred
+
+    # 2.5M incurred: the first layer in full, 0.5M into the second
+    _reserve(session, claim, 2.5e6)
+    assert _issue(policy, claim) == 3
+    assert _called(session, participants) == [600000.0, 400000.0, 250000.0]
+    assert {call.currency for call in session.query(CashCall)} == {'EUR'}
+    assert session.get(ClaimLedger, claim.id).called == pytest.approx(1.25e6)
+
+    # Nothing new incurred, nothing new called
+    assert _issue(policy, claim) == 0
+
+    # A 1M reserve increase only reaches the second layer, so only its participant is called again
+    _reserve(session, claim, 1e6)
+    assert _issue(policy, claim) == 1
+    assert _called(session, participants) == [600000.0, 400000.0, 750000.0]
+    ledger = session.get(ClaimLedger, claim.id)
+    assert (ledger.called, ledger.cash_calls) == (pytest.approx(1.75e6), 4)
+
+    # A difference below MIN_CALL_AMOUNT is not worth a call; once it adds up past it, it is
+    _reserve(session, claim, 0.01)
+    assert _issue(policy, claim) == 0
+    _reserve(session, claim, 0.02)
+    assert _issue(policy, claim) == 1
+    assert _called(session, participants)[2] == pytest.approx(750000.015, abs=0.01)
+    assert check_claim_ledger(engine) == []
+
+
+def test_non_incremental_run_calls_the_full_allocation(tower_db):
+    engine, session = tower_db
+    policy, claim, participants = _claim_with_tower(session)
+    _reserve(session, claim, 5e6)
+    _issue(policy, claim)
+
+    tower = layer_allocation.load_tower(policy.id)
+    issued = layer_allocation.generate_cash_calls([claim.id], [5e6], tower, currency='USD', incremental=False)
+    assert issued == 3
+    assert _called(session, participants) == [1.2e6, 0.8e6, 2e6]
+    assert sorted(call.currency for call in session.query(CashCall)) == ['EUR'] * 3 + ['USD'] * 3
+    assert check_claim_ledger(engine) == []
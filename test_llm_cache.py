@@ -0,0 +1,143 @@
+"""Checks for the two-tier OpenAI response cache.
+
+Concurrent identical requests must reach the client once, and answers
+evicted from the in-process LRU must still be served from SQLite.
+"""
+import sys
+import os
+import threading
+import time
+import types
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import llm_cache
+from seed_database import LLMResponseCache
+
+
+class StubClient:
+    """Stands in for the OpenAI client: counts calls and can hold them until released."""
+
+    def __init__(self, hold=False, error=None):
+        self.calls = []
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+        self.error = error
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature, max_tokens):
+        self.calls.append(messages[-1]['content'])
+        assert self.release.wait(timeout=10)
+        if self.error:
+            raise self.error
+        message = types.SimpleNamespace(content=f"Answer to {messages[-1]['content']}")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """llm_cache with empty counters and LRU, persisting to a scratch database."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'llm_cache.db'}")
+    monkeypatch.setattr(llm_cache, 'engine', engine)
+    monkeypatch.setattr(llm_cache, 'Session', sessionmaker(bind=engine))
+    monkeypatch.setattr(llm_cache, '_table_ready', False)
+    monkeypatch.setattr(llm_cache, '_lru', OrderedDict())
+    monkeypatch.setattr(llm_cache, '_in_flight', {})
+    monkeypatch.setattr(llm_cache, '_stats', dict.fromkeys(llm_cache._stats, 0))
+    yield engine
+    engine.dispose()
+
+
+def _ask(client, prompt):
+    return llm_cache.cached_completion(client, 'gpt-3.5-turbo', [{'role': 'user', 'content': prompt}],
+                                       temperature=0.7, max_tokens=100)
+
+
+def _concurrently(client, prompt, callers):
+    """Runs `callers` identical requests, releasing the upstream call once all but one are waiting on it."""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(_ask(client, prompt))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 10
+    while llm_cache.get_cache_stats()['coalesced'] < callers - 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    client.release.set()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results, errors
+
+
+def test_concurrent_identical_requests_call_upstream_once(cache):
+    client = StubClient(hold=True)
+    results, errors = _concurrently(client, 'When does my policy renew?', 8)
+
+    assert errors == []
+    assert client.calls == ['When does my policy renew?']
+    assert results == ['Answer to When does my policy renew?'] * 8
+    stats = llm_cache.get_cache_stats()
+    assert (stats['misses'], stats['coalesced'], stats['hits']) == (1, 7, 7)
+    assert stats['hit_ratio'] == pytest.approx(7 / 8)
+
+    # The next asker is an LRU hit, whitespace and case aside
+    assert _ask(client, '  when does my POLICY renew? ') == results[0]
+    assert len(client.calls) == 1
+    assert llm_cache.get_cache_stats()['lru_hits'] == 1
+
+
+def test_upstream_error_reaches_every_coalesced_caller_and_is_not_cached(cache):
+    client = StubClient(hold=True, error=RuntimeError('rate limited'))
+    results, errors = _concurrently(client, 'Cover for my bike?', 4)
+
+    assert results == []
+    assert [str(e) for e in errors] == ['rate limited'] * 4
+    assert len(client.calls) == 1
+    assert llm_cache.get_cache_stats()['errors'] == 1
+
+    client.error = None
+    assert _ask(client, 'Cover for my bike?') == 'Answer to Cover for my bike?'
+    assert len(client.calls) == 2
+
+
+def test_sqlite_tier_serves_entries_evicted_from_the_lru(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, 'LRU_SIZE', 2)
+    client = StubClient()
+    for prompt in ('travel', 'pet', 'life'):
+        _ask(client, prompt)
+    assert len(llm_cache._lru) == 2
+    assert client.calls == ['travel', 'pet', 'life']
+
+    # 'travel' was evicted first; it comes back from SQLite without a client call
+    assert _ask(client, 'travel') == 'Answer to travel'
+    assert len(client.calls) == 3
+    stats = llm_cache.get_cache_stats()
+    assert (stats['db_hits'], stats['lru_hits'], stats['misses']) == (1, 0, 3)
+
+    # Promoted back into the LRU, evicting 'pet'
+    assert _ask(client, 'travel') == 'Answer to travel'
+    assert llm_cache.get_cache_stats()['lru_hits'] == 1
+    assert _ask(client, 'pet') == 'Answer to pet'
+    assert llm_cache.get_cache_stats()['db_hits'] == 2
+
+    # A fresh process (empty LRU) still finds everything
+    llm_cache.clear_cache()
+    assert [_ask(client, prompt) for prompt in ('travel', 'pet', 'life')] == [
+        'Answer to travel', 'Answer to pet', 'Answer to life']
+    assert len(client.calls) == 3
+    with cache.connect() as conn:
+        hits = dict(conn.execute(LLMResponseCache.__table__.select().with_only_columns(
+            LLMResponseCache.response, LLMResponseCache.hit_count)).fetchall())
+    assert hits == {'Answer to travel': 2, 'Answer to pet': 2, 'Answer to life': 1}
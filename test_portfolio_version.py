@@ -0,0 +1,97 @@
+"""Trigger checks for the policy_revision stamps behind the portfolio cache key.
+
+get_customer_portfolio_version must change whenever a write changes what
+get_customer_portfolio returns for that customer, and only then.
+"""
+import sys
+import os
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+from sqlalchemy import create_engine
+
+import database_queries
+from seed_database import (
+    Base, Party, Submission, Quote, Policy, Coverage, InsurableAsset, PartyRole, create_policy_revisions
+)
+
+
+@pytest.fixture
+def portfolio_db(tmp_path, monkeypatch):
+    """A scratch database with the revision triggers, shared with database_queries."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'portfolio_version.db'}")
+    Base.metadata.create_all(engine)
+    create_policy_revisions(engine)
+    create_policy_revisions(engine)  # a second run keeps the installed triggers
+    monkeypatch.setattr(database_queries, 'Session', database_queries.sessionmaker(bind=engine))
+    session = database_queries.get_session()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _customer_policy(session, customer, number):
+    submission = Submission(submission_number=f'SUB-{number}', insured_party_id=customer.id)
+    session.add(submission)
+    session.flush()
+    quote = Quote(submission_id=submission.id, insurer_party_id=customer.id, total_premium=1200.0)
+    session.add(quote)
+    session.flush()
+    policy = Policy(policy_number=number, quote_id=quote.id, effective_date=datetime.date(2026, 1, 1),
+                    expiration_date=datetime.date(2026, 12, 31))
+    session.add(policy)
+    session.flush()
+    coverage = Coverage(policy_id=policy.id, coverage_type='Home', limit_amount=1e5, deductible_amount=500)
+    session.add_all([coverage, InsurableAsset(policy_id=policy.id, asset_type='Building'),
+                     PartyRole(party_id=customer.id, role_name='Insured', context_table='policy',
+                               context_id=policy.id)])
+    session.commit()
+    return policy, quote, coverage
+
+
+def test_version_changes_with_every_portfolio_edit(portfolio_db):
+    session = portfolio_db
+    maria = Party(party_type='PERSON', name='Maria Weber')
+    jonas = Party(party_type='PERSON', name='Jonas Keller')
+    session.add_all([maria, jonas])
+    session.flush()
+    assert database_queries.get_customer_portfolio_version(maria.id) == (0, None, None)
+
+    policy, quote, coverage = _customer_policy(session, maria, 'POL-M-1')
+    other, other_quote, _ = _customer_policy(session, jonas, 'POL-J-1')
+    seen = [database_queries.get_customer_portfolio_version(maria.id)]
+    assert seen[0][0] == 1
+
+    def changed():
+        session.commit()
+        version = database_queries.get_customer_portfolio_version(maria.id)
+        assert version not in seen
+        seen.append(version)
+
+    # Edits to the policy and each row the portfolio loads with it
+    policy.status = 'Cancelled'
+    changed()
+    quote.total_premium = 1500.0
+    changed()
+    coverage.deductible_amount = 1000
+    changed()
+    session.add(InsurableAsset(policy_id=policy.id, asset_type='Contents'))
+    changed()
+    session.delete(coverage)
+    changed()
+
+    # Another customer's edits leave the version alone
+    other.status = 'Cancelled'
+    other_quote.total_premium = 900.0
+    session.commit()
+    assert database_queries.get_customer_portfolio_version(maria.id) == seen[-1]
+
+    # A new policy changes it; taking that policy away again restores the same portfolio and key
+    second, _, _ = _customer_policy(session, maria, 'POL-M-2')
+    version = database_queries.get_customer_portfolio_version(maria.id)
+    assert version[0] == 2 and version not in seen
+    session.delete(session.query(PartyRole).filter_by(context_id=second.id).one())
+    session.commit()
+    assert database_queries.get_customer_portfolio_version(maria.id) == seen[-1]
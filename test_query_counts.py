@@ -0,0 +1,182 @@
+"""Query-count checks for the database_queries helpers.
+
+Each helper must issue a constant number of SQL statements no matter how
+many quotes, co-insurers, layers or participants it returns.
+"""
+import sys
+import os
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+from sqlalchemy import create_engine, event
+
+import database_queries
+from seed_database import (
+    Base, Party, Submission, Quote, Policy, Claim, Subrogation, PolicyInsurer,
+    ReinsuranceTreaty, ReinsuranceLayer, LayerParticipant, Coverage, InsurableAsset, PartyRole
+)
+
+
+def _party(session, name):
+    party = Party(party_type='ORGANIZATION', name=name)
+    session.add(party)
+    session.flush()
+    return party
+
+
+def _seed(session, rows):
+    """Seed one submission/policy/claim whose children fan out to `rows`."""
+    insured = _party(session, 'Insured AG')
+    submission = Submission(submission_number=f'SUB-{rows}', insured_party_id=insured.id)
+    session.add(submission)
+    session.flush()
+
+    for i in range(rows):
+        insurer = _party(session, f'Insurer {i}')
+        session.add(Quote(submission_id=submission.id, insurer_party_id=insurer.id, total_premium=1000.0 + i))
+
+    policy = Policy(policy_number=f'POL-{rows}', effective_date=datetime.date(2026, 1, 1),
+                    expiration_date=datetime.date(2026, 12, 31))
+    session.add(policy)
+    session.flush()
+
+    for i in range(rows):
+        coinsurer = _party(session, f'Co-insurer {i}')
+        session.add(PolicyInsurer(policy_id=policy.id, insurer_party_id=coinsurer.id,
+                                  share_percentage=100.0 / rows, is_lead=(i == 0)))
+
+    treaty = ReinsuranceTreaty(policy_id=policy.id, description='Tower')
+    session.add(treaty)
+    session.flush()
+    for layer_order in range(1, rows + 1):
+        layer = ReinsuranceLayer(treaty_id=treaty.id, layer_order=layer_order,
+                                 attachment_point=layer_order * 1e6, layer_limit=1e6)
+        session.add(layer)
+        session.flush()
+        for i in range(rows):
+            reinsurer = _party(session, f'Reinsurer {layer_order}-{i}')
+            session.add(LayerParticipant(layer_id=layer.id, reinsurer_party_id=reinsurer.id,
+                                         share_percentage=100.0 / rows))
+
+    liable = _party(session, 'Liable GmbH')
+    claim = Claim(policy_id=policy.id, claim_number=f'CLM-{rows}', date_of_loss=datetime.date(2026, 3, 1),
+                  reported_date=datetime.date(2026, 3, 2), reported_by_party_id=insured.id)
+    session.add(claim)
+    session.flush()
+    session.add(Subrogation(claim_id=claim.id, liable_party_id=liable.id, potential_recovery_amount=5000.0))
+    session.commit()
+    return submission.id, policy.id, claim.id
+
+
+@pytest.fixture
+def statement_counter(tmp_path, monkeypatch):
+    """Point database_queries at a scratch database and count executed statements."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'query_counts.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database_queries, 'Session', database_queries.sessionmaker(bind=engine))
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    def count(helper, *args):
+        statements.clear()
+        result = helper(*args)
+        return len(statements), result
+
+    return count
+
+
+def _counts_for(statement_counter, rows):
+    session = database_queries.get_session()
+    submission_id, policy_id, claim_id = _seed(session, rows)
+    session.close()
+
+    quotes_count, quotes_df = statement_counter(database_queries.get_quotes_for_submission, submission_id)
+    coins_count, coins_df = statement_counter(database_queries.get_coinsurance_details, policy_id)
+    tower_count, (treaty, tower_df) = statement_counter(database_queries.get_reinsurance_tower, policy_id)
+    subro_count, (subro, liable) = statement_counter(database_queries.get_claim_subrogation, claim_id)
+
+    assert len(quotes_df) == rows
+    assert len(coins_df) == rows
+    assert len(tower_df) == rows
+    assert tower_df['Participants'].iloc[-1].count('%') == rows
+    assert liable.name == 'Liable GmbH'
+    return quotes_count, coins_count, tower_count, subro_count
+
+
+def test_helpers_issue_constant_statement_count(statement_counter):
+    small = _counts_for(statement_counter, 2)
+    large = _counts_for(statement_counter, 10)
+    assert small == large
+    assert small == (2, 2, 1, 2)
+
+
+def test_bulk_towers_use_one_statement(statement_counter):
+    session = database_queries.get_session()
+    policy_ids = [_seed(session, rows)[1] for rows in (2, 3, 5)]
+    session.close()
+
+    count, towers = statement_counter(database_queries.get_reinsurance_towers, policy_ids)
+    assert count == 1
+    assert [len(towers[pid][1]) for pid in policy_ids] == [2, 3, 5]
+
+    tower = database_queries.build_reinsurance_tower(policy_ids[-1])
+    assert tower['layers']['participant_count'] == [5] * 5
+    assert tower['layers']['placed_share'] == pytest.approx([100.0] * 5)
+
+
+def test_tower_lists_participants_in_participant_order(statement_counter):
+    session = database_queries.get_session()
+    policy = Policy(policy_number='POL-ORDER', effective_date=datetime.date(2026, 1, 1),
+                    expiration_date=datetime.date(2026, 12, 31))
+    session.add(policy)
+    session.flush()
+    treaty = ReinsuranceTreaty(policy_id=policy.id, description='Tower')
+    session.add(treaty)
+    session.flush()
+    layers = [ReinsuranceLayer(treaty_id=treaty.id, layer_order=order, attachment_point=order * 1e6, layer_limit=1e6)
+              for order in (1, 2)]
+    session.add_all(layers)
+    # Reinsurer ids run against participant ids, so neither the party nor the name order fits by chance
+    reinsurers = [_party(session, name) for name in ('Zurich Re', 'Munich Re', 'Swiss Re', 'Hannover Re')][::-1]
+    shares = (25.0, 40.0, 10.0, 25.0)
+    for reinsurer, share in zip(reinsurers, shares):
+        session.add(LayerParticipant(layer_id=layers[0].id, reinsurer_party_id=reinsurer.id, share_percentage=share))
+        session.flush()
+    # As the per-participant loop formatted them, in LayerParticipant.id order; layer 2 is unplaced
+    expected = [', '.join(f"{reinsurer.name} ({share}%)" for reinsurer, share in zip(reinsurers, shares)), '']
+    policy_id = policy.id
+    session.commit()
+    session.close()
+
+    treaty, tower_df = database_queries.get_reinsurance_tower(policy_id)
+    assert tower_df['Participants'].tolist() == expected
+
+
+def test_customer_portfolio_uses_constant_statements(statement_counter):
+    session = database_queries.get_session()
+    customer = _party(session, 'Maria Weber')
+    insurer = _party(session, 'Dräum Versicherung AG')
+    counts = []
+    for previous, total in ((0, 2), (2, 10)):
+        for i in range(previous, total):
+            policy = Policy(policy_number=f'POL-C-{i}', effective_date=datetime.date(2026, 1, 1),
+                            expiration_date=datetime.date(2026, 12, 31))
+            session.add(policy)
+            session.flush()
+            session.add(Coverage(policy_id=policy.id, coverage_type='Home', limit_amount=1e5, deductible_amount=500))
+            session.add(InsurableAsset(policy_id=policy.id, asset_type='Building'))
+            session.add(PartyRole(party_id=customer.id, role_name='Insured', context_table='policy', context_id=policy.id))
+            session.add(PartyRole(party_id=insurer.id, role_name='Insurer', context_table='policy', context_id=policy.id))
+        session.commit()
+
+        count, portfolio = statement_counter(database_queries.get_customer_portfolio, customer.id)
+        counts.append(count)
+        assert len(portfolio['policies']) == total
+        assert all(portfolio['insurers'][p.id].name == insurer.name for p in portfolio['policies'])
+        assert all(p.coverages[0].coverage_type == 'Home' and p.assets for p in portfolio['policies'])
+    session.close()
+    assert counts[0] == counts[1] == 4
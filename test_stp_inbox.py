@@ -0,0 +1,154 @@
+"""Incremental refresh checks for the STP inbox.
+
+A refresh must classify only the messages above the high-water mark and
+end up with the same classifications and totals as a full rebuild.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+from sqlalchemy import create_engine
+
+import database_queries
+import stp_inbox
+from seed_database import Base, Party, CustomerUser, ChatMessage, StpClassification, StpInboxState
+
+REQUESTS = [
+    "I need a quote for travel insurance to Japan",
+    "Can I insure my dog? Pet insurance please",
+    "Life insurance for my family",
+    "Home contents cover for my flat",
+    "What do you offer?",
+    "Travel and life insurance bundle",
+]
+
+
+@pytest.fixture
+def inbox_db(tmp_path, monkeypatch):
+    """A scratch database shared with stp_inbox, two customers, and a log of classified batch sizes."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'stp_inbox.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database_queries, 'Session', database_queries.sessionmaker(bind=engine))
+
+    classified = []
+    classify = stp_inbox.classify_messages
+
+    def counting_classify(messages):
+        classified.append(len(messages))
+        return classify(messages)
+
+    monkeypatch.setattr(stp_inbox, 'classify_messages', counting_classify)
+
+    session = database_queries.get_session()
+    users = []
+    for name in ('Maria Weber', 'Jonas Keller'):
+        party = Party(party_type='PERSON', name=name)
+        session.add(party)
+        session.flush()
+        user = CustomerUser(party_id=party.id, email=f"{name.split()[0].lower()}@example.com", password_hash='x')
+        session.add(user)
+        session.flush()
+        users.append(user.id)
+    session.commit()
+    yield session, users, classified
+    session.close()
+    engine.dispose()
+
+
+def _ask(session, user_id, *messages):
+    session.add_all([ChatMessage(user_id=user_id, message=message, response='Quote ready', is_user=True)
+                     for message in messages])
+    session.commit()
+
+
+def _classifications(session, user_id):
+    session.expire_all()
+    return [(row.chat_message_id, row.product_type, row.decision, row.premium)
+            for row in session.query(StpClassification).filter_by(user_id=user_id)
+            .order_by(StpClassification.chat_message_id)]
+
+
+def _rebuilt(session, user_id):
+    """Totals and rows from classifying the user's whole history again."""
+    stp_inbox.reset_stp_inbox(session, user_id)
+    session.commit()
+    return stp_inbox.refresh_stp_inbox(user_id), _classifications(session, user_id)
+
+
+def test_refresh_classifies_only_new_messages(inbox_db):
+    session, (maria, jonas), classified = inbox_db
+    _ask(session, maria, *REQUESTS)
+    _ask(session, jonas, "Pet insurance for two cats")
+
+    totals = stp_inbox.refresh_stp_inbox(maria)
+    assert classified == [len(REQUESTS)]
+    assert totals['total_quotes'] == 6
+    # The first product in PRODUCTS order wins, so the bundle is a Travel quote
+    assert (totals['stp_count'], totals['referred_count']) == (5, 1)
+    # "What do you offer?" is auto-approved but is not a product quote for the STP rate
+    assert totals['general_count'] == 1
+    assert totals['premium_sum'] == 89 + 145 + 450 + 320 + 127 + 89
+
+    # Nothing new: no classification at all
+    classified.clear()
+    assert stp_inbox.refresh_stp_inbox(maria) == totals
+    assert classified == []
+
+    # One new submission (and another customer's) classifies just that row
+    _ask(session, maria, "Life cover for my mortgage")
+    _ask(session, jonas, "Travel insurance for a ski trip")
+    totals = stp_inbox.refresh_stp_inbox(maria)
+    assert classified == [1]
+    assert totals['total_quotes'] == 7
+    assert totals['referred_count'] == 2
+    rows = _classifications(session, maria)
+    assert rows[-1][1:] == ('Life', 'Referred', 450.0)
+
+    classified.clear()
+    assert _rebuilt(session, maria) == (totals, rows)
+    assert classified == [7]
+    assert _classifications(session, jonas) == []  # that inbox was never refreshed
+
+
+def test_backfill_in_batches_matches_one_pass(inbox_db, monkeypatch):
+    session, (maria, _), classified = inbox_db
+    _ask(session, maria, *(REQUESTS * 3))
+    monkeypatch.setattr(stp_inbox, 'CLASSIFY_BATCH_SIZE', 4)
+
+    totals = stp_inbox.refresh_stp_inbox(maria)
+    assert classified == [4, 4, 4, 4, 2]
+    rows = _classifications(session, maria)
+
+    monkeypatch.setattr(stp_inbox, 'CLASSIFY_BATCH_SIZE', 5000)
+    assert _rebuilt(session, maria) == (totals, rows)
+
+
+def test_deleted_history_rebuilds(inbox_db):
+    session, (maria, _), classified = inbox_db
+    _ask(session, maria, *REQUESTS)
+    stp_inbox.refresh_stp_inbox(maria)
+
+    # Dropping the newest messages puts the mark above the history, which forces a rebuild
+    for message in session.query(ChatMessage).filter_by(user_id=maria).order_by(ChatMessage.id.desc()).limit(2):
+        session.delete(message)
+    session.commit()
+    classified.clear()
+    totals = stp_inbox.refresh_stp_inbox(maria)
+    assert classified == [4]
+    assert totals['total_quotes'] == 4
+    assert totals['last_message_id'] == max(row[0] for row in _classifications(session, maria))
+    assert _rebuilt(session, maria)[0] == totals
+
+
+def test_totals_from_before_general_count_rebuild(inbox_db):
+    session, (maria, _), classified = inbox_db
+    _ask(session, maria, *REQUESTS)
+    totals = stp_inbox.refresh_stp_inbox(maria)
+
+    session.get(StpInboxState, maria).general_count = None
+    session.commit()
+    classified.clear()
+    assert stp_inbox.refresh_stp_inbox(maria) == totals
+    assert classified == [len(REQUESTS)]
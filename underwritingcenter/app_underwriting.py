@@ -13,11 +13,8 @@ This demo showcases:
 
 import streamlit as st
 import streamlit.components.v1 as components
-import pandas as pd
-import altair as alt
 import sys
 import os
-import time
 import datetime
 import base64
 import textwrap
@@ -27,9 +24,16 @@ import json
 # Add parent directory to path to import database modules
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from database_queries import get_session
+from sqlalchemy.orm import aliased
+from database_queries import get_session, search_text
+from kpi_engine import get_dashboard_kpis
+from sql_profiler import start_run, render_profile_panel
 from seed_database import Submission, Party, Quote
 from market_config import detect_market, get_market_content, format_currency
+from chat_intents import route_intent
+
+# Opt-in SQL profiling of this rerun (PNC_SQL_PROFILE=1)
+sql_profile = start_run('underwriting_center')
 
 # === HELPER FUNCTIONS FOR LOADING MODAL ===
 
@@ -44,12 +48,33 @@ def get_gif_as_base64(file_path):
         st.error(f"Error reading GIF file: {e}")
         return None
 
-def get_modal_html(gif_base64, text):
+def get_modal_html(gif_base64, steps, step_ms=0):
     """
     Generates JavaScript that appends/updates the loading modal in the document body.
     Ensures the overlay remains centered in the viewport even when scrolling.
+    
+    With step_ms > 0 the step texts are advanced and the overlay removed by timers
+    injected into the parent page, so the simulated latency runs in the browser and
+    survives the next rerun instead of holding the script thread.
     """
+    text = steps[0] if steps else ''
     safe_text = json.dumps(text)
+    parent_timer_js = json.dumps(f"""
+    (function() {{
+        var steps = {json.dumps(list(steps))};
+        var stepMs = {int(step_ms)};
+        steps.forEach(function(text, i) {{
+            setTimeout(function() {{
+                var el = document.getElementById('gw-loading-text');
+                if (el) {{ el.textContent = text; }}
+            }}, i * stepMs);
+        }});
+        setTimeout(function() {{
+            var overlay = document.getElementById('gw-loading-overlay');
+            if (overlay) {{ overlay.remove(); }}
+        }}, steps.length * stepMs);
+    }})();
+    """) if step_ms > 0 else 'null'
     return f"""
     <script>
     (function() {{
@@ -108,51 +133,77 @@ def get_modal_html(gif_base64, text):
                 textEl.textContent = {safe_text};
             }}
         }}
+
+        const timerJs = {parent_timer_js};
+        if (timerJs) {{
+            const script = doc.createElement('script');
+            script.textContent = timerJs;
+            doc.body.appendChild(script);
+        }}
     }})();
     </script>
     """
 
-def show_loading_modal(steps, duration_per_step=1.5):
+# Simulated latency per loading-modal step, in seconds. The default of zero frees the
+# script thread immediately; set UW_SIMULATED_LATENCY=1.5 for presenter-paced demos.
+SIMULATED_STEP_LATENCY = float(os.environ.get('UW_SIMULATED_LATENCY', '0'))
+
+REMOVE_MODAL_HTML = """
+<script>
+(function() {
+    const doc = window.parent && window.parent.document ? window.parent.document : document;
+    const overlay = doc.getElementById('gw-loading-overlay');
+    if (overlay) {
+        overlay.remove();
+    }
+})();
+</script>
+"""
+
+def show_loading_modal(steps, work=None, duration_per_step=None):
     """
-    Display a loading modal with animated GIF and changing text messages.
+    Display the loading modal with animated GIF while the real work runs.
+    
+    The work runs inline on the script thread: each step is a short DB update whose
+    result the caller needs before it reruns, so there is nothing to overlap.
     
     Args:
         steps: List of text messages to display sequentially
-        duration_per_step: Duration (in seconds) to display each step
+        work: Optional list of callables (DB updates, quote generation, content lookups)
+              run in order while the modal is shown
+        duration_per_step: Simulated seconds per step; animated client-side, so the
+              script thread never sleeps (defaults to SIMULATED_STEP_LATENCY)
     
     Returns:
-        The placeholder object (for potential cleanup)
+        List with the result of each callable in `work`
     """
+    if duration_per_step is None:
+        duration_per_step = SIMULATED_STEP_LATENCY
+    step_ms = int(duration_per_step * 1000)
+    
     # Get the GIF as base64
     gif_path = os.path.join(os.path.dirname(__file__), 'logo-moving.gif')
     gif_base64 = get_gif_as_base64(gif_path)
     
-    if not gif_base64:
-        return None
+    if gif_base64:
+        components.html(get_modal_html(gif_base64, steps, step_ms), height=0, width=0)
     
+    results = []
     try:
-        # Loop through each step and update the overlay text
-        for text in steps:
-            modal_html = get_modal_html(gif_base64, text)
-            components.html(modal_html, height=0, width=0)
-            time.sleep(duration_per_step)
+        for i, fn in enumerate(work or []):
+            # Without simulated latency, the modal text tracks the real progress
+            if gif_base64 and step_ms == 0 and 0 < i < len(steps):
+                components.html(get_modal_html(gif_base64, [steps[i]]), height=0, width=0)
+            results.append(fn())
     finally:
-        # Remove overlay after completion
-        components.html(
-            """
-            <script>
-            (function() {
-                const doc = window.parent && window.parent.document ? window.parent.document : document;
-                const overlay = doc.getElementById('gw-loading-overlay');
-                if (overlay) {
-                    overlay.remove();
-                }
-            })();
-            </script>
-            """,
-            height=0,
-            width=0
-        )
+        # Timed modals remove themselves in the browser
+        if gif_base64 and step_ms == 0:
+            components.html(REMOVE_MODAL_HTML, height=0, width=0)
+    return results
+
+def flash_success(message):
+    """Queue a success message for the next rerun instead of sleeping so it stays visible"""
+    st.session_state.flash_message = message
 
 # === PAGE CONFIG ===
 st.set_page_config(
@@ -606,35 +657,15 @@ st.markdown("""
 # Initialize database on first run or if missing
 @st.cache_resource
 def initialize_database():
-    """Initialize the database with German SHUK demo data (default)"""
+    """Initialize the database with German SHUK demo data (default)
+
+    Once per server process; a file already stamped with the current schema
+    version costs one PRAGMA read, and the seed module is only imported to
+    fill an empty database.
+    """
     try:
-        # Add src to path if not already there
-        src_path = os.path.join(os.path.dirname(__file__), '..', 'src')
-        if src_path not in sys.path:
-            sys.path.insert(0, src_path)
-        
-        # Import necessary modules
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import Session
-        from seed_database import Base, Party
-        from seed_data_german import seed_german_data
-        
-        # Create database and tables
-        db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'pnc_demo.db'))
-        engine = create_engine(f'sqlite:///{db_path}')
-        
-        # Create all tables
-        Base.metadata.create_all(engine)
-        
-        # Check if database is already populated
-        session = Session(engine)
-        party_count = session.query(Party).count()
-        
-        if party_count == 0:
-            # Database is empty, seed it with German market data (default)
-            seed_german_data(session)
-        
-        session.close()
+        from init_db import init_database
+        init_database()
         return True
     except Exception as e:
         st.error(f"❌ Failed to initialize database: {str(e)}")
@@ -655,22 +686,6 @@ if 'current_screen' not in st.session_state:
 if 'selected_submission' not in st.session_state:
     st.session_state.selected_submission = None
 
-# Dashboard KPIs state
-if 'dashboard_kpis' not in st.session_state:
-    st.session_state.dashboard_kpis = {
-        'turnaround_time': 4.1,
-        'hit_ratio': 32,
-        'earned_premium': 1.65,
-        'loss_ratio': 49
-    }
-
-# Dashboard chart data
-if 'chart_data' not in st.session_state:
-    st.session_state.chart_data = {
-        'hit_ratio_q4': 32,
-        'premium_q4': 1.65
-    }
-
 # Submission detail state (for Floor & Decor demo)
 if 'submission_state' not in st.session_state:
     # Default to German market endorsements (will be updated when viewing specific submission)
@@ -694,11 +709,6 @@ if 'submission_state' not in st.session_state:
         'bind_suppressed': False
     }
 
-# Loading modal state
-if 'show_loading' not in st.session_state:
-    st.session_state.show_loading = False
-    st.session_state.loading_message = ""
-
 # Chatbot state
 if 'chat_messages' not in st.session_state:
     st.session_state.chat_messages = []
@@ -707,14 +717,6 @@ if 'show_welcome' not in st.session_state:
 
 # === HELPER FUNCTIONS ===
 
-def show_loading(message, duration=2):
-    """Display a loading modal for specified duration"""
-    st.session_state.show_loading = True
-    st.session_state.loading_message = message
-    time.sleep(duration)
-    st.session_state.show_loading = False
-    st.rerun()
-
 def get_status_badge(status):
     """Return formatted status badge with emoji"""
     status_upper = status.upper()
@@ -747,10 +749,23 @@ def get_appetite_badge(appetite):
 
 # === DATABASE FUNCTIONS ===
 
-def get_all_submissions():
-    """Fetch all submissions from database"""
+@st.cache_resource(show_spinner=False)
+def get_submission_index():
+    """
+    Load every submission in one query and index it for the dashboard and chatbot.
+    
+    Cached across reruns; update_submission_status/update_submission_accepted and
+    the demo reset call invalidate_submission_index() after writing.
+    
+    Returns:
+        dict with 'all' (list of submission dicts), 'by_id', 'by_number'
+        (upper-cased submission number) and the status buckets 'active',
+        'quoted' (accepted and ready to bind), 'in_progress', 'bound', 'declined'
+    """
+    insured = aliased(Party)
+    broker = aliased(Party)
     session = get_session()
-    submissions = session.query(Submission).join(Party, Submission.insured_party_id == Party.id).add_columns(
+    rows = session.query(
         Submission.id,
         Submission.submission_number,
         Submission.status,
@@ -760,34 +775,67 @@ def get_all_submissions():
         Submission.broker_tier,
         Submission.effective_date,
         Submission.accepted,
-        Party.name.label('account_name')
-    ).all()
+        insured.name.label('account_name'),
+        insured.country.label('account_country'),
+        broker.name.label('broker_name')
+    ).join(
+        insured, Submission.insured_party_id == insured.id
+    ).outerjoin(
+        broker, Submission.broker_party_id == broker.id
+    ).order_by(Submission.id).all()
+    session.close()
     
-    # Also get broker info
-    result_data = []
+    submissions = [{
+        'id': row.id,
+        'submission_number': row.submission_number,
+        'account_name': row.account_name,
+        'account_country': row.account_country or '',
+        'status': row.status,
+        'broker': row.broker_name or '',
+        'broker_tier': row.broker_tier or '',
+        'effective_date': row.effective_date,
+        'priority_score': row.priority_score,
+        'completeness': row.completeness,
+        'risk_appetite': row.risk_appetite or '',
+        'accepted': bool(row.accepted)
+    } for row in rows]
+    
+    index = {
+        'all': submissions,
+        'by_id': {sub['id']: sub for sub in submissions},
+        'by_number': {sub['submission_number'].upper(): sub for sub in submissions if sub['submission_number']},
+        'active': [],
+        'quoted': [],
+        'in_progress': [],
+        'bound': [],
+        'declined': []
+    }
     for sub in submissions:
-        broker_name = ""
-        if sub.Submission.broker_party_id:
-            broker = session.query(Party).get(sub.Submission.broker_party_id)
-            if broker:
-                broker_name = broker.name
-        
-        result_data.append({
-            'id': sub.id,
-            'submission_number': sub.submission_number,
-            'account_name': sub.account_name,
-            'status': sub.status,
-            'broker': broker_name,
-            'broker_tier': sub.broker_tier or '',
-            'effective_date': sub.effective_date,
-            'priority_score': sub.priority_score,
-            'completeness': sub.completeness,
-            'risk_appetite': sub.risk_appetite or '',
-            'accepted': sub.accepted if hasattr(sub, 'accepted') else False
-        })
-    
-    session.close()
-    return result_data
+        status = sub['status'].upper()
+        if status == 'BOUND':
+            index['bound'].append(sub)
+        elif status == 'DECLINED':
+            index['declined'].append(sub)
+        else:
+            index['active'].append(sub)
+            # Only quoted submissions that were sent to the broker are ready to bind
+            if status == 'QUOTED' and sub['accepted']:
+                index['quoted'].append(sub)
+            else:
+                index['in_progress'].append(sub)
+    return index
+
+def invalidate_submission_index():
+    """Drop the cached submission index so the next read reloads it"""
+    get_submission_index.clear()
+
+def get_all_submissions():
+    """Fetch all submissions (served from the cached submission index)"""
+    return get_submission_index()['all']
+
+def find_submission_by_number(submission_number):
+    """Look up a submission dict by its number (case-insensitive)"""
+    return get_submission_index()['by_number'].get((submission_number or '').upper())
 
 def get_submission_details(submission_id):
     """Fetch detailed submission information"""
@@ -820,6 +868,7 @@ def update_submission_status(submission_id, status, completeness=None):
                 submission.completeness = completeness
             session.commit()
             session.close()
+            invalidate_submission_index()
             return True
     except Exception as e:
         session.rollback()
@@ -837,6 +886,7 @@ def update_submission_accepted(submission_id, accepted=True):
             submission.accepted = accepted
             session.commit()
             session.close()
+            invalidate_submission_index()
             return True
     except Exception as e:
         session.rollback()
@@ -846,52 +896,25 @@ def update_submission_accepted(submission_id, accepted=True):
     return False
 
 def reset_demo_database(market='german'):
-    """Reset the database to demo state by running seed script with market selection"""
-    import subprocess
-    import sys
-    
-    # Get paths
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(current_dir)
-    seed_script = os.path.join(project_root, "src", "seed_database.py")
-    
-    # Run seed script with market parameter
-    result = subprocess.run(
-        [sys.executable, seed_script, market],
-        capture_output=True,
-        text=True,
-        cwd=project_root
-    )
-    
-    if result.returncode == 0:
-        market_name = "German SHUK" if market == 'german' else "U.S. Workers' Compensation"
-        return True, f"Database reset successfully with {market_name} data! ✨"
-    else:
-        return False, result.stderr
+    """Reset the database to demo state by restoring the market's golden snapshot"""
+    from db_snapshot import restore_snapshot
+    
+    try:
+        restore_snapshot(market)
+    except Exception as e:
+        return False, str(e)
+    invalidate_submission_index()
+    
+    market_name = "German SHUK" if market == 'german' else "U.S. Workers' Compensation"
+    return True, f"Database reset successfully with {market_name} data! ✨"
 
 # === SCREEN COMPONENTS ===
 
-def render_loading_modal():
-    """Render loading modal if active"""
-    if st.session_state.show_loading:
-        st.markdown(f"""
-        <div class="loading-overlay">
-            <div class="loading-content">
-                <h3>⏳ {st.session_state.loading_message}</h3>
-                <p>Please wait...</p>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-def stream_text(text, delay=0.02):
-    """Stream text character by character for a more dynamic feel"""
-    placeholder = st.empty()
-    displayed_text = ""
-    for char in text:
-        displayed_text += char
-        placeholder.markdown(displayed_text)
-        time.sleep(delay)
-    return placeholder
+def render_flash_message():
+    """Show the success message queued by flash_success before the last rerun"""
+    message = st.session_state.pop('flash_message', None)
+    if message:
+        st.toast(message)
 
 def render_chatbot_sidebar():
     """Render the AI underwriting assistant chatbot in the sidebar with popover-style features"""
@@ -1737,9 +1760,42 @@ Some things you could commonly ask for:
             
             st.rerun()
 
-def generate_ai_response(user_input):
+SEARCH_RESULT_LABELS = {
+    'german': {'claim_detail': 'Schadenprotokoll', 'claim': 'Schaden', 'chat_message': 'Chatverlauf', 'document': 'Dokument'},
+    'us': {'claim_detail': 'Claim log', 'claim': 'Claim', 'chat_message': 'Chat history', 'document': 'Document'},
+}
+
+def format_search_response(search_terms, market):
+    """
+    Answer a "search ..." chat message with ranked full-text hits.
+
+    Args:
+        search_terms: Text after the search keyword
+        market: 'german' or 'us', for the response language
+
+    Returns:
+        Markdown response listing the best matches with highlighted snippets
+    """
+    german = market == 'german'
+    if not search_terms:
+        return ("Wonach soll ich suchen? Zum Beispiel: *Suche Wasserschaden*" if german
+                else "What should I search for? For example: *search water damage*")
+    
+    hits = search_text(search_terms, limit=8)
+    if not hits:
+        return (f'Keine Treffer für "{search_terms}" in Schäden, Dokumenten oder Chatverläufen.' if german
+                else f'No matches for "{search_terms}" in claims, documents or chat history.')
+    
+    labels = SEARCH_RESULT_LABELS['german' if german else 'us']
+    header = f'**Treffer für "{search_terms}":**' if german else f'**Results for "{search_terms}":**'
+    lines = [f"• *{labels[hit['entity']]}* {hit['label']}: {hit['snippet']}" for hit in hits]
+    return header + "\n\n" + "\n".join(lines)
+
+def generate_ai_response(user_input, route=None):
     """Generate contextual AI responses based on user input"""
-    user_input_lower = user_input.lower()
+    if route is None:
+        route = route_intent(user_input)
+    intent = route['intent']
     
     # Detect market from database
     all_submissions = get_all_submissions()
@@ -1749,8 +1805,11 @@ def generate_ai_response(user_input):
         current_market = detect_market(first_sub['submission_number'], first_sub.get('account_country', ''))
     
     # Contextual responses
+    if intent == 'search':
+        return format_search_response(route['search_terms'], current_market)
+    
     # Check for "update" variations first (before catch me up)
-    if any(word in user_input_lower for word in ['update', 'updates', 'updated', 'updating']):
+    elif intent == 'update':
         # Store submission cards in session state for rendering
         if 'chat_submission_cards' not in st.session_state:
             st.session_state.chat_submission_cards = []
@@ -1775,14 +1834,14 @@ def generate_ai_response(user_input):
         
         return """<!--SUBMISSION_CARDS_START-->"""
     
-    elif 'catch' in user_input_lower or 'summary' in user_input_lower:
+    elif intent == 'catch_up':
         # Store submission cards in session state for rendering
         if 'chat_submission_cards' not in st.session_state:
             st.session_state.chat_submission_cards = []
         
         # Determine if key submission is already quoted/bind-ready
         target_submission_number = 'SUB-2026-001-DE' if current_market == 'german' else 'SUB-2026-001'
-        target_submission = next((sub for sub in all_submissions if sub.get('submission_number', '').upper() == target_submission_number.upper()), None)
+        target_submission = find_submission_by_number(target_submission_number)
         target_status = (target_submission.get('status', '') if target_submission else '').upper()
         ready_to_bind_statuses = {'QUOTED', 'READY TO BIND', 'BINDABLE'}
 
@@ -1854,7 +1913,7 @@ def generate_ai_response(user_input):
 
 <!--SUBMISSION_CARDS_START-->"""
     
-    elif ('action' in user_input_lower or 'priority' in user_input_lower or 'todo' in user_input_lower or 'aktionsliste' in user_input_lower):
+    elif intent == 'priority':
         if current_market == 'german':
             return """**Ihre Prioritätenliste:**
 
@@ -1888,7 +1947,7 @@ Soll ich Ihnen zuerst mit Möbel & Wohnen Schmidt helfen?"""
 
 Shall I help you with Floor & Decor first?"""
     
-    elif ('help' in user_input_lower or 'what can' in user_input_lower or 'metriken' in user_input_lower or 'hilfe' in user_input_lower):
+    elif intent == 'help':
         if current_market == 'german':
             return """Ich kann Ihnen helfen bei:
 
@@ -1904,6 +1963,7 @@ Shall I help you with Floor & Decor first?"""
 
 **Schnellaktionen:**
 • Bestimmte Einreichungen öffnen
+• Schäden, Dokumente und Chats durchsuchen ("Suche Wasserschaden")
 • Angebote erstellen
 • Erinnerungen an Makler senden
 
@@ -1923,12 +1983,13 @@ Fragen Sie mich einfach!"""
 
 **Quick Actions:**
 • Open specific submissions
+• Search claims, documents and chats ("search water damage")
 • Generate quotes
 • Send reminders to brokers
 
 Just ask me anything!"""
     
-    elif 'floor' in user_input_lower or '2026-001' in user_input_lower:
+    elif intent == 'company_info' and route['submission_number'] == 'SUB-2026-001':
         return """**Floor & Decor Outlets (SUB-2026-001):**
 
 📊 **Status:** Triaged (74% complete)
@@ -1970,39 +2031,21 @@ How can I assist you?"""
 
 def generate_ai_response_with_navigation(user_input):
     """Generate AI response and detect navigation triggers"""
-    user_input_lower = user_input.lower()
     navigation_action = None
     
-    # Check for submission number patterns (e.g., "SUB-2026-001", "2026-001", "open submission 001")
-    import re
-    submission_match = re.search(r'sub-?(\d{4})-?(\d{3})', user_input_lower) or \
-                      re.search(r'(\d{4})-(\d{3})', user_input_lower) or \
-                      re.search(r'submission\s+(\d{3})', user_input_lower) or \
-                      re.search(r'open\s+(\d{3})', user_input_lower)
-    
-    if submission_match:
-        # Extract submission number
-        if len(submission_match.groups()) == 2:
-            year, num = submission_match.groups()
-            submission_number = f"SUB-{year}-{num}"
-        else:
-            num = submission_match.groups()[0]
-            submission_number = f"SUB-2026-{num.zfill(3)}"
-        
+    # One pass over the message for intent, submission number and company
+    route = route_intent(user_input)
+    
+    if route['intent'] == 'open_submission':
+        submission_number = route['submission_number']
         navigation_action = {'type': 'open_submission', 'submission_number': submission_number}
-        response = f"Opening submission {submission_number} for you..."
-    elif 'open' in user_input_lower and ('floor' in user_input_lower or 'decor' in user_input_lower):
-        navigation_action = {'type': 'open_submission', 'submission_number': 'SUB-2026-001'}
-        response = "Opening Floor & Decor submission (SUB-2026-001)..."
-    elif 'open' in user_input_lower and ('monrovia' in user_input_lower or 'metalworking' in user_input_lower):
-        navigation_action = {'type': 'open_submission', 'submission_number': 'SUB-2026-003'}
-        response = "Opening Monrovia Metalworking submission (SUB-2026-003)..."
-    elif 'open' in user_input_lower and ('construction' in user_input_lower or 'dynamics' in user_input_lower):
-        navigation_action = {'type': 'open_submission', 'submission_number': 'SUB-2026-007'}
-        response = "Opening Construction Dynamics submission (SUB-2026-007)..."
+        if route['company']:
+            response = f"Opening {route['company']} submission ({submission_number})..."
+        else:
+            response = f"Opening submission {submission_number} for you..."
     else:
         # Use regular response generator
-        response = generate_ai_response(user_input)
+        response = generate_ai_response(user_input, route)
     
     return response, navigation_action
 
@@ -2011,15 +2054,8 @@ def handle_chat_navigation(navigation_action):
     if navigation_action['type'] == 'open_submission':
         submission_number = navigation_action['submission_number']
         
-        # Get all submissions to find the matching one
-        all_submissions = get_all_submissions()
-        
-        # Find submission by number
-        matching_sub = None
-        for sub in all_submissions:
-            if sub.get('submission_number', '').upper() == submission_number.upper():
-                matching_sub = sub
-                break
+        # Find submission by number in the cached index
+        matching_sub = find_submission_by_number(submission_number)
         
         if matching_sub:
             # Set selected submission and navigate to detail page
@@ -2029,8 +2065,22 @@ def handle_chat_navigation(navigation_action):
         else:
             st.warning(f"Submission {submission_number} not found.")
 
+# Dashboard KPI targets: the turnaround note, the hit ratio "good" line and the loss ratio card's reference
+TURNAROUND_TARGET_DAYS = 4.0
+HIT_RATIO_GOOD = 26
+LOSS_RATIO_TARGET = 51
+
+# Premium and loss charts in place of empty axes while no policy has earned premium
+NO_POLICY_DATA_HTML = """
+<div style="text-align: center; padding: 80px 10px; color: #6b7280;">No data: no premium earned yet</div>
+"""
+
 def render_dashboard():
     """Render the main dashboard screen"""
+    # Only the dashboard's charts and tables need these; the submission screens load without them
+    import pandas as pd
+    import altair as alt
+    
     # Render chatbot sidebar with popover-style features
     render_chatbot_sidebar()
     
@@ -2210,49 +2260,61 @@ def render_dashboard():
     dashboard_currency = '€' if dashboard_market == 'german' else '$'
     
     # === TOP KPI ROW ===
+    # Computed from the kpi_rollup table, so binds and new quotes show up on the next rerun
+    kpis = get_dashboard_kpis(market=dashboard_market)
+    since = f"from {kpis['previous_quarter'][-2:]}"
+
+    # Empty measures get an explicit "No data" and no delta line
+    def kpi_delta(change, unit, label, decimals=1):
+        if change is None:
+            return "&nbsp;"
+        arrow = "⬆️" if change >= 0 else "⬇️"
+        return f"{arrow} {change:+.{decimals}f}{unit} {label}"
+
+    def kpi_value(value, template):
+        return "No data" if value is None else template.format(value)
+
     kpi_col1, kpi_col2, kpi_col3, kpi_col4 = st.columns(4)
     
     with kpi_col1:
-        turnaround_delta = "⬇️ -0.2 days" if st.session_state.dashboard_kpis['turnaround_time'] == 3.9 else "⬇️ -0.1 days"
+        turnaround_delta = kpi_delta(kpis['turnaround_change'], ' days', since)
         st.markdown(f"""
         <div class="kpi-card">
             <div class="kpi-title">Quote Turnaround Time</div>
-            <div class="kpi-value">{st.session_state.dashboard_kpis['turnaround_time']} Days</div>
+            <div class="kpi-value">{kpi_value(kpis['turnaround_days'], '{:.1f} Days')}</div>
             <div class="kpi-delta">{turnaround_delta}</div>
         </div>
         """, unsafe_allow_html=True)
     
     with kpi_col2:
-        if st.session_state.dashboard_kpis['hit_ratio'] == 37:
-            hit_ratio_delta = "⬆️ +2% from Q3"
-        elif st.session_state.chart_data['hit_ratio_q4'] == 32:
-            hit_ratio_delta = "⬇️ -3% from Q3"
-        else:
-            hit_ratio_delta = "⬆️ +2% from Q3"
+        hit_ratio_delta = kpi_delta(kpis['hit_ratio_change'], '%', since, decimals=0)
         st.markdown(f"""
         <div class="kpi-card">
             <div class="kpi-title">Average Hit Ratio</div>
-            <div class="kpi-value">{st.session_state.dashboard_kpis['hit_ratio']}%</div>
+            <div class="kpi-value">{kpi_value(kpis['hit_ratio'], '{:.0f}%')}</div>
             <div class="kpi-delta">{hit_ratio_delta}</div>
         </div>
         """, unsafe_allow_html=True)
     
     with kpi_col3:
-        premium_delta = "⬆️ +15% YTD" if st.session_state.dashboard_kpis['earned_premium'] == 1.85 else "⬆️ +12% YTD"
+        premium_delta = kpi_delta(kpis['earned_premium_growth'], '%', 'YTD', decimals=0)
+        earned_millions = None if kpis['earned_premium'] is None else kpis['earned_premium'] / 1e6
         st.markdown(f"""
         <div class="kpi-card">
             <div class="kpi-title">Cumulative Earned Premium</div>
-            <div class="kpi-value">{dashboard_currency}{st.session_state.dashboard_kpis['earned_premium']}M</div>
+            <div class="kpi-value">{kpi_value(earned_millions, dashboard_currency + '{:.2f}M')}</div>
             <div class="kpi-delta">{premium_delta}</div>
         </div>
         """, unsafe_allow_html=True)
     
     with kpi_col4:
+        loss_ratio_change = None if kpis['loss_ratio'] is None else kpis['loss_ratio'] - LOSS_RATIO_TARGET
+        loss_ratio_delta = kpi_delta(loss_ratio_change, '%', 'from target', decimals=0)
         st.markdown(f"""
         <div class="kpi-card">
             <div class="kpi-title">In Force Loss Ratio</div>
-            <div class="kpi-value">{st.session_state.dashboard_kpis['loss_ratio']}%</div>
-            <div class="kpi-delta">⬇️ -2% from target</div>
+            <div class="kpi-value">{kpi_value(kpis['loss_ratio'], '{:.0f}%')}</div>
+            <div class="kpi-delta">{loss_ratio_delta}</div>
         </div>
         """, unsafe_allow_html=True)
     
@@ -2261,28 +2323,27 @@ def render_dashboard():
     
     with chart_col1:
         # Quote Turnaround Time - simple display with trend indicator
-        st.markdown("""
+        st.markdown(f"""
         <div style="text-align: center; padding: 10px;">
-            <p style="color: #6b7280; margin: 0;">Target: 4.0 days</p>
+            <p style="color: #6b7280; margin: 0;">Target: {TURNAROUND_TARGET_DAYS:.1f} days</p>
         </div>
         """, unsafe_allow_html=True)
     
     with chart_col2:
         # Average Hit Ratio - Bar chart
         hit_ratio_data = pd.DataFrame({
-            'Quarter': ['Q1', 'Q2', 'Q3', 'Q4'],
-            'Hit Ratio %': [19, 24, 35, st.session_state.chart_data['hit_ratio_q4']]
+            'Quarter': kpis['chart_quarters'],
+            'Hit Ratio %': kpis['hit_ratio_by_quarter'],
+            'Label': ['' if x is None else f'{x:.0f}%' for x in kpis['hit_ratio_by_quarter']],
         })
-        
-        # Add formatted labels with % sign
-        hit_ratio_data['Label'] = hit_ratio_data['Hit Ratio %'].apply(lambda x: f'{int(x)}%')
+        hit_ratio_max = max([x for x in kpis['hit_ratio_by_quarter'] if x is not None], default=0)
         
         # Bar chart
         chart = alt.Chart(hit_ratio_data).mark_bar(color='#14b8a6', size=50).encode(
             x=alt.X('Quarter:N', axis=alt.Axis(title=None, labelAngle=0, labelFontSize=12, labelFont='Arial')),
             y=alt.Y('Hit Ratio %:Q', 
                     axis=alt.Axis(title=None, grid=True, labelFontSize=12, labelFont='Arial'),
-                    scale=alt.Scale(domain=[0, 40]))
+                    scale=alt.Scale(domain=[0, max(40, hit_ratio_max * 1.15)]))
         ).properties(
             height=200
         )
@@ -2300,7 +2361,7 @@ def render_dashboard():
         )
         
         # Add "good" threshold line
-        threshold_line = alt.Chart(pd.DataFrame({'y': [26]})).mark_rule(
+        threshold_line = alt.Chart(pd.DataFrame({'y': [HIT_RATIO_GOOD]})).mark_rule(
             color='white',
             strokeWidth=2,
             strokeDash=[5, 5]
@@ -2311,7 +2372,7 @@ def render_dashboard():
         # Add "good" label
         threshold_label = alt.Chart(pd.DataFrame({
             'x': ['Q4'],
-            'y': [26],
+            'y': [HIT_RATIO_GOOD],
             'label': ['good']
         })).mark_text(
             align='left',
@@ -2334,89 +2395,96 @@ def render_dashboard():
         st.altair_chart(combined_chart, use_container_width=True)
     
     with chart_col3:
-        # Cumulative Earned Premium - Bar chart
-        premium_data = pd.DataFrame({
-            'Quarter': ['Q1', 'Q2', 'Q3', 'Q4'],
-            'Premium': [0.58, 1.02, 1.28, st.session_state.chart_data['premium_q4']]
-        })
+        if kpis['earned_premium'] is None:
+            st.markdown(NO_POLICY_DATA_HTML, unsafe_allow_html=True)
+        else:
+            # Cumulative Earned Premium - Bar chart
+            premium_data = pd.DataFrame({
+                'Quarter': kpis['chart_quarters'],
+                'Premium': [None if x is None else x / 1e6 for x in kpis['earned_premium_by_quarter']]
+            })
+            premium_max = premium_data['Premium'].max()
+        
+            # Dynamic format based on currency
+            y_axis_format = ',.2f' if dashboard_market == 'german' else '$,.2f'
+            chart = alt.Chart(premium_data).mark_bar(color='#14b8a6', size=50).encode(
+                x=alt.X('Quarter:N', axis=alt.Axis(title=None, labelAngle=0, labelFontSize=12)),
+                y=alt.Y('Premium:Q', 
+                        axis=alt.Axis(title=None, grid=True, format=y_axis_format, labelFontSize=12),
+                        scale=alt.Scale(domain=[0, premium_max * 1.15 if premium_max > 0 else 1]))
+            ).properties(
+                height=200
+            )
         
-        # Dynamic format based on currency
-        y_axis_format = ',.2f' if dashboard_market == 'german' else '$,.2f'
-        chart = alt.Chart(premium_data).mark_bar(color='#14b8a6', size=50).encode(
-            x=alt.X('Quarter:N', axis=alt.Axis(title=None, labelAngle=0, labelFontSize=12)),
-            y=alt.Y('Premium:Q', 
-                    axis=alt.Axis(title=None, grid=True, format=y_axis_format, labelFontSize=12),
-                    scale=alt.Scale(domain=[0, 2]))
-        ).properties(
-            height=200
-        )
+            # Add text labels on top of bars with currency-appropriate formatting
+            if dashboard_market == 'german':
+                # For German market, format manually with € symbol
+                premium_data['Label'] = premium_data['Premium'].apply(lambda x: '' if pd.isna(x) else f'€{x:.2f}')
+                text = chart.mark_text(
+                    align='center',
+                    baseline='bottom',
+                    dy=-5,
+                    color='#0f766e',
+                    fontSize=12,
+                    fontWeight='bold'
+                ).encode(
+                    text='Label:N'
+                )
+            else:
+                # For US market, use standard $ formatting
+                text = chart.mark_text(
+                    align='center',
+                    baseline='bottom',
+                    dy=-5,
+                    color='#0f766e',
+                    fontSize=12,
+                    fontWeight='bold'
+                ).encode(
+                    text=alt.Text('Premium:Q', format='$,.2f')
+                )
         
-        # Add text labels on top of bars with currency-appropriate formatting
-        if dashboard_market == 'german':
-            # For German market, format manually with € symbol
-            premium_data['Label'] = premium_data['Premium'].apply(lambda x: f'€{x:.2f}')
-            text = chart.mark_text(
-                align='center',
-                baseline='bottom',
-                dy=-5,
-                color='#0f766e',
-                fontSize=12,
-                fontWeight='bold'
+            st.altair_chart(chart + text, use_container_width=True)
+    
+    with chart_col4:
+        if kpis['earned_premium'] is None:
+            st.markdown(NO_POLICY_DATA_HTML, unsafe_allow_html=True)
+        else:
+            # In Force Loss Ratio - Line chart
+            loss_ratio_data = pd.DataFrame({
+                'Quarter': kpis['chart_quarters'],
+                'Loss Ratio %': kpis['loss_ratio_by_quarter'],
+                'Label': ['' if x is None else f'{x:.0f}%' for x in kpis['loss_ratio_by_quarter']],
+            })
+            loss_ratios = [x for x in kpis['loss_ratio_by_quarter'] if x is not None]
+            loss_ratio_domain = [max(min(loss_ratios) - 5, 0), max(loss_ratios) + 5] if loss_ratios else [0, 100]
+        
+            # Line chart
+            line = alt.Chart(loss_ratio_data).mark_line(
+                color='#0891b2',
+                strokeWidth=3,
+                point=alt.OverlayMarkDef(color='#0891b2', size=80)
             ).encode(
-                text='Label:N'
+                x=alt.X('Quarter:N', axis=alt.Axis(title=None, labelAngle=0, labelFontSize=12)),
+                y=alt.Y('Loss Ratio %:Q', 
+                        axis=alt.Axis(title=None, grid=True, format='.0f', labelFontSize=12),
+                        scale=alt.Scale(domain=loss_ratio_domain))
+            ).properties(
+                height=200
             )
-        else:
-            # For US market, use standard $ formatting
-            text = chart.mark_text(
+        
+            # Add text labels on points
+            text = line.mark_text(
                 align='center',
                 baseline='bottom',
-                dy=-5,
-                color='#0f766e',
+                dy=-12,
+                color='#5a9fb8',
                 fontSize=12,
                 fontWeight='bold'
             ).encode(
-                text=alt.Text('Premium:Q', format='$,.2f')
+                text='Label:N'
             )
         
-        st.altair_chart(chart + text, use_container_width=True)
-    
-    with chart_col4:
-        # In Force Loss Ratio - Line chart
-        loss_ratio_data = pd.DataFrame({
-            'Quarter': ['Q1', 'Q2', 'Q3', 'Q4'],
-            'Loss Ratio %': [49, 51, 52, 49]
-        })
-        
-        # Add formatted labels with % sign
-        loss_ratio_data['Label'] = loss_ratio_data['Loss Ratio %'].apply(lambda x: f'{int(x)}%')
-        
-        # Line chart
-        line = alt.Chart(loss_ratio_data).mark_line(
-            color='#0891b2',
-            strokeWidth=3,
-            point=alt.OverlayMarkDef(color='#0891b2', size=80)
-        ).encode(
-            x=alt.X('Quarter:N', axis=alt.Axis(title=None, labelAngle=0, labelFontSize=12)),
-            y=alt.Y('Loss Ratio %:Q', 
-                    axis=alt.Axis(title=None, grid=True, format='.0f', labelFontSize=12),
-                    scale=alt.Scale(domain=[44, 55]))
-        ).properties(
-            height=200
-        )
-        
-        # Add text labels on points
-        text = line.mark_text(
-            align='center',
-            baseline='bottom',
-            dy=-12,
-            color='#5a9fb8',
-            fontSize=12,
-            fontWeight='bold'
-        ).encode(
-            text='Label:N'
-        )
-        
-        st.altair_chart(line + text, use_container_width=True)
+            st.altair_chart(line + text, use_container_width=True)
     
     # === SUBMISSIONS TABLE ===
     # Tabs for filtering
@@ -2448,14 +2516,14 @@ def render_dashboard():
         # Clear the flag after switching
         st.session_state.open_declined_tab = False
     
-    # Get all submissions
-    all_submissions = get_all_submissions()
+    # Get all submissions, pre-split by status
+    submission_index = get_submission_index()
     
     with tab1:
-        active_subs = [s for s in all_submissions if s['status'].upper() not in ['BOUND', 'DECLINED']]
+        active_subs = submission_index['active']
         # Only show quoted submissions that have been accepted (quote sent to broker)
-        quoted_subs = [s for s in active_subs if s['status'].upper() == 'QUOTED' and s.get('accepted', False)]
-        in_progress_subs = [s for s in active_subs if s['status'].upper() != 'QUOTED' or not s.get('accepted', False)]
+        quoted_subs = submission_index['quoted']
+        in_progress_subs = submission_index['in_progress']
         
         if active_subs:
             st.caption(f"Showing {len(active_subs)} active submission(s)")
@@ -2505,21 +2573,9 @@ def render_dashboard():
                             show_loading_modal([
                                 "Sending data to PolicyCenter for Binding",
                                 f"Policy Bound: {policy_number}"
-                            ])
-                            
-                            update_submission_status(sub['id'], 'BOUND')
-                            
-                            # Update dashboard KPIs
-                            st.session_state.dashboard_kpis['turnaround_time'] = 3.9
-                            st.session_state.dashboard_kpis['hit_ratio'] = 37
-                            st.session_state.dashboard_kpis['earned_premium'] = 1.85
+                            ], work=[lambda: update_submission_status(sub['id'], 'BOUND')])
                             
-                            # Update chart data
-                            st.session_state.chart_data['hit_ratio_q4'] = 37
-                            st.session_state.chart_data['premium_q4'] = 1.85
-                            
-                            st.success(f"✅ Policy bound for {sub['account_name']}! Metrics updated.")
-                            time.sleep(1)
+                            flash_success(f"✅ Policy bound for {sub['account_name']}! Hit ratio updated.")
                             st.rerun()
                 st.markdown("---")
             
@@ -2638,7 +2694,7 @@ def render_dashboard():
             st.info("No active submissions found.")
     
     with tab2:
-        bound_subs = [s for s in all_submissions if s['status'].upper() == 'BOUND']
+        bound_subs = submission_index['bound']
         
         # Show bound submissions
         if bound_subs:
@@ -2666,7 +2722,7 @@ def render_dashboard():
             st.info("No bound submissions yet. Complete the quote process to bind a policy.")
     
     with tab3:
-        declined_subs = [s for s in all_submissions if s['status'].upper() == 'DECLINED']
+        declined_subs = submission_index['declined']
         if declined_subs:
             st.caption(f"Showing {len(declined_subs)} declined submission(s)")
             df_declined = pd.DataFrame([{
@@ -2715,8 +2771,7 @@ def render_dashboard():
                     # Clear session state
                     for key in list(st.session_state.keys()):
                         del st.session_state[key]
-                    st.success(f"✅ {message}")
-                    time.sleep(1)
+                    flash_success(f"✅ {message}")
                     st.rerun()
                 else:
                     st.error(f"❌ Error: {message}")
@@ -3007,24 +3062,20 @@ def render_submission_detail():
         col_accept1, col_accept2, col_accept3 = st.columns([1, 1, 2])
         with col_accept1:
             if st.button("✅ Accept Summary", use_container_width=True):
+                submission_id = st.session_state.selected_submission
                 show_loading_modal([
                     "Updating Completeness Score by 12 points",
                     "Unlocking Proposal Creation"
+                ], work=[
+                    # Save to database
+                    lambda: update_submission_status(submission_id, 'In Review', completeness=86)
                 ])
                 
                 # Update session state
                 st.session_state.submission_state['completeness'] = 86
                 st.session_state.submission_state['status'] = 'In Review'
                 
-                # Save to database
-                update_submission_status(
-                    st.session_state.selected_submission,
-                    'In Review',
-                    completeness=86
-                )
-                
-                st.success("✅ Summary accepted! Completeness updated.")
-                time.sleep(1)
+                flash_success("✅ Summary accepted! Completeness updated.")
                 st.rerun()
         
         with col_accept2:
@@ -3098,37 +3149,29 @@ def render_submission_detail():
             with col_analyze1:
                 if not state['is_recs_visible']:
                     if st.button("🤖 Analyze Proposal", use_container_width=True):
-                        st.session_state.show_loading = True
-                        st.session_state.loading_message = "Analyzing proposal with AI..."
-                        time.sleep(2)
+                        show_loading_modal(["Analyzing proposal with AI..."])
                         st.session_state.submission_state['is_recs_visible'] = True
-                        st.session_state.show_loading = False
                         st.rerun()
             
             with col_analyze2:
                 if state['status'].upper() != 'QUOTED':
                     if st.button("📧 Send to Broker", type="primary", use_container_width=True, key="send_base_quote"):
+                        submission_id = st.session_state.selected_submission
                         show_loading_modal([
                             "Creating Broker Quote page",
                             "Sending Email",
                             "Updating Proposal Status"
+                        ], work=[
+                            # Update status to Quoted and mark as accepted (ready to bind)
+                            lambda: update_submission_status(submission_id, 'Quoted'),
+                            lambda: update_submission_accepted(submission_id, True)
                         ])
                         
-                        # Update status to Quoted and mark as accepted (ready to bind)
                         st.session_state.submission_state['status'] = 'Quoted'
                         st.session_state.submission_state['bind_available'] = False
                         st.session_state.submission_state['bind_suppressed'] = True
-                        update_submission_status(
-                            st.session_state.selected_submission,
-                            'Quoted'
-                        )
-                        update_submission_accepted(
-                            st.session_state.selected_submission,
-                            True
-                        )
                         
-                        st.success("✅ Quote sent to broker!")
-                        time.sleep(1)
+                        flash_success("✅ Quote sent to broker!")
                         st.rerun()
         
         # === AI RECOMMENDATIONS (Conditionally rendered) ===
@@ -3167,8 +3210,7 @@ def render_submission_detail():
                         st.session_state.submission_state['quotes'].append('generated')
                         st.session_state.submission_state['is_comparison_visible'] = False
                     
-                    st.success("✅ Endorsements added!")
-                    time.sleep(1)
+                    flash_success("✅ Endorsements added!")
                     st.rerun()
             
             with col_rec2:
@@ -3230,20 +3272,22 @@ def render_submission_detail():
             
             with col_compare1:
                 if st.button("📊 Compare Quotes", use_container_width=True):
-                    st.session_state.show_loading = True
-                    st.session_state.loading_message = "Retrieving Quotes..."
-                    time.sleep(2)
+                    show_loading_modal(["Retrieving Quotes..."])
                     st.session_state.submission_state['is_comparison_visible'] = True
-                    st.session_state.show_loading = False
                     st.rerun()
             
             with col_compare2:
                 if state['status'].upper() != 'QUOTED':
                     if st.button("📧 Quote", type="primary", use_container_width=True, key="send_generated_quote"):
+                        submission_id = st.session_state.selected_submission
                         show_loading_modal([
                             "Creating Broker Quote page",
                             "Sending Email",
                             "Updating Proposal Status"
+                        ], work=[
+                            # Update status to Quoted and mark as accepted (ready to bind)
+                            lambda: update_submission_status(submission_id, 'Quoted'),
+                            lambda: update_submission_accepted(submission_id, True)
                         ])
                         
                         # Update session state
@@ -3251,18 +3295,7 @@ def render_submission_detail():
                         st.session_state.submission_state['bind_available'] = False
                         st.session_state.submission_state['bind_suppressed'] = True
                         
-                        # Save to database and mark as accepted (ready to bind)
-                        update_submission_status(
-                            st.session_state.selected_submission,
-                            'Quoted'
-                        )
-                        update_submission_accepted(
-                            st.session_state.selected_submission,
-                            True
-                        )
-                        
-                        st.success("✅ Quote sent to broker successfully!")
-                        time.sleep(2)
+                        flash_success("✅ Quote sent to broker successfully!")
                         st.rerun()
 
             with col_bind:
@@ -3270,26 +3303,17 @@ def render_submission_detail():
                     if st.button("✅ Bind Policy", type="primary", use_container_width=True, key="bind_generated_quote"):
                         import random
                         policy_number = random.randint(2800000000, 2899999999)
+                        submission_id = st.session_state.selected_submission
                         show_loading_modal([
                             "Sending data to PolicyCenter for Binding",
                             f"Policy Bound: {policy_number}"
-                        ])
-
-                        update_submission_status(st.session_state.selected_submission, 'BOUND')
-
-                        # Update dashboard KPIs to reflect new bound policy
-                        st.session_state.dashboard_kpis['turnaround_time'] = 3.9
-                        st.session_state.dashboard_kpis['hit_ratio'] = 37
-                        st.session_state.dashboard_kpis['earned_premium'] = 1.85
-                        st.session_state.chart_data['hit_ratio_q4'] = 37
-                        st.session_state.chart_data['premium_q4'] = 1.85
+                        ], work=[lambda: update_submission_status(submission_id, 'BOUND')])
 
                         st.session_state.submission_state['status'] = 'Bound'
                         st.session_state.submission_state['bind_available'] = False
                         st.session_state.submission_state['bind_suppressed'] = False
 
-                        st.success("✅ Policy bound successfully! Metrics updated.")
-                        time.sleep(1)
+                        flash_success("✅ Policy bound successfully! Hit ratio updated.")
                         st.rerun()
         
         # === QUOTE COMPARISON VIEW ===
@@ -3712,26 +3736,17 @@ def render_submission_detail():
             if st.button("✅ Bind Policy", type="primary", use_container_width=True, key="detail_bind_policy"):
                 import random
                 policy_number = random.randint(2800000000, 2899999999)
+                submission_id = st.session_state.selected_submission
                 show_loading_modal([
                     "Sending data to PolicyCenter for Binding",
                     f"Policy Bound: {policy_number}"
-                ])
-
-                update_submission_status(st.session_state.selected_submission, 'BOUND')
-
-                # Update dashboard KPIs to reflect new bound policy
-                st.session_state.dashboard_kpis['turnaround_time'] = 3.9
-                st.session_state.dashboard_kpis['hit_ratio'] = 37
-                st.session_state.dashboard_kpis['earned_premium'] = 1.85
-                st.session_state.chart_data['hit_ratio_q4'] = 37
-                st.session_state.chart_data['premium_q4'] = 1.85
+                ], work=[lambda: update_submission_status(submission_id, 'BOUND')])
 
                 st.session_state.submission_state['status'] = 'Bound'
                 st.session_state.submission_state['bind_available'] = False
                 st.session_state.submission_state['bind_suppressed'] = False
 
-                st.success("✅ Policy bound successfully! Metrics updated.")
-                time.sleep(1)
+                flash_success("✅ Policy bound successfully! Hit ratio updated.")
                 st.rerun()
 
 
@@ -3740,14 +3755,17 @@ def render_submission_detail():
 def main():
     """Main application entry point"""
     
-    # Render loading modal if active
-    render_loading_modal()
+    # Show confirmation from the previous action
+    render_flash_message()
     
     # Route to appropriate screen
     if st.session_state.current_screen == 'dashboard':
         render_dashboard()
     elif st.session_state.current_screen == 'submission_detail':
         render_submission_detail()
+    
+    with st.sidebar:
+        render_profile_panel(sql_profile)
 
 if __name__ == "__main__":
     main()
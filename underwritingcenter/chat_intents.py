@@ -0,0 +1,171 @@
+"""
+Chat Intent Router
+==================
+Declarative intent table for the underwriting assistant. All keywords, company
+names and submission-number patterns are compiled once at import into a single
+alternation regex, so route_intent() finds the intent and its entities in one
+pass over the message.
+"""
+import re
+
+# Intents in priority order: when a message matches several, the first one listed wins.
+# Keywords match at the start of a word of the lowercased message (English and German),
+# so stems like 'aktualisier' also catch their inflections.
+INTENTS = [
+    ('search', ['search', 'suche', 'find', 'finde']),
+    ('update', ['update', 'aktualisier', 'neuigkeiten']),
+    ('catch_up', ['catch', 'summary', 'zusammenfassung', 'überblick']),
+    ('priority', ['action', 'priority', 'todo', 'aktion', 'priorität', 'aufgaben']),
+    ('help', ['help', 'what can', 'hilfe', 'metriken', 'was kannst']),
+]
+
+# Intents whose keywords must be whole words: search verbs hide inside other words
+# ("research", "findings", "besuche") and would otherwise hijack the message
+WHOLE_WORD_INTENTS = {'search'}
+
+# Filler between a search keyword and the search terms ("search for ...", "suche nach ...")
+SEARCH_FILLER = re.compile(r'^[\s:]*(?:(?:for|nach|in|the|die|der|das)\s+)*')
+
+# Words that turn a company mention into a navigation request
+OPEN_KEYWORDS = ['open', 'öffne', 'zeig mir']
+
+# Company keywords -> (display name, submission number)
+COMPANIES = [
+    (['floor', 'decor'], 'Floor & Decor', 'SUB-2026-001'),
+    (['monrovia', 'metalworking'], 'Monrovia Metalworking', 'SUB-2026-003'),
+    (['construction', 'dynamics'], 'Construction Dynamics', 'SUB-2026-007'),
+    (['möbel', 'schmidt'], 'Möbel & Wohnen Schmidt', 'SUB-2026-001-DE'),
+    (['bauhaus'], 'Bauhaus Einzelhandel', 'SUB-2026-003-DE'),
+    (['techdistribution', 'tech distribution'], 'TechDistribution Deutschland', 'SUB-2026-004-DE'),
+]
+
+# Submission references, most specific first (e.g. "SUB-2026-001-DE", "2026-001", "open submission 001").
+# A bare three-digit reference is resolved to the current year's series.
+DEFAULT_SUBMISSION_YEAR = '2026'
+SUBMISSION_PATTERNS = [
+    r'sub-?(?P<year>\d{4})-?(?P<num>\d{3})(?P<suffix>-de)?',
+    r'(?P<year>\d{4})-(?P<num>\d{3})(?P<suffix>-de)?',
+    r'(?:submission|einreichung)\s+(?P<num>\d{3})',
+    r'(?:open|öffne\w*)\s+(?P<num>\d{3})',
+]
+
+
+def _trie_pattern(words):
+    """Regex for a set of literal words, factored into a trie so each position is tried once"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+def _compile_router():
+    """Build the single alternation regex and the keyword -> (kind, payload) table"""
+    keywords = {}
+    whole_words = set()
+    for keywords_, company, submission_number in COMPANIES:
+        for keyword in keywords_:
+            keywords[keyword] = ('company', (company, submission_number))
+    for keyword in OPEN_KEYWORDS:
+        keywords[keyword] = ('open', None)
+    for priority, (intent, intent_keywords) in enumerate(INTENTS):
+        for keyword in intent_keywords:
+            keywords[keyword] = ('intent', (priority, intent))
+            if intent in WHOLE_WORD_INTENTS:
+                whole_words.add(keyword)
+
+    # Submission patterns go first so "open 001" is read as a reference, not as "open".
+    # Inner group names are prefixed so they stay unique across the alternation.
+    branches = [
+        '(?P<s{0}>{1})'.format(i, re.sub(r'\(\?P<(\w+)>', rf'(?P<s{i}_\1>', pattern))
+        for i, pattern in enumerate(SUBMISSION_PATTERNS)
+    ]
+    prefixes = [keyword for keyword in keywords if keyword not in whole_words]
+    branches.append(rf'(?P<keyword>\b(?:{_trie_pattern(whole_words)})\b|\b{_trie_pattern(prefixes)})')
+
+    # Cheap first-character guard before trying any branch
+    first_chars = set('0123456789') | {word[0] for word in keywords}
+    first_chars |= {pattern[0] for pattern in ('sub', 'submission', 'einreichung', 'open', 'öffne')}
+    guard = '[' + ''.join(re.escape(c) for c in sorted(first_chars)) + ']'
+
+    return re.compile(f"(?={guard})(?:{'|'.join(branches)})"), keywords
+
+
+_ROUTER, _KEYWORDS = _compile_router()
+
+
+def _submission_number(match):
+    name = match.lastgroup
+    groups = match.groupdict()
+    year = groups.get(f'{name}_year')
+    suffix = groups.get(f'{name}_suffix')
+    number = f"SUB-{year or DEFAULT_SUBMISSION_YEAR}-{groups[f'{name}_num']}"
+    return number + suffix.upper() if suffix else number
+
+
+def route_intent(user_input):
+    """
+    Classify a chat message in a single regex pass.
+
+    Args:
+        user_input: Raw chat message
+
+    Returns:
+        Dict with 'intent' ('open_submission', 'search', 'update', 'catch_up',
+        'priority', 'help', 'company_info' or None), 'submission_number' (explicit
+        or resolved from the company), 'company' and 'search_terms' (the text
+        after the search keyword, for the search intent)
+    """
+    submission_number = None
+    company = None
+    company_submission = None
+    wants_open = False
+    best = None
+    search_end = None
+
+    for match in _ROUTER.finditer(user_input.lower()):
+        if match.lastgroup != 'keyword':
+            if submission_number is None:
+                submission_number = _submission_number(match)
+            continue
+        kind, payload = _KEYWORDS[match.group()]
+        if kind == 'company':
+            if company is None:
+                company, company_submission = payload
+        elif kind == 'open':
+            wants_open = True
+        else:
+            if payload[1] == 'search' and search_end is None:
+                search_end = match.end()
+            if best is None or payload[0] < best[0]:
+                best = payload
+
+    if submission_number:
+        intent = 'open_submission'
+    elif wants_open and company:
+        intent = 'open_submission'
+        submission_number = company_submission
+    elif best:
+        intent = best[1]
+    elif company:
+        intent = 'company_info'
+        submission_number = company_submission
+    else:
+        intent = None
+
+    search_terms = None
+    if intent == 'search':
+        search_terms = SEARCH_FILLER.sub('', user_input[search_end:]).strip(' ?!."\'')
+
+    return {'intent': intent, 'submission_number': submission_number, 'company': company,
+            'search_terms': search_terms}